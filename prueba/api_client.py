@@ -1,10 +1,24 @@
 # api_client.py
 import os
 import json
+import pickle
+import tempfile
 import time
+import threading
 import requests
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+
+from async_writer import SHARED_WRITER, BackgroundWriter
+from json_stream import iter_json_array_items
+from memory_cache import SHARED_CACHE, MemoryCache
+
+STREAM_CHUNK = 64 * 1024   # bytes por lectura al hacer streaming de respuestas / archivos
+RETRY_STATUS = (429, 500, 502, 503, 504)   # respuestas que se reintentan (con backoff)
+POLICIES = ("network_first", "stale_while_revalidate")
+REVALIDATE_SECONDS = 2.0   # un JSON en el cache en memoria se compara con el disco (os.stat) como mucho cada N s
 
 class ApiClient:
     def __init__(
@@ -12,12 +26,43 @@ class ApiClient:
         base_url: str = "https://tigerds-api.kindflower-ccaf48b6.eastus.azurecontainerapps.io",
         cache_dir: str = "api_cache",
         data_dir: str = "data",
-        ttl: int = 60  # segundos de validez del cache
+        ttl: int = 60,  # segundos de validez del cache
+        timeout: float = 5.0,  # segundos por request (conexión / lectura)
+        pool_size: int = 4,  # conexiones keep-alive por host
+        retries: int = 2,  # reintentos ante errores de conexión / timeout / RETRY_STATUS
+        backoff: float = 0.3,  # espera base entre reintentos (0.3, 0.6, 1.2 s...)
+        policy: str = "network_first",  # o "stale_while_revalidate" (cache primero, refresco en segundo plano)
+        stale_ttl: int = 600,  # segundos extra (después de ttl) en que el cache se sirve como "stale"
+        memory_cache: Optional[MemoryCache] = None,  # por defecto el cache en memoria compartido del proceso
+        writer: Optional[BackgroundWriter] = None  # escrituras del cache en segundo plano (compartido por defecto)
     ):
         self.base_url = base_url.rstrip("/")
         self.cache_dir = Path(cache_dir)
         self.data_dir = Path(data_dir)
         self.ttl = ttl
+        self.timeout = timeout
+        if policy not in POLICIES:
+            raise ValueError(f"policy desconocida: {policy} (usar {POLICIES})")
+        self.policy = policy
+        self.stale_ttl = stale_ttl
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.memory = SHARED_CACHE if memory_cache is None else memory_cache
+        self.writer = SHARED_WRITER if writer is None else writer
+
+        # stale-while-revalidate: un refresco en curso por archivo de cache + suscriptores por endpoint
+        self._lock = threading.Lock()
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self._subscribers: Dict[str, List[Callable[[str, Any], None]]] = {}
+        # plazo total (time.monotonic) de los requests de cada hilo, ver deadline()
+        self._local = threading.local()
+
+        # sesión propia: reutiliza conexiones TCP/TLS (keep-alive) entre requests.
+        # Los reintentos los hace _get (no el adapter) para poder acotarlos con un plazo total.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
         self.cache_dir.mkdir(exist_ok=True, parents=True)
         self.data_dir.mkdir(exist_ok=True, parents=True)
@@ -42,41 +87,225 @@ class ApiClient:
         return self.cache_dir / f"{cache_name}.json"
 
     def _load_json_file(self, path: Path) -> Optional[Union[dict, list]]:
-        if not path.exists():
+        """
+        Lee un JSON pasando por el cache en memoria, que guarda el pickle del contenido parseado:
+        - cada llamada recibe objetos nuevos (pickle.loads es más rápido que json.loads y que
+          deepcopy), así que el llamador puede modificarlos sin tocar el cache compartido;
+        - el presupuesto de bytes se cobra con el tamaño real de lo que queda en memoria;
+        - la entrada se valida con (mtime_ns, size) del archivo, pero como mucho cada
+          REVALIDATE_SECONDS: entre medio un hit no toca el disco. Las escrituras del propio
+          cliente (_write_cache_file) invalidan la entrada al instante.
+        Si hay una escritura pendiente para 'path' se usa ese contenido (se lee lo último guardado).
+        """
+        has_pending, pending = self.writer.pending(path)
+        if has_pending:
+            try:
+                return json.loads(pending) if pending is not None else None
+            except json.JSONDecodeError:
+                return None
+        key = ("json", str(path))
+        now = time.monotonic()
+        cached = self.memory.get(key)
+        if cached is not None and now - cached[1] < REVALIDATE_SECONDS:
+            return pickle.loads(cached[2])
+        try:
+            st = path.stat()
+        except OSError:
+            self.memory.invalidate(key)
             return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        if cached is not None and cached[0] == stamp:
+            self.memory.put(key, (stamp, now, cached[2]), size=len(cached[2]))
+            return pickle.loads(cached[2])
         try:
             with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
             return None
+        # si mientras tanto se encoló una escritura, lo leído ya es viejo: no cachearlo
+        if not self.writer.has_pending(path):
+            blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            self.memory.put(key, (stamp, now, blob), size=len(blob))
+        return data
+
+    def _write_cache_file(self, path: Path, data: Optional[bytes]):
+        """Encola la escritura (o el borrado, data=None) de 'path' y descarta su copia en memoria."""
+        self.writer.submit(path, data)
+        self.memory.invalidate(("json", str(path)))
+
+    def _publish_cache_file(self, path: Path, source: Path):
+        """Como _write_cache_file, pero con un archivo ya escrito en disco (se renombra, no se lee)."""
+        self.writer.submit_file(path, source)
+        self.memory.invalidate(("json", str(path)))
 
     def _save_json_file(self, path: Path, data: Any):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """JSON compacto, escrito en segundo plano y de forma atómica (temporal + rename)."""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._write_cache_file(path, payload)
+
+    def _cache_age(self, path: Path) -> Optional[float]:
+        """Segundos desde la última escritura del cache (0 si hay una pendiente); None si no existe."""
+        has_pending, pending = self.writer.pending(path)
+        if has_pending:
+            return 0.0 if pending is not None else None
+        try:
+            return time.time() - path.stat().st_mtime
+        except OSError:
+            return None
+
+    # ---- validadores HTTP (ETag / Last-Modified) junto a cada archivo de cache ----
+    def _meta_path(self, cache_file: Path) -> Path:
+        return cache_file.with_name(cache_file.stem + ".meta.json")
+
+    def _conditional_headers(self, cache_file: Path) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since si hay cache con validadores guardados."""
+        if self._cache_age(cache_file) is None:
+            return {}
+        meta = self._load_json_file(self._meta_path(cache_file))
+        if not isinstance(meta, dict):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def _save_validators(self, cache_file: Path, resp):
+        meta_file = self._meta_path(cache_file)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._save_json_file(meta_file, {"etag": etag, "last_modified": last_modified})
+        elif meta_file.exists() or self.writer.has_pending(meta_file):
+            self._write_cache_file(meta_file, None)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Conexiones abiertas vs requests hechos por la sesión (reused = requests que no abrieron conexión)."""
+        opened = sent = 0
+        seen = set()
+        for adapter in self.session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return {"opened": opened, "requests": sent, "reused": max(0, sent - opened)}
+
+    def close(self):
+        self.session.close()
+
+    @contextmanager
+    def deadline(self, seconds: Optional[float]):
+        """
+        Dentro del bloque, los requests de este hilo (reintentos y esperas incluidos) terminan como
+        mucho a los 'seconds' segundos; después fallan como un timeout y se usa el respaldo.
+        None = sin plazo. Anidado, vale el plazo más corto.
+        """
+        previous = getattr(self._local, "deadline", None)
+        end = previous
+        if seconds is not None:
+            end = time.monotonic() + max(0.0, seconds)
+            if previous is not None:
+                end = min(previous, end)
+        self._local.deadline = end
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET con reintentos ante errores de conexión / timeout y RETRY_STATUS, con backoff exponencial
+        (backoff, 2*backoff, 4*backoff...). Con un plazo activo (deadline()) el timeout de cada intento
+        se recorta a lo que queda y no se reintenta si la espera ya no entra en el plazo.
+        Agotados los reintentos por status, devuelve la última respuesta.
+        """
+        end = getattr(self._local, "deadline", None)
+        attempt = 0
+        while True:
+            timeout = self.timeout
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    raise requests.exceptions.Timeout(f"plazo vencido antes de pedir {url}")
+                timeout = min(timeout, remaining)
+            try:
+                resp = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not self._retry_wait(attempt, end):
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS or not self._retry_wait(attempt, end):
+                    return resp
+                resp.close()
+            attempt += 1
+
+    def _retry_wait(self, attempt: int, end: Optional[float]) -> bool:
+        """Espera el backoff antes del reintento número attempt+1. False si no quedan reintentos o tiempo."""
+        if attempt >= self.retries:
+            return False
+        wait = self.backoff * (2 ** attempt)
+        if end is not None and time.monotonic() + wait >= end:
+            return False
+        time.sleep(wait)
+        return True
 
     def _is_cache_valid(self, path: Path) -> bool:
         """Determina si el cache es válido según TTL."""
-        if not path.exists():
-            return False
-        age = time.time() - path.stat().st_mtime
-        return age <= self.ttl
+        age = self._cache_age(path)
+        return age is not None and age <= self.ttl
 
     # -------------------------------
     # Fetch principal
     # -------------------------------
 
-    def fetch_data(self, endpoint: str, params: dict = None) -> Optional[Union[dict, list]]:
+    def fetch_data(self, endpoint: str, params: dict = None, offline: bool = False,
+                   policy: Optional[str] = None) -> Optional[Union[dict, list]]:
         """
         Intenta obtener datos del API, si falla usa cache válido,
         y si tampoco hay cache, usa fallback local en /data.
+        offline=True salta el API y va directo al respaldo (p.ej. si se venció el plazo de arranque).
+        policy (por defecto self.policy):
+        - "network_first": siempre intenta el API primero.
+        - "stale_while_revalidate": si el cache tiene menos de ttl + stale_ttl segundos se devuelve
+          al instante; si ya pasó ttl se refresca en segundo plano y se avisa a los suscriptores.
         """
+        if offline:
+            return self._fallback(endpoint, params)
+
+        if (policy or self.policy) == "stale_while_revalidate":
+            data = self._cached_or_stale(endpoint, params)
+            if data is not None:
+                return data
+
+        data, _ = self._fetch_network(endpoint, params)
+        if data is not None:
+            return data
+        return self._fallback(endpoint, params)
+
+    def _fetch_network(self, endpoint: str, params: dict = None) -> Tuple[Optional[Union[dict, list]], bool]:
+        """Pide el endpoint al API. Devuelve (data, changed); (None, False) si falla."""
         cache_file = self._cache_path(endpoint, params)
-        local_file = self.data_dir / self.endpoint_to_local.get(endpoint, "")
 
-        # 1. Intentar API
+        # 1. Intentar API (request condicional si el cache tiene ETag / Last-Modified)
         url = f"{self.base_url}/{endpoint}"
         try:
-            resp = requests.get(url, params=params, timeout=5)
+            resp = self._get(url, params=params, headers=self._conditional_headers(cache_file))
+            if resp.status_code == 304:
+                # sin cambios: el cache vuelve a ser válido sin descargar ni reescribir el cuerpo
+                data = self._load_json_file(cache_file)
+                if data is not None:
+                    if not self.writer.has_pending(cache_file):
+                        os.utime(cache_file)
+                    print(f"[API] {endpoint} 304 → cache sin cambios")
+                    return data, False
+                # el cache desapareció/corrupto: pedir el cuerpo completo
+                resp = self._get(url, params=params)
             resp.raise_for_status()
             data = resp.json()
 
@@ -86,11 +315,89 @@ class ApiClient:
 
             # Guardar en cache
             self._save_json_file(cache_file, data)
+            self._save_validators(cache_file, resp)
             print(f"[API] {endpoint} OK → datos guardados en cache")
-            return data
+            return data, True
 
-        except requests.exceptions.RequestException:
+        except (requests.exceptions.RequestException, ValueError):
             print(f"[WARN] No se pudo conectar a {endpoint}, usando respaldo")
+        return None, False
+
+    # -------------------------------
+    # Stale-while-revalidate
+    # -------------------------------
+
+    def _cached_or_stale(self, endpoint: str, params: dict = None) -> Optional[Union[dict, list]]:
+        cache_file = self._cache_path(endpoint, params)
+        age = self._cache_age(cache_file)
+        if age is None or age > self.ttl + self.stale_ttl:
+            return None
+        data = self._load_json_file(cache_file)
+        if data is None:
+            return None
+        if age > self.ttl:
+            print(f"[CACHE] {endpoint} stale ({age:.0f}s) → refrescando en segundo plano")
+            self.refresh_async(endpoint, params)
+        else:
+            print(f"[CACHE] {endpoint} cargado desde cache válido")
+        return data
+
+    def refresh_async(self, endpoint: str, params: dict = None) -> bool:
+        """Refresca el endpoint en un hilo. False si ya había un refresco en curso para él."""
+        key = str(self._cache_path(endpoint, params))
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            thread = threading.Thread(target=self._refresh, args=(key, endpoint, params),
+                                      name=f"api-refresh-{endpoint}", daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+        return True
+
+    def _refresh(self, key: str, endpoint: str, params: dict = None):
+        try:
+            data, changed = self._fetch_network(endpoint, params)
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+        if data is not None and changed:
+            self._notify(endpoint, data)
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None):
+        """Espera a que terminen los refrescos en curso (útil en tests o antes de cerrar)."""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for t in threads:
+            t.join(timeout)
+
+    def subscribe(self, endpoint: str, callback: Callable[[str, Any], None]) -> Callable[[], None]:
+        """
+        callback(endpoint, data) se llama (desde el hilo de refresco) cuando llegan datos nuevos
+        de 'endpoint'; 'data' es lo mismo que devolvería fetch_data. Devuelve una función para desuscribirse.
+        """
+        with self._lock:
+            self._subscribers.setdefault(endpoint, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(endpoint, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+        return unsubscribe
+
+    def _notify(self, endpoint: str, data: Any):
+        with self._lock:
+            callbacks = list(self._subscribers.get(endpoint, []))
+        for cb in callbacks:
+            try:
+                cb(endpoint, data)
+            except Exception as e:
+                print(f"[API] error en suscriptor de {endpoint}:", e)
+
+    def _fallback(self, endpoint: str, params: dict = None) -> Optional[Union[dict, list]]:
+        """Respaldo sin red: cache válido y luego archivo local en /data."""
+        cache_file = self._cache_path(endpoint, params)
+        local_file = self.data_dir / self.endpoint_to_local.get(endpoint, "")
 
         # 2. Intentar cache válido
         if self._is_cache_valid(cache_file):
@@ -100,7 +407,7 @@ class ApiClient:
                 return data
 
         # 3. Intentar local
-        if local_file.exists():
+        if local_file.is_file():
             data = self._load_json_file(local_file)
             if data is not None:
                 print(f"[LOCAL] {endpoint} cargado desde /data")
@@ -114,8 +421,8 @@ class ApiClient:
     # Wrappers específicos
     # -------------------------------
 
-    def get_city_map(self) -> Dict[str, Any]:
-        data = self.fetch_data("city/map") or {}
+    def get_city_map(self, offline: bool = False, policy: Optional[str] = None) -> Dict[str, Any]:
+        data = self.fetch_data("city/map", offline=offline, policy=policy) or {}
         return {
             "name": data.get("name", "TigerCity"),
             "width": data.get("width", 30),
@@ -124,16 +431,115 @@ class ApiClient:
             "roads": data.get("roads", []),
         }
 
-    def get_jobs(self) -> list:
-        data = self.fetch_data("city/jobs") or []
+    def get_jobs(self, offline: bool = False, policy: Optional[str] = None) -> list:
+        return self.parse_jobs(self.fetch_data("city/jobs", offline=offline, policy=policy))
+
+    @staticmethod
+    def parse_jobs(data: Any) -> list:
+        """Lista de pedidos a partir de lo que devuelve fetch_data("city/jobs")."""
+        data = data or []
         if isinstance(data, dict) and "jobs" in data:
             return data["jobs"]
         if isinstance(data, list):
             return data
         return []
 
-    def get_weather(self) -> Dict[str, Any]:
-        data = self.fetch_data("city/weather", params={"city": "TigerCity"}) or {}
+    def iter_jobs(self, offline: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Igual que get_jobs pero como generador: los pedidos se parsean y entregan a medida que
+        llegan del API (o se leen del cache / /data), sin cargar toda la respuesta en memoria.
+        Al terminar la descarga el cache se reescribe (atómico) con los pedidos recibidos.
+        """
+        if not offline:
+            streamed = False
+            try:
+                for job in self._stream_jobs_from_api():
+                    streamed = True
+                    yield job
+                return
+            except (requests.exceptions.RequestException, ValueError) as e:
+                if streamed:
+                    # ya se entregaron pedidos: no mezclar con el respaldo
+                    print("[WARN] streaming de city/jobs interrumpido:", e)
+                    return
+                print("[WARN] No se pudo conectar a city/jobs, usando respaldo")
+
+        cache_file = self._cache_path("city/jobs")
+        local_file = self.data_dir / self.endpoint_to_local["city/jobs"]
+        for path, label in ((cache_file, "CACHE"), (local_file, "LOCAL")):
+            if path is cache_file and not self._is_cache_valid(path):
+                continue
+            has_pending, pending = self.writer.pending(path)
+            try:
+                if has_pending:
+                    if pending is None:
+                        continue
+                    chunks: Iterable[bytes] = [pending]
+                    yield from self._iter_jobs_from(chunks)
+                elif path.is_file():
+                    with open(path, "rb") as f:
+                        yield from self._iter_jobs_from(iter(lambda: f.read(STREAM_CHUNK), b""))
+                else:
+                    continue
+                print(f"[{label}] city/jobs leído en streaming desde {path}")
+                return
+            except ValueError as e:
+                print(f"[WARN] {path} no es un JSON válido:", e)
+        print("[ERROR] No hay datos disponibles para city/jobs")
+
+    @staticmethod
+    def _iter_jobs_from(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+        for item in iter_json_array_items(chunks):
+            if isinstance(item, dict):
+                yield item
+
+    def _stream_jobs_from_api(self) -> Iterator[Dict[str, Any]]:
+        cache_file = self._cache_path("city/jobs")
+        url = f"{self.base_url}/city/jobs"
+        with self._get(url, stream=True, headers=self._conditional_headers(cache_file)) as resp:
+            if resp.status_code == 304 and not self.writer.has_pending(cache_file) and cache_file.is_file():
+                os.utime(cache_file)
+                print("[API] city/jobs 304 → cache sin cambios")
+                with open(cache_file, "rb") as f:
+                    yield from self._iter_jobs_from(iter(lambda: f.read(STREAM_CHUNK), b""))
+                return
+            if resp.status_code == 304:
+                resp.close()
+                resp = self._get(url, stream=True)
+            resp.raise_for_status()
+
+            # el cache se va escribiendo en un temporal propio (JSON compacto; nombre único, así dos
+            # streams simultáneos no se pisan) y al completar el writer lo renombra sobre el cache, en
+            # orden con cualquier otra escritura del mismo archivo y sin volver a cargarlo en memoria
+            count = 0
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=cache_file.parent, delete=False,
+                                             prefix=f".{cache_file.name}.", suffix=".stream.tmp") as out:
+                tmp = Path(out.name)
+                try:
+                    out.write("[")
+                    for job in self._iter_jobs_from(resp.iter_content(STREAM_CHUNK)):
+                        if count:
+                            out.write(",")
+                        out.write(json.dumps(job, ensure_ascii=False, separators=(",", ":")))
+                        count += 1
+                        yield job
+                    out.write("]")
+                except BaseException:
+                    out.close()
+                    tmp.unlink(missing_ok=True)
+                    raise
+            self._publish_cache_file(cache_file, tmp)
+            self._save_validators(cache_file, resp)
+            print(f"[API] city/jobs OK (streaming, {count} pedidos) → datos guardados en cache")
+
+    def get_weather(self, offline: bool = False, policy: Optional[str] = None) -> Dict[str, Any]:
+        return self.parse_weather(self.fetch_data("city/weather", params={"city": "TigerCity"},
+                                                  offline=offline, policy=policy))
+
+    @staticmethod
+    def parse_weather(data: Any) -> Dict[str, Any]:
+        """Resumen de clima (condition/summary/temperature) a partir de fetch_data("city/weather")."""
+        data = data or {}
         initial = data.get("initial", {})
         condition = initial.get("condition", "unknown")
 
@@ -0,0 +1,179 @@
+# async_writer.py
+"""
+Escrituras de archivos en segundo plano, atómicas y agrupadas por ruta.
+- submit(path, data) vuelve al instante; un hilo worker escribe después.
+- Si llegan varias escrituras para la misma ruta antes de que el worker la tome, sólo se
+  escribe la última (las intermedias nunca llegan a disco).
+- Cada escritura va a un archivo temporal en el mismo directorio y se renombra con os.replace:
+  un lector (o un crash a mitad de escritura) ve el archivo viejo completo o el nuevo completo.
+- data=None borra el archivo (en orden con las escrituras de esa ruta).
+- submit_file(path, source) publica un archivo ya escrito (p. ej. un stream volcado a disco)
+  renombrándolo sobre 'path', en orden con las demás escrituras y sin cargarlo en memoria.
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+DoneCallback = Callable[[Path, Optional[BaseException]], None]
+
+
+def write_atomic(path: Union[str, Path], data: bytes, fsync: bool = True):
+    """Escribe 'data' en un temporal junto a 'path' y lo renombra sobre 'path'."""
+    path = Path(path)
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class _Job:
+    __slots__ = ("data", "source", "callbacks")
+
+    def __init__(self, data: Optional[bytes], source: Optional[Path] = None):
+        self.data = data
+        self.source = source   # archivo a renombrar sobre la ruta (en vez de escribir 'data')
+        self.callbacks: List[DoneCallback] = []
+
+    def discard(self):
+        """El job fue reemplazado antes de escribirse: su archivo fuente ya no se va a usar."""
+        if self.source is not None:
+            try:
+                self.source.unlink()
+            except OSError:
+                pass
+
+
+class BackgroundWriter:
+    def __init__(self, fsync: bool = True):
+        self.fsync = fsync
+        self._pending: "OrderedDict[Path, _Job]" = OrderedDict()
+        self._active: Optional[Path] = None
+        self._active_job: Optional[_Job] = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+        self.coalesced = 0
+
+    def submit(self, path: Union[str, Path], data: Union[bytes, str, None],
+               on_done: Optional[DoneCallback] = None):
+        """Encola la escritura de 'data' (bytes o str utf-8; None = borrar). on_done(path, error) al terminar."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._enqueue(Path(path), data, None, on_done)
+
+    def submit_file(self, path: Union[str, Path], source: Union[str, Path],
+                    on_done: Optional[DoneCallback] = None):
+        """
+        Encola publicar 'source' (ya escrito, en el mismo directorio que 'path') como 'path' con os.replace.
+        El writer pasa a ser dueño de 'source': lo renombra, o lo borra si otra escritura lo reemplaza.
+        """
+        self._enqueue(Path(path), None, Path(source), on_done)
+
+    def _enqueue(self, path: Path, data: Optional[bytes], source: Optional[Path],
+                 on_done: Optional[DoneCallback]):
+        with self._cond:
+            job = self._pending.get(path)
+            if job is None:
+                job = self._pending[path] = _Job(data, source)
+            else:
+                job.discard()
+                job.data, job.source = data, source   # reemplaza la escritura pendiente
+                self.coalesced += 1
+            if on_done is not None:
+                job.callbacks.append(on_done)
+            self._ensure_worker()
+            self._cond.notify_all()
+
+    def pending(self, path: Union[str, Path]) -> Tuple[bool, Optional[bytes]]:
+        """
+        (hay_pendiente, contenido) para 'path': el contenido que todavía no llegó a disco
+        (None si lo pendiente es un borrado). (False, None) si no hay nada encolado ni escribiéndose.
+        """
+        path = Path(path)
+        with self._cond:
+            job = self._pending.get(path)
+            if job is None and self._active == path:
+                job = self._active_job
+            if job is None:
+                return False, None
+            if job.source is None:
+                return True, job.data
+            # archivo publicado: se lee sólo si alguien pide el contenido antes de que llegue a disco
+            try:
+                return True, job.source.read_bytes()
+            except FileNotFoundError:
+                pass
+            try:
+                return True, path.read_bytes()   # el worker ya lo renombró sobre 'path'
+            except OSError:
+                return True, None
+
+    def has_pending(self, path: Union[str, Path]) -> bool:
+        return self.pending(path)[0]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se escriba todo lo encolado. False si se venció el timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._active is None, timeout)
+
+    # ---------------- worker ----------------
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                path, job = self._pending.popitem(last=False)
+                self._active, self._active_job = path, job
+            error: Optional[BaseException] = None
+            try:
+                if job.source is not None:
+                    self._publish(job.source, path)
+                elif job.data is None:
+                    if path.exists():
+                        path.unlink()
+                else:
+                    write_atomic(path, job.data, self.fsync)
+            except Exception as e:
+                error = e
+                job.discard()
+                print(f"[WRITER] error escribiendo {path}:", e)
+            with self._cond:
+                self._active, self._active_job = None, None
+                self.writes += 1
+                self._cond.notify_all()
+            for cb in job.callbacks:
+                try:
+                    cb(path, error)
+                except Exception as e:
+                    print(f"[WRITER] error en callback de {path}:", e)
+
+    def _publish(self, source: Path, path: Path):
+        if self.fsync:
+            with open(source, "rb") as f:
+                os.fsync(f.fileno())
+        path.parent.mkdir(exist_ok=True, parents=True)
+        os.replace(source, path)
+
+
+# instancia compartida; al salir del proceso se vacía la cola
+SHARED_WRITER = BackgroundWriter()
+atexit.register(SHARED_WRITER.flush, 10.0)
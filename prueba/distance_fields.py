@@ -0,0 +1,193 @@
+# distance_fields.py
+"""
+Campos de distancia precalculados hacia puntos fijos (pickup / dropoff de los pedidos).
+- Para cada raíz se hace UNA búsqueda inversa (BFS si el costo es uniforme, Dijkstra si es por
+  tiempo de tile) y se guarda, por celda, la distancia a la raíz y el siguiente paso hacia ella.
+- "Ruta desde cualquier celda hasta este pickup" pasa a ser seguir next_hop: O(largo de la ruta).
+- Los campos se construyen perezosamente y se descartan cuando cambia el grid (GameMap.version).
+- El cache se acota por bytes (~12 bytes por celda y campo), así en mapas chicos entran muchos
+  más campos que en mapas grandes.
+"""
+
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Cell = Tuple[int, int]
+INF = float("inf")
+
+FIELD_BYTES_PER_CELL = 12              # dist (double) + next_hop (int32)
+FIELDS_MAX_BYTES = 16 * 1024 * 1024    # 16 MB para todos los campos en memoria
+
+
+class DistanceField:
+    """Distancia y siguiente paso de cada celda hacia 'root'."""
+
+    def __init__(self, game_map, root: Cell, weighted: bool = False):
+        self.root = root
+        self.weighted = weighted
+        self.width = game_map.width
+        self.height = game_map.height
+        n = self.width * self.height
+        self.dist = array("d", [INF]) * n
+        self.next_hop = array("i", [-1]) * n
+        self.nbytes = n * (self.dist.itemsize + self.next_hop.itemsize)
+        self._build(game_map)
+
+    def _build(self, game_map):
+        w, h = self.width, self.height
+        rx, ry = self.root
+        if not (0 <= rx < w and 0 <= ry < h) or not game_map.is_walkable(rx, ry):
+            return  # igual que a_star: destino no transitable -> sin rutas
+
+        g = game_map.grid
+        lut, cells, speed_lut = g.walkable_lut, g.cells, g.speed_lut
+        gw = g.width
+        dist, next_hop = self.dist, self.next_hop
+        root = ry * w + rx
+        dist[root] = 0.0
+
+        def neighbors(v: int):
+            x, y = v % w, v // w
+            if x + 1 < w: yield v + 1
+            if x > 0: yield v - 1
+            if y + 1 < h: yield v + w
+            if y > 0: yield v - w
+
+        def walkable(v: int) -> bool:
+            return lut[cells[(v // w) * gw + v % w]] == 1
+
+        if not self.weighted:
+            queue = deque([root])
+            while queue:
+                v = queue.popleft()
+                nd = dist[v] + 1
+                for u in neighbors(v):
+                    if dist[u] != INF:
+                        continue
+                    dist[u] = nd
+                    next_hop[u] = v
+                    # una celda no transitable puede ser origen, pero nunca paso intermedio
+                    if walkable(u):
+                        queue.append(u)
+            return
+
+        # Dijkstra inverso: moverse u -> v cuesta el tiempo de entrar a v
+        heap = [(0.0, root)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            speed = speed_lut[cells[(v // w) * gw + v % w]]
+            if speed <= 0:
+                continue
+            nd = d + 1.0 / speed
+            for u in neighbors(v):
+                if nd < dist[u]:
+                    dist[u] = nd
+                    next_hop[u] = v
+                    if walkable(u):
+                        heapq.heappush(heap, (nd, u))
+
+    # ---------------- consultas ----------------
+    def _index(self, cell: Cell) -> Optional[int]:
+        x, y = cell
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def distance(self, cell: Cell, weather_multiplier: float = 1.0) -> float:
+        """Pasos (o tiempo, si weighted) desde 'cell' hasta la raíz. INF si no hay ruta."""
+        i = self._index(cell)
+        if i is None:
+            return INF
+        d = self.dist[i]
+        if self.weighted and d != INF:
+            return d / weather_multiplier
+        return d
+
+    def path_from(self, cell: Cell) -> Optional[List[Cell]]:
+        """Ruta (mismo formato que a_star) desde 'cell' hasta la raíz, o None."""
+        i = self._index(cell)
+        if i is None or self.dist[i] == INF:
+            return None
+        w = self.width
+        path = [cell]
+        next_hop = self.next_hop
+        i = next_hop[i]
+        while i != -1:
+            path.append((i % w, i // w))
+            i = next_hop[i]
+        return path
+
+
+class DistanceFieldCache:
+    """Cache LRU de DistanceField por (raíz, weighted), acotado por bytes e invalidado por GameMap.version."""
+
+    def __init__(self, game_map, max_bytes: int = FIELDS_MAX_BYTES):
+        self.game_map = game_map
+        self.max_bytes = max_bytes
+        self._fields: "OrderedDict[Tuple[Cell, bool], DistanceField]" = OrderedDict()
+        self._version = getattr(game_map, "version", 0)
+        self.bytes = 0
+        self.builds = 0
+
+    def _check_version(self):
+        version = getattr(self.game_map, "version", 0)
+        if version != self._version:
+            self._fields.clear()
+            self.bytes = 0
+            self._version = version
+
+    def capacity(self) -> int:
+        """Cuántos campos entran en max_bytes con el tamaño de mapa actual (al menos 1)."""
+        cells = max(1, self.game_map.width * self.game_map.height)
+        return max(1, self.max_bytes // (cells * FIELD_BYTES_PER_CELL))
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, key: Tuple[Cell, bool]) -> bool:
+        return key in self._fields
+
+    def field(self, root: Cell, weighted: bool = False) -> DistanceField:
+        self._check_version()
+        key = (tuple(root), bool(weighted))
+        f = self._fields.get(key)
+        if f is not None:
+            self._fields.move_to_end(key)
+            return f
+        f = DistanceField(self.game_map, key[0], key[1])
+        self.builds += 1
+        self._fields[key] = f
+        self.bytes += f.nbytes
+        while self.bytes > self.max_bytes and len(self._fields) > 1:
+            _, old = self._fields.popitem(last=False)
+            self.bytes -= old.nbytes
+        return f
+
+    def route_to(self, start: Cell, root: Cell, weighted: bool = False) -> Optional[List[Cell]]:
+        return self.field(root, weighted).path_from(tuple(start))
+
+    def distance_to(self, start: Cell, root: Cell, weighted: bool = False,
+                    weather_multiplier: float = 1.0) -> float:
+        return self.field(root, weighted).distance(tuple(start), weather_multiplier)
+
+    def warm_orders(self, orders: Iterable[Dict[str, Any]], weighted: bool = False) -> int:
+        """
+        Construye los campos de los pickup/dropoff de 'orders', en orden, sólo hasta llenar max_bytes:
+        construir más haría que el LRU descarte los primeros enseguida. Devuelve cuántos quedan en memoria.
+        """
+        roots: Dict[Cell, None] = {}   # sin repetidos, en el orden de los pedidos
+        for order in orders:
+            for key in ("pickup", "dropoff"):
+                cell = order.get(key) if isinstance(order, dict) else None
+                if isinstance(cell, (list, tuple)) and len(cell) >= 2:
+                    roots[(int(cell[0]), int(cell[1]))] = None
+        fits = list(roots)[:self.capacity()]
+        if len(fits) < len(roots):
+            print(f"[FIELDS] {len(roots)} destinos, sólo {len(fits)} campos entran en {self.max_bytes} bytes")
+        for root in fits:
+            self.field(root, weighted)
+        return sum(1 for root in fits if (root, bool(weighted)) in self._fields)
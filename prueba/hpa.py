@@ -0,0 +1,312 @@
+# hpa.py
+"""
+Pathfinding jerárquico (HPA*) para mapas grandes, costo uniforme (4 vecinos).
+- El mapa se divide en clusters de CLUSTER_SIZE x CLUSTER_SIZE celdas.
+- En cada borde entre clusters se buscan tramos abiertos a ambos lados ("entradas"); cada entrada
+  aporta un par de nodos abstractos (uno por lado) unidos por un paso de costo 1.
+- Dentro de cada cluster se precalcula la distancia entre sus nodos (BFS acotada al cluster).
+- Una consulta conecta start/goal a los nodos de su cluster, busca en el grafo abstracto y luego
+  refina cada tramo con una BFS local dentro del cluster.
+- Cuando cambia un tile sólo se reconstruye su cluster (y los vecinos cuyo borde cambió).
+El resultado es casi óptimo (no siempre el más corto), a cambio de no recorrer todo el mapa.
+"""
+
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+ClusterKey = Tuple[int, int]
+BorderKey = Tuple[int, int, str]   # (kx, ky, "E"|"N"): borde con el cluster de la derecha / de abajo (y+1)
+
+CLUSTER_SIZE = 16
+MAX_ENTRANCE_WIDTH = 6   # tramos más anchos aportan dos entradas (una en cada extremo)
+
+
+class HierarchicalPathfinder:
+    def __init__(self, game_map, cluster_size: int = CLUSTER_SIZE):
+        self.game_map = game_map
+        self.cs = max(2, int(cluster_size))
+        self.width = game_map.width
+        self.height = game_map.height
+        self.clusters_x = (self.width + self.cs - 1) // self.cs
+        self.clusters_y = (self.height + self.cs - 1) // self.cs
+
+        self._borders: Dict[BorderKey, List[Tuple[int, int]]] = {}
+        self._intra: Dict[ClusterKey, Dict[int, Dict[int, int]]] = {}
+        self._inter: Dict[int, Set[int]] = {}
+        self._dirty: Set[ClusterKey] = set()
+        self.last_rebuilt: Set[ClusterKey] = set()
+
+        self._build_all()
+        grid = getattr(game_map, "grid", None)
+        if grid is not None and hasattr(grid, "add_listener"):
+            grid.add_listener(self._on_tile_changed)
+
+    # ---------------- geometría ----------------
+    def cluster_of(self, i: int) -> ClusterKey:
+        return ((i % self.width) // self.cs, (i // self.width) // self.cs)
+
+    def _bounds(self, c: ClusterKey) -> Tuple[int, int, int, int]:
+        kx, ky = c
+        return (kx * self.cs, ky * self.cs,
+                min(self.width, (kx + 1) * self.cs), min(self.height, (ky + 1) * self.cs))
+
+    def _borders_of(self, c: ClusterKey) -> List[BorderKey]:
+        kx, ky = c
+        keys = []
+        if kx + 1 < self.clusters_x: keys.append((kx, ky, "E"))
+        if kx > 0: keys.append((kx - 1, ky, "E"))
+        if ky + 1 < self.clusters_y: keys.append((kx, ky, "N"))
+        if ky > 0: keys.append((kx, ky - 1, "N"))
+        return keys
+
+    @staticmethod
+    def _other_side(key: BorderKey) -> ClusterKey:
+        kx, ky, d = key
+        return (kx + 1, ky) if d == "E" else (kx, ky + 1)
+
+    # ---------------- construcción ----------------
+    def _build_border(self, key: BorderKey, mask) -> List[Tuple[int, int]]:
+        """Pares (celda de este lado, celda del otro lado) de cada entrada del borde."""
+        kx, ky, d = key
+        w = self.width
+        x0, y0, x1, y1 = self._bounds((kx, ky))
+        if d == "E":
+            pairs = [(y * w + x1 - 1, y * w + x1) for y in range(y0, y1)]
+        else:
+            pairs = [((y1 - 1) * w + x, y1 * w + x) for x in range(x0, x1)]
+
+        entrances: List[Tuple[int, int]] = []
+        segment: List[Tuple[int, int]] = []
+        for a, b in pairs + [(-1, -1)]:
+            if a >= 0 and mask[a] and mask[b]:
+                segment.append((a, b))
+                continue
+            if segment:
+                if len(segment) < MAX_ENTRANCE_WIDTH:
+                    entrances.append(segment[len(segment) // 2])
+                else:
+                    entrances.append(segment[0])
+                    entrances.append(segment[-1])
+                segment = []
+        return entrances
+
+    def _cluster_nodes(self, c: ClusterKey) -> Set[int]:
+        nodes: Set[int] = set()
+        for key in self._borders_of(c):
+            side = 0 if key[:2] == c else 1
+            for pair in self._borders.get(key, []):
+                nodes.add(pair[side])
+        return nodes
+
+    def _bfs(self, src: int, bounds: Tuple[int, int, int, int], mask, target: Optional[int] = None):
+        """BFS acotada a 'bounds'. Devuelve (dist, parent) por celda alcanzada."""
+        w = self.width
+        x0, y0, x1, y1 = bounds
+        dist = {src: 0}
+        parent = {src: -1}
+        queue = deque([src])
+        while queue:
+            v = queue.popleft()
+            if v == target:
+                break
+            y, x = divmod(v, w)
+            nd = dist[v] + 1
+            for n, ok in ((v + 1, x + 1 < x1), (v - 1, x > x0), (v + w, y + 1 < y1), (v - w, y > y0)):
+                if ok and n not in dist and mask[n]:
+                    dist[n] = nd
+                    parent[n] = v
+                    queue.append(n)
+        return dist, parent
+
+    def _build_intra(self, c: ClusterKey, mask):
+        bounds = self._bounds(c)
+        nodes = self._cluster_nodes(c)
+        edges: Dict[int, Dict[int, int]] = {}
+        for n in nodes:
+            dist, _ = self._bfs(n, bounds, mask)
+            edges[n] = {m: dist[m] for m in nodes if m != n and m in dist}
+        self._intra[c] = edges
+
+    def _rebuild_inter(self):
+        inter: Dict[int, Set[int]] = {}
+        for pairs in self._borders.values():
+            for a, b in pairs:
+                inter.setdefault(a, set()).add(b)
+                inter.setdefault(b, set()).add(a)
+        self._inter = inter
+
+    def _build_all(self):
+        mask = self.game_map.walkable_mask()
+        self._borders = {}
+        for ky in range(self.clusters_y):
+            for kx in range(self.clusters_x):
+                for d in ("E", "N"):
+                    if (d == "E" and kx + 1 < self.clusters_x) or (d == "N" and ky + 1 < self.clusters_y):
+                        self._borders[(kx, ky, d)] = self._build_border((kx, ky, d), mask)
+        self._intra = {}
+        for ky in range(self.clusters_y):
+            for kx in range(self.clusters_x):
+                self._build_intra((kx, ky), mask)
+        self._rebuild_inter()
+        self._dirty.clear()
+        self._version = getattr(self.game_map, "version", 0)
+
+    # ---------------- actualización incremental ----------------
+    def _on_tile_changed(self, x: int, y: int):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self._dirty.add((x // self.cs, y // self.cs))
+
+    def _sync(self):
+        version = getattr(self.game_map, "version", 0)
+        if not self._dirty:
+            if version != self._version:
+                self._build_all()   # cambio sin notificación: reconstruir todo
+            return
+        mask = self.game_map.walkable_mask()
+        to_rebuild = set(self._dirty)
+        for c in self._dirty:
+            for key in self._borders_of(c):
+                new = self._build_border(key, mask)
+                if new != self._borders.get(key):
+                    self._borders[key] = new
+                    to_rebuild.add(key[:2])
+                    to_rebuild.add(self._other_side(key))
+        for c in to_rebuild:
+            self._build_intra(c, mask)
+        self._rebuild_inter()
+        self.last_rebuilt = to_rebuild
+        self._dirty.clear()
+        self._version = version
+
+    # ---------------- consulta ----------------
+    def find_path(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        """Misma firma y formato que pathfinding.a_star (costo uniforme)."""
+        if start == goal:
+            return [start]
+        w, h = self.width, self.height
+        sx, sy = start; gx, gy = goal
+        if not (0 <= sx < w and 0 <= sy < h) or not (0 <= gx < w and 0 <= gy < h):
+            return None
+        if not self.game_map.is_walkable(gx, gy):
+            return None
+        self._sync()
+        mask = self.game_map.walkable_mask()
+
+        s, g = sy * w + sx, gy * w + gx
+        cg = self.cluster_of(g)
+        # como a_star: un start no transitable puede ser origen pero nunca paso intermedio, así que
+        # la ruta sale por alguno de sus vecinos transitables (que pueden estar en otro cluster)
+        sources = [(s, 0)] if mask[s] else [(n, 1) for n in self._neighbors(s) if mask[n]]
+
+        # mismo cluster: intentar primero la ruta local
+        best_local: Optional[List[int]] = None
+        for src, offset in sources:
+            if self.cluster_of(src) != cg:
+                continue
+            local = self._local_path(src, g, cg, mask)
+            if local is not None:
+                local = [s] + local if offset else local
+                if best_local is None or len(local) < len(best_local):
+                    best_local = local
+        if best_local is not None:
+            return [(i % w, i // w) for i in best_local]
+
+        # conectar start (o sus vecinos) y goal con los nodos de su cluster
+        from_start: Dict[int, int] = {}
+        via: Dict[int, int] = {}   # nodo -> celda de salida (start o un vecino) por la que se llega
+        for src, offset in sources:
+            c = self.cluster_of(src)
+            dist_s, _ = self._bfs(src, self._bounds(c), mask)
+            for n in self._cluster_nodes(c):
+                if n in dist_s and n != s and dist_s[n] + offset < from_start.get(n, 10**9):
+                    from_start[n] = dist_s[n] + offset
+                    via[n] = src
+        dist_g, _ = self._bfs(g, self._bounds(cg), mask)
+        to_goal = {n: dist_g[n] for n in self._cluster_nodes(cg) if n in dist_g}
+
+        abstract = self._abstract_search(s, g, from_start, to_goal)
+        if abstract is None:
+            return None
+        if abstract[1] not in via:
+            return self._refine(abstract, mask)   # start es un nodo y salió por sus propias aristas
+        # primer tramo: desde la celda de salida hasta el primer nodo, dentro de su cluster
+        src = via[abstract[1]]
+        lead = self._local_path(src, abstract[1], self.cluster_of(src), mask)
+        rest = self._refine(abstract[1:], mask)
+        if lead is None or rest is None:
+            return None
+        head = lead[:-1] if src == s else [s] + lead[:-1]
+        return [(i % w, i // w) for i in head] + rest
+
+    def _neighbors(self, i: int) -> List[int]:
+        w = self.width
+        y, x = divmod(i, w)
+        return [n for n, ok in ((i + 1, x + 1 < w), (i - 1, x > 0), (i + w, y + 1 < self.height), (i - w, y > 0)) if ok]
+
+    def _abstract_search(self, s: int, g: int, from_start: Dict[int, int],
+                         to_goal: Dict[int, int]) -> Optional[List[int]]:
+        w = self.width
+        gy, gx = divmod(g, w)
+
+        def heuristic(n: int) -> int:
+            ny, nx = divmod(n, w)
+            return abs(nx - gx) + abs(ny - gy)
+
+        gscore = {s: 0}
+        came_from: Dict[int, int] = {}
+        closed: Set[int] = set()
+        open_heap = [(heuristic(s), 0, s)]
+        while open_heap:
+            f, gs, cur = heapq.heappop(open_heap)
+            if cur in closed:
+                continue
+            if cur == g:
+                path = [cur]
+                while cur in came_from:
+                    cur = came_from[cur]
+                    path.append(cur)
+                path.reverse()
+                return path
+            closed.add(cur)
+
+            edges = list(self._intra.get(self.cluster_of(cur), {}).get(cur, {}).items())
+            edges.extend((n, 1) for n in self._inter.get(cur, ()))
+            if cur == s:
+                edges.extend(from_start.items())
+            if cur in to_goal:
+                edges.append((g, to_goal[cur]))
+            for n, cost in edges:
+                if n in closed:
+                    continue
+                tentative = gs + cost
+                if tentative < gscore.get(n, 10**9):
+                    gscore[n] = tentative
+                    came_from[n] = cur
+                    heapq.heappush(open_heap, (tentative + heuristic(n), tentative, n))
+        return None
+
+    def _local_path(self, a: int, b: int, c: ClusterKey, mask) -> Optional[List[int]]:
+        dist, parent = self._bfs(a, self._bounds(c), mask, target=b)
+        if b not in dist:
+            return None
+        path = [b]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def _refine(self, abstract: List[int], mask) -> Optional[List[Cell]]:
+        w = self.width
+        cells = [abstract[0]]
+        for a, b in zip(abstract, abstract[1:]):
+            ca, cb = self.cluster_of(a), self.cluster_of(b)
+            if ca != cb:
+                cells.append(b)   # paso entre clusters (entrada): celdas adyacentes
+                continue
+            local = self._local_path(a, b, ca, mask)
+            if local is None:
+                return None
+            cells.extend(local[1:])
+        return [(i % w, i // w) for i in cells]
@@ -0,0 +1,87 @@
+# json_stream.py
+"""
+Parseo incremental de un arreglo JSON grande (p.ej. el feed de pedidos) a partir de chunks.
+- Acepta bytes (utf-8, aunque un carácter quede partido entre dos chunks) o str.
+- Reconoce el arreglo en la raíz o envuelto como {"data": [...]}, {"jobs": [...]} o
+  {"data": {"jobs": [...]}} (la clave envoltorio debe ser la primera del objeto).
+- Cada elemento se entrega apenas está completo; sólo se mantiene en memoria el texto aún
+  no consumido. Si el documento tiene otra forma, se parsea entero y se aplica la misma regla.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, Union
+
+# prefijo hasta el '[' del arreglo: raíz o envoltorios "data"/"jobs"
+_ARRAY_START = re.compile(r'\s*(?:\{\s*"(?:data|jobs)"\s*:\s*)*\[')
+_WS = " \t\n\r"
+_COMPACT_AT = 1 << 16   # recortar el buffer cuando lo consumido supera 64 KB
+
+
+def _items_from_document(doc: Any) -> list:
+    """Mismo criterio que el streaming, para documentos con otra forma."""
+    for _ in range(3):
+        if isinstance(doc, dict):
+            doc = doc.get("data", doc.get("jobs"))
+    return doc if isinstance(doc, list) else []
+
+
+def iter_json_array_items(chunks: Iterable[Union[bytes, str]]) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    source = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        for chunk in source:
+            text = utf8.decode(chunk) if isinstance(chunk, (bytes, bytearray, memoryview)) else chunk
+            if text:
+                if pos > _COMPACT_AT:
+                    buf, pos = buf[pos:], 0
+                buf += text
+                return True
+        buf += utf8.decode(b"", final=True)
+        eof = True
+        return False
+
+    # 1. ubicar el inicio del arreglo
+    while "[" not in buf and more():
+        pass
+    m = _ARRAY_START.match(buf)
+    if m is None:
+        while more():
+            pass
+        if buf.strip():
+            yield from _items_from_document(json.loads(buf))
+        return
+    pos = m.end()
+
+    # 2. elementos uno por uno
+    while True:
+        while True:
+            while pos < len(buf) and (buf[pos] in _WS or buf[pos] == ","):
+                pos += 1
+            if pos < len(buf) or not more():
+                break
+        if pos >= len(buf):
+            raise ValueError("JSON incompleto: falta el cierre del arreglo")
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if more():
+                continue
+            raise
+        # un número al final del buffer podría seguir en el próximo chunk
+        if end == len(buf) and not eof:
+            if more():
+                continue
+        pos = end
+        yield item
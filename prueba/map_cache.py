@@ -0,0 +1,144 @@
+# map_cache.py
+"""
+Cache binario del mapa (api_cache/city_map.bin): los tiles se leen de una vez a un buffer, sin parsear.
+
+Formato (little endian):
+    magic   6 bytes  b"CQMAP\\0"
+    version uint16
+    width   uint32
+    height  uint32
+    metalen uint32   largo del bloque meta
+    meta    JSON utf-8 compacto: {"symbols": [...], "name": ..., "legend": {...}, ...}
+    tiles   width*height bytes, row-major; cada byte es un índice en meta["symbols"]
+
+El JSON (api_cache/city_map.json) queda como formato de exportación opcional.
+"""
+
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from async_writer import BackgroundWriter, write_atomic
+
+BIN_CACHE_PATH = Path("api_cache") / "city_map.bin"
+MAGIC = b"CQMAP\0"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<6sHIII")
+
+
+def tiles_to_cells(tiles: Iterable[Iterable[str]]) -> Tuple[List[str], bytearray]:
+    """Convierte filas de símbolos (listas o strings) en (symbols, bytes de ids)."""
+    symbols: List[str] = []
+    ids: Dict[str, int] = {}
+    cells = bytearray()
+    for row in tiles:
+        for sym in row:
+            sym = str(sym)
+            cid = ids.get(sym)
+            if cid is None:
+                cid = ids[sym] = len(symbols)
+                symbols.append(sym)
+            cells.append(cid)
+    return symbols, cells
+
+
+def encode_binary_map(width: int, height: int, symbols: List[str], cells, meta: Optional[Dict[str, Any]] = None) -> bytes:
+    if len(cells) != width * height:
+        raise ValueError("cells no coincide con width*height")
+    if len(symbols) > 256:
+        raise ValueError("El formato binario admite como máximo 256 símbolos")
+    meta = dict(meta or {})
+    meta["symbols"] = list(symbols)
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, width, height, len(meta_bytes)) + meta_bytes + bytes(cells)
+
+
+def write_binary_map(path: Path, width: int, height: int, symbols: List[str], cells,
+                     meta: Optional[Dict[str, Any]] = None, writer: Optional[BackgroundWriter] = None):
+    """
+    Escribe en un archivo temporal y lo renombra, así un lector nunca ve un archivo a medias.
+    Con 'writer' la escritura se hace en segundo plano (los bytes se arman aquí).
+    """
+    data = encode_binary_map(width, height, symbols, cells, meta)
+    if writer is not None:
+        writer.submit(path, data)
+    else:
+        write_atomic(path, data)
+
+
+def _parse_header(head: bytes) -> Optional[Tuple[int, int, int]]:
+    if len(head) < _HEADER.size:
+        return None
+    magic, version, width, height, meta_len = _HEADER.unpack_from(head)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    return width, height, meta_len
+
+
+def read_binary_meta(path: Path) -> Optional[Dict[str, Any]]:
+    """Lee sólo el header + meta (sin tocar los tiles). None si no existe o no es válido."""
+    path = Path(path)
+    try:
+        with path.open("rb") as f:
+            parsed = _parse_header(f.read(_HEADER.size))
+            if parsed is None:
+                return None
+            width, height, meta_len = parsed
+            meta = json.loads(f.read(meta_len).decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or not isinstance(meta.get("symbols"), list):
+        return None
+    meta["width"], meta["height"] = width, height
+    meta["tiles_offset"] = _HEADER.size + meta_len
+    return meta
+
+
+def open_binary_map(path: Path) -> Optional[Tuple[Dict[str, Any], bytearray]]:
+    """
+    Devuelve (meta, bytearray con los tiles). El archivo se lee con un solo readinto y se
+    cierra enseguida: no queda abierto ni mapeado, así el próximo os.replace del cache
+    funciona también en Windows. None si falta o está corrupto.
+    """
+    meta = read_binary_meta(path)
+    if meta is None:
+        return None
+    n = meta["width"] * meta["height"]
+    if n == 0:
+        return None
+    cells = bytearray(n)
+    try:
+        with Path(path).open("rb") as f:
+            f.seek(meta["tiles_offset"])
+            if f.readinto(cells) != n:
+                return None
+    except (OSError, ValueError):
+        return None
+    return meta, cells
+
+
+def cells_to_rows(width: int, height: int, symbols: List[str], cells) -> List[Any]:
+    """
+    Inverso de tiles_to_cells: filas de strings si todos los símbolos son de un carácter
+    (el formato de 'tiles' del API), si no filas de listas.
+    """
+    n = width * height
+    if all(len(sym) == 1 for sym in symbols):
+        if all(ord(sym) < 256 for sym in symbols):
+            # bytes.translate + latin-1: id -> carácter en bloque, sin recorrer celda por celda
+            table = bytes(ord(sym) for sym in symbols).ljust(256, b"?")
+            flat = bytes(cells[:n]).translate(table).decode("latin-1")
+        else:
+            flat = "".join(symbols[c] for c in cells[:n])
+        return [flat[y * width:(y + 1) * width] for y in range(height)]
+    return [[symbols[c] for c in cells[y * width:(y + 1) * width]] for y in range(height)]
+
+
+def read_binary_tiles(path: Path) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+    """(meta, tiles) del cache binario, con los tiles como filas (ver cells_to_rows)."""
+    opened = open_binary_map(path)
+    if opened is None:
+        return None
+    meta, cells = opened
+    return meta, cells_to_rows(meta["width"], meta["height"], meta["symbols"], cells)
@@ -2,19 +2,35 @@
 """
 GameMap manager - robusto y con fallback.
 - Detecta / usa 'tiles' si están.
-- Si no, reconstruye grid desde 'buildings' y 'roads' y (opcional) guarda tiles generados.
+- Guarda el grid en un TileGrid compacto (1 byte por celda); grid[y][x] sigue funcionando.
+- Si no, reconstruye grid desde 'buildings' y 'roads' y (opcional) guarda el grid generado en
+  el cache binario, junto con el hash del payload: si el mismo payload vuelve a llegar, se carga
+  el cache y no se reconstruye.
 - Permite flip Y (fila 0 arriba) para dibujo.
 - Aplica 'legend' para ampliar TILE_DEFS automáticamente si aparece en JSON.
 """
 
 import arcade
+import hashlib
 import json
+from array import array
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional
+
+from async_writer import SHARED_WRITER
+from map_cache import BIN_CACHE_PATH, open_binary_map, read_binary_meta, write_binary_map
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se reconstruye celda por celda
+    np = None
 
 # ---------------- Configurables ----------------
-RECONSTRUCT_AND_SAVE = True   # guarda el 'tiles' reconstruido en api_cache/city_map.json
+RECONSTRUCT_AND_SAVE = True   # guarda el grid reconstruido en el cache binario (api_cache/city_map.bin)
+EXPORT_JSON_CACHE = False     # además exporta 'tiles' a api_cache/city_map.json (lento en mapas grandes)
+USE_NUMPY_RECONSTRUCTION = True   # usa numpy (si está instalado) para reconstruir el grid en bloque
+RECONSTRUCTION_VERSION = 1    # subirlo si cambian las reglas de _reconstruct_grid (invalida el cache)
 CACHE_PATH = Path("api_cache") / "city_map.json"
 FLIP_Y = True                 # True -> fila 0 en la parte superior (más natural para mapas)
 
@@ -54,22 +70,22 @@ def _safe_int(v: Any) -> int:
         except Exception:
             return 0
 
-def _mark_rectangle(grid: List[List[str]], x: int, y: int, w: int, h: int, symbol: str):
-    rows = len(grid)
-    cols = len(grid[0]) if rows>0 else 0
+def _mark_rectangle(grid: "TileGrid", x: int, y: int, w: int, h: int, symbol: str):
+    rows = grid.height
+    cols = grid.width
     for yy in range(y, y + h):
         if yy < 0 or yy >= rows: continue
         for xx in range(x, x + w):
             if xx < 0 or xx >= cols: continue
-            grid[yy][xx] = symbol
+            grid.set(xx, yy, symbol)
 
-def _mark_cells(grid: List[List[str]], cells: List[Tuple[int,int]], symbol: str):
-    rows = len(grid)
-    cols = len(grid[0]) if rows>0 else 0
+def _mark_cells(grid: "TileGrid", cells: List[Tuple[int,int]], symbol: str):
+    rows = grid.height
+    cols = grid.width
     for (cx, cy) in cells:
         x = _safe_int(cx); y = _safe_int(cy)
         if 0 <= y < rows and 0 <= x < cols:
-            grid[y][x] = symbol
+            grid.set(x, y, symbol)
 
 def _cells_from_path(path: Any) -> List[Tuple[int,int]]:
     result: List[Tuple[int,int]] = []
@@ -94,6 +110,280 @@ def _hex_to_rgb(h: str) -> Optional[Tuple[int,int,int]]:
         pass
     return None
 
+# ---------------- Grid compacto ----------------
+class _GridRow:
+    """Vista de una fila de TileGrid: se comporta como List[str] (lectura/escritura)."""
+    __slots__ = ("_grid", "_y")
+
+    def __init__(self, grid: "TileGrid", y: int):
+        self._grid = grid
+        self._y = y
+
+    def __len__(self) -> int:
+        return self._grid.width
+
+    def __getitem__(self, x):
+        g = self._grid
+        if isinstance(x, slice):
+            base = self._y * g.width
+            return [g.symbols[i] for i in g.cells[base:base + g.width][x]]
+        if x < 0:
+            x += g.width
+        if not 0 <= x < g.width:
+            raise IndexError("columna fuera de rango")
+        return g.symbols[g.cells[self._y * g.width + x]]
+
+    def __setitem__(self, x: int, symbol: str):
+        if x < 0:
+            x += self._grid.width
+        if not 0 <= x < self._grid.width:
+            raise IndexError("columna fuera de rango")
+        self._grid.set(x, self._y, symbol)
+
+    def __iter__(self):
+        g = self._grid
+        base = self._y * g.width
+        return (g.symbols[i] for i in g.cells[base:base + g.width])
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class TileGrid:
+    """
+    Grid de tiles compacto: un byte por celda (row-major, idx = y*width + x)
+    más una tabla id -> símbolo. Mantiene tablas paralelas walkable/speed por id
+    para que las consultas por celda sean indexación de arrays.
+    grid[y][x] sigue funcionando a través de _GridRow.
+    'version' aumenta en cada cambio real de celda y los listeners reciben (x, y).
+    """
+    MAX_SYMBOLS = 256
+
+    def __init__(self, width: int, height: int, fill: str = "?", symbols: Optional[List[str]] = None, cells=None):
+        """
+        cells opcional: buffer ya existente (bytearray) con ids que indexan 'symbols';
+        así el cache binario se usa como grid sin parsear.
+        """
+        self.width = max(0, int(width))
+        self.height = max(0, int(height))
+        self.symbols: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.walkable_lut = bytearray(self.MAX_SYMBOLS)
+        self.speed_lut: List[float] = [0.0] * self.MAX_SYMBOLS
+        for sym in symbols or []:
+            self.symbol_id(sym)
+        if cells is None:
+            cells = bytearray([self.symbol_id(fill)]) * (self.width * self.height)
+        elif len(cells) != self.width * self.height:
+            raise ValueError("El buffer de celdas no coincide con width*height")
+        self.cells = cells
+        self.version = 0
+        self._listeners: List[Callable[[int, int], None]] = []
+
+    @classmethod
+    def from_rows(cls, rows: List[List[str]]) -> "TileGrid":
+        height = len(rows)
+        width = len(rows[0]) if height > 0 else 0
+        grid = cls(width, height)
+        ids = grid._ids
+        cells = grid.cells
+        i = 0
+        for row in rows:
+            for sym in row:
+                cid = ids.get(sym)
+                if cid is None:
+                    cid = grid.symbol_id(sym)
+                cells[i] = cid
+                i += 1
+        return grid
+
+    @classmethod
+    def from_strings(cls, rows: List[str]) -> Optional["TileGrid"]:
+        """
+        Atajo de from_rows para filas string del mismo largo con símbolos latin-1 (el formato
+        de 'tiles' del API y de map_cache.cells_to_rows). None si no aplica.
+        """
+        height = len(rows)
+        width = len(rows[0]) if height > 0 else 0
+        if width == 0 or any(not isinstance(r, str) or len(r) != width for r in rows):
+            return None
+        flat = "".join(rows)
+        try:
+            raw = flat.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
+        grid = cls(width, height, symbols=sorted(set(flat)))
+        table = bytearray(256)
+        for sym, cid in grid._ids.items():
+            table[ord(sym)] = cid
+        grid.cells = bytearray(raw.translate(table))
+        return grid
+
+    def symbol_id(self, symbol: str) -> int:
+        """Devuelve el id del símbolo, registrándolo si es nuevo."""
+        cid = self._ids.get(symbol)
+        if cid is not None:
+            return cid
+        cid = len(self.symbols)
+        if cid >= self.MAX_SYMBOLS:
+            raise ValueError(f"Demasiados símbolos distintos en el mapa (máx {self.MAX_SYMBOLS})")
+        self.symbols.append(symbol)
+        self._ids[symbol] = cid
+        self._refresh_lut(cid)
+        return cid
+
+    def _refresh_lut(self, cid: int):
+        props = TILE_DEFS.get(self.symbols[cid], TILE_DEFS["?"])
+        self.walkable_lut[cid] = 1 if props["walkable"] else 0
+        self.speed_lut[cid] = float(props["speed"])
+
+    def refresh_luts(self):
+        """Recalcula walkable/speed por id (p.ej. después de aplicar un 'legend')."""
+        for cid in range(len(self.symbols)):
+            self._refresh_lut(cid)
+
+    def get(self, x: int, y: int) -> str:
+        return self.symbols[self.cells[y * self.width + x]]
+
+    def set(self, x: int, y: int, symbol: str):
+        idx = y * self.width + x
+        cid = self.symbol_id(symbol)
+        if self.cells[idx] == cid:
+            return
+        self.cells[idx] = cid
+        self.version += 1
+        for fn in self._listeners:
+            fn(x, y)
+
+    def add_listener(self, fn: Callable[[int, int], None]):
+        """Registra fn(x, y), llamado cada vez que cambia una celda."""
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[int, int], None]):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def to_lists(self) -> List[List[str]]:
+        return [list(self[y]) for y in range(self.height)]
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y):
+        if isinstance(y, slice):
+            return [_GridRow(self, yy) for yy in range(self.height)[y]]
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("fila fuera de rango")
+        return _GridRow(self, y)
+
+    def __iter__(self):
+        return (_GridRow(self, y) for y in range(self.height))
+
+# ---------------- Reconstrucción desde buildings / roads ----------------
+def _collect_stamps(map_data: Dict[str,Any]) -> Tuple[List[Tuple[int,int,int,int]], List[Tuple[int,int]], List[Tuple[int,int]]]:
+    """
+    Normaliza 'buildings' y 'roads' en (rectángulos B, celdas B, celdas R), todo en ints.
+    Acepta los mismos formatos que antes: rect {x,y,w,h}, {"cells": [...]}, listas de puntos, path/points.
+    """
+    rects: List[Tuple[int,int,int,int]] = []
+    building_cells: List[Tuple[int,int]] = []
+    road_cells: List[Tuple[int,int]] = []
+
+    def add_points(target: List[Tuple[int,int]], items: Any):
+        for c in items:
+            if isinstance(c, dict) and "x" in c and "y" in c:
+                target.append((_safe_int(c["x"]), _safe_int(c["y"])))
+            elif isinstance(c, (list, tuple)) and len(c) >= 2:
+                target.append((_safe_int(c[0]), _safe_int(c[1])))
+
+    for b in map_data.get("buildings", []):
+        if isinstance(b, dict) and ("x" in b and "y" in b):
+            rects.append((_safe_int(b.get("x", 0)), _safe_int(b.get("y", 0)),
+                          _safe_int(b.get("w", b.get("width", 1))), _safe_int(b.get("h", b.get("height", 1)))))
+        elif isinstance(b, dict) and "cells" in b:
+            add_points(building_cells, b["cells"])
+        elif isinstance(b, (list, tuple)):
+            add_points(building_cells, [item for item in b if isinstance(item, (list, tuple))])
+
+    for r in map_data.get("roads", []):
+        if isinstance(r, dict):
+            if "cells" in r:
+                add_points(road_cells, r["cells"])
+            elif "path" in r:
+                road_cells.extend(_cells_from_path(r["path"]))
+            elif "points" in r:
+                road_cells.extend(_cells_from_path(r["points"]))
+            elif "x" in r and "y" in r:
+                road_cells.append((_safe_int(r["x"]), _safe_int(r["y"])))
+        elif isinstance(r, (list, tuple)):
+            road_cells.extend(_cells_from_path(r))
+
+    return rects, building_cells, road_cells
+
+def _source_hash(width: int, height: int, map_data: Dict[str,Any]) -> str:
+    """
+    Hash estable (sha256) de lo que determina la reconstrucción: tamaño, buildings, roads y legend.
+    JSON canónico (claves ordenadas, sin espacios) para que el orden de las claves del API no importe.
+    """
+    payload = {
+        "v": RECONSTRUCTION_VERSION,
+        "width": width,
+        "height": height,
+        "buildings": map_data.get("buildings") or [],
+        "roads": map_data.get("roads") or [],
+        "legend": map_data.get("legend") or {},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _reconstruct_grid(width: int, height: int, map_data: Dict[str,Any], use_numpy: Optional[bool] = None) -> "TileGrid":
+    """
+    Grid inicial de 'C' + edificios ('B') + calles ('R', encima de los edificios).
+    Con numpy: rectángulos por slicing y celdas por fancy indexing, directo sobre los bytes del TileGrid.
+    Sin numpy: el mismo resultado celda por celda.
+    """
+    rects, building_cells, road_cells = _collect_stamps(map_data)
+    # inicializar con 'C' (calles/transitables) en vez de '?'
+    grid = TileGrid(width, height, fill="C")
+    if use_numpy is None:
+        use_numpy = USE_NUMPY_RECONSTRUCTION and np is not None
+    if not use_numpy or grid.width == 0 or grid.height == 0:
+        for (bx, by, bw, bh) in rects:
+            _mark_rectangle(grid, bx, by, bw, bh, "B")
+        _mark_cells(grid, building_cells, "B")
+        _mark_cells(grid, road_cells, "R")
+        return grid
+
+    rows, cols = grid.height, grid.width
+    arr = np.frombuffer(grid.cells, dtype=np.uint8).reshape(rows, cols)   # vista sin copia
+
+    def stamp_cells(cells: List[Tuple[int,int]], cid: int):
+        pts = np.array(cells, dtype=np.int64).reshape(-1, 2)
+        xs, ys = pts[:, 0], pts[:, 1]
+        inside = (xs >= 0) & (xs < cols) & (ys >= 0) & (ys < rows)
+        arr[ys[inside], xs[inside]] = cid
+
+    if rects or building_cells:
+        b_id = grid.symbol_id("B")
+        for (bx, by, bw, bh) in rects:
+            y0, y1 = max(0, by), max(0, min(rows, by + bh))
+            x0, x1 = max(0, bx), max(0, min(cols, bx + bw))
+            arr[y0:y1, x0:x1] = b_id
+        if building_cells:
+            stamp_cells(building_cells, b_id)
+    if road_cells:
+        stamp_cells(road_cells, grid.symbol_id("R"))
+    return grid
+
 # ---------------- Legend parser ----------------
 def _apply_legend_to_tile_defs(map_data: Dict[str,Any]):
     """
@@ -120,10 +410,37 @@ def _apply_legend_to_tile_defs(map_data: Dict[str,Any]):
             print(f"[LEGEND] error parsing legend for {sym}: {e}")
 
 # ---------------- Cache save ----------------
-def _save_tiles_to_cache(map_data: Dict[str,Any], tiles: List[List[str]]):
+def _cache_meta(map_data: Dict[str,Any]) -> Dict[str,Any]:
+    meta: Dict[str,Any] = {
+        "name": map_data.get("city_name", map_data.get("name", "TigerCity")),
+        "_meta": {
+            "last_generated": datetime.utcnow().isoformat() + "Z",
+            "generated_by": "map_manager.reconstruction",
+            "source": map_data.get("source", "api_or_cache")
+        },
+    }
+    if isinstance(map_data.get("legend"), dict):
+        meta["legend"] = map_data["legend"]
+    return meta
+
+def _save_tiles_to_cache(map_data: Dict[str,Any], grid: "TileGrid", source_hash: Optional[str] = None):
+    """Guarda el grid en el cache binario (y en JSON sólo si EXPORT_JSON_CACHE)."""
+    try:
+        meta = _cache_meta(map_data)
+        if source_hash:
+            meta["source_hash"] = source_hash
+        # los bytes se arman aquí; la escritura (atómica) la hace el hilo de SHARED_WRITER
+        write_binary_map(BIN_CACHE_PATH, grid.width, grid.height, grid.symbols, grid.cells, meta,
+                         writer=SHARED_WRITER)
+        print(f"[MAP SAVE] tiles encolados para {BIN_CACHE_PATH}")
+    except Exception as e:
+        print("[MAP SAVE] fallo al guardar cache binario:", e)
+
+    if EXPORT_JSON_CACHE:
+        _export_tiles_json(map_data, grid.to_lists())
+
+def _export_tiles_json(map_data: Dict[str,Any], tiles: List[List[str]]):
     try:
-        cache_dir = CACHE_PATH.parent
-        cache_dir.mkdir(exist_ok=True, parents=True)
         if CACHE_PATH.exists():
             try:
                 current = json.load(CACHE_PATH.open(encoding="utf-8"))
@@ -137,16 +454,12 @@ def _save_tiles_to_cache(map_data: Dict[str,Any], tiles: List[List[str]]):
         current["width"] = current.get("width", map_data.get("width", len(tiles[0]) if tiles else 0))
         current["height"] = current.get("height", map_data.get("height", len(tiles)))
         meta = current.get("_meta", {})
-        meta.update({
-            "last_generated": datetime.utcnow().isoformat() + "Z",
-            "generated_by": "map_manager.reconstruction",
-            "source": map_data.get("source", "api_or_cache")
-        })
+        meta.update(_cache_meta(map_data)["_meta"])
         current["_meta"] = meta
 
-        with CACHE_PATH.open("w", encoding="utf-8") as f:
-            json.dump(current, f, indent=2, ensure_ascii=False)
-        print(f"[MAP SAVE] tiles guardados en {CACHE_PATH}")
+        # JSON compacto, escrito en segundo plano y de forma atómica
+        SHARED_WRITER.submit(CACHE_PATH, json.dumps(current, ensure_ascii=False, separators=(",", ":")))
+        print(f"[MAP SAVE] tiles exportados en {CACHE_PATH}")
     except Exception as e:
         print("[MAP SAVE] fallo al guardar cache:", e)
 
@@ -163,8 +476,15 @@ class GameMap:
 
         # Prefer 'tiles' (una matriz). Fallback a 'map' o reconstruir
         raw_tiles = map_data.get("tiles") or map_data.get("map") or None
+        fast_grid = TileGrid.from_strings(raw_tiles) if raw_tiles else None
+        if fast_grid is not None and (self.width, self.height) not in ((0, 0), (fast_grid.width, fast_grid.height)):
+            fast_grid = None   # tamaño declarado distinto: normalizar fila por fila
 
-        if raw_tiles:
+        if fast_grid is not None:
+            self.grid = fast_grid
+            self.width, self.height = fast_grid.width, fast_grid.height
+            print("[MAP INIT] Usando 'tiles' directo (map_data).")
+        elif raw_tiles:
             # normalizar filas (acepta filas como strings o listas)
             normalized: List[List[str]] = []
             for r in raw_tiles:
@@ -190,7 +510,7 @@ class GameMap:
                 for _ in range(self.height - len(fixed)):
                     fixed.append(["?"] * self.width)
 
-            self.grid = fixed
+            self.grid = TileGrid.from_rows(fixed)
             print("[MAP INIT] Usando 'tiles' directo (map_data).")
         else:
             # No hay 'tiles' -> intentar reconstruir desde objetos
@@ -205,9 +525,6 @@ class GameMap:
             if self.height <= 0:
                 self.height = int(map_data.get("height", 30) or 30)
 
-            # inicializar con 'C' (calles/transitables) en vez de '?'
-            grid: List[List[str]] = [["C" for _ in range(self.width)] for _ in range(self.height)]
-
             # imprimir samples para depuración
             if "buildings" in map_data:
                 print("[MAP INIT] muestras buildings (primeros 5):", map_data["buildings"][:5])
@@ -216,62 +533,27 @@ class GameMap:
             if "legend" in map_data:
                 print("[MAP INIT] legend keys:", list(map_data["legend"].keys()))
 
-            # procesar buildings
-            for b in map_data.get("buildings", []):
-                if isinstance(b, dict) and ("x" in b and "y" in b):
-                    bx = _safe_int(b.get("x", 0))
-                    by = _safe_int(b.get("y", 0))
-                    bw = _safe_int(b.get("w", b.get("width", 1)))
-                    bh = _safe_int(b.get("h", b.get("height", 1)))
-                    _mark_rectangle(grid, bx, by, bw, bh, "B")
-                elif isinstance(b, dict) and "cells" in b:
-                    cells = []
-                    for c in b["cells"]:
-                        if isinstance(c, dict) and "x" in c and "y" in c:
-                            cells.append((c["x"], c["y"]))
-                        elif isinstance(c, (list, tuple)) and len(c) >= 2:
-                            cells.append((c[0], c[1]))
-                    _mark_cells(grid, cells, "B")
-                elif isinstance(b, (list, tuple)):
-                    cells = []
-                    for item in b:
-                        if isinstance(item, (list, tuple)) and len(item) >= 2:
-                            cells.append((item[0], item[1]))
-                    _mark_cells(grid, cells, "B")
-
-            # procesar roads
-            for r in map_data.get("roads", []):
-                if isinstance(r, dict):
-                    if "cells" in r:
-                        pts = []
-                        for c in r["cells"]:
-                            if isinstance(c, (list, tuple)) and len(c) >= 2:
-                                pts.append((c[0], c[1]))
-                            elif isinstance(c, dict) and "x" in c and "y" in c:
-                                pts.append((c["x"], c["y"]))
-                        _mark_cells(grid, pts, "R")
-                    elif "path" in r:
-                        pts = _cells_from_path(r["path"])
-                        _mark_cells(grid, pts, "R")
-                    elif "points" in r:
-                        pts = _cells_from_path(r["points"])
-                        _mark_cells(grid, pts, "R")
-                    elif "x" in r and "y" in r:
-                        _mark_cells(grid, [(r["x"], r["y"])], "R")
-                elif isinstance(r, (list, tuple)):
-                    pts = _cells_from_path(r)
-                    _mark_cells(grid, pts, "R")
+            # mismo payload que la última vez -> usar el grid del cache binario (sin reconstruir ni guardar)
+            source_hash = _source_hash(self.width, self.height, map_data)
+            grid = self._cached_reconstruction(source_hash)
+            from_cache = grid is not None
+            if from_cache:
+                print(f"[MAP INIT] Payload sin cambios (hash {source_hash[:12]}) -> grid desde {BIN_CACHE_PATH}")
+            else:
+                # procesar buildings y roads (estampado en bloque con numpy si está disponible)
+                grid = _reconstruct_grid(self.width, self.height, map_data)
+                print("[MAP INIT] Grid reconstruido desde objetos. (puedes pegar muestras de buildings/roads si algo falta)")
 
             self.grid = grid
-            print("[MAP INIT] Grid reconstruido desde objetos. (puedes pegar muestras de buildings/roads si algo falta)")
 
             # aplicar legend antes de dibujar / guardar
             _apply_legend_to_tile_defs(map_data)
+            self.grid.refresh_luts()
 
             # guardar reconstrucción si está habilitado
-            if RECONSTRUCT_AND_SAVE:
+            if RECONSTRUCT_AND_SAVE and not from_cache:
                 try:
-                    _save_tiles_to_cache(map_data, self.grid)
+                    _save_tiles_to_cache(map_data, self.grid, source_hash)
                 except Exception as e:
                     print("[MAP INIT] No se pudo guardar tiles en cache:", e)
 
@@ -282,26 +564,136 @@ class GameMap:
             if self.width == 0:
                 self.width = len(self.grid[0])
 
+        # capas de dibujo cacheadas por (tile_size, draw_grid_lines)
+        self._tile_layers: Dict[Tuple[int, bool], Any] = {}
+        # arrays planos para el pathfinding, recalculados cuando cambia la versión del grid
+        self._mask_cache: Optional[Tuple[int, bytes]] = None
+        self._cost_cache: Optional[Tuple[int, array]] = None
+
         print(f"[MAP INIT] name={self.name}, size={self.width}x{self.height}, rows={len(self.grid)}")
 
+    @staticmethod
+    def _open_tiles_cache(path: Any) -> Optional["TileGrid"]:
+        opened = open_binary_map(Path(path))
+        if opened is None:
+            print(f"[MAP INIT] cache binario no disponible: {path}")
+            return None
+        meta, cells = opened
+        try:
+            return TileGrid(meta["width"], meta["height"], symbols=meta["symbols"], cells=cells)
+        except ValueError as e:
+            print("[MAP INIT] cache binario inválido:", e)
+            return None
+
+    def _cached_reconstruction(self, source_hash: str) -> Optional["TileGrid"]:
+        """Grid del cache binario si fue generado desde el mismo payload (mismo source_hash y tamaño)."""
+        meta = read_binary_meta(BIN_CACHE_PATH)
+        if meta is None or meta.get("source_hash") != source_hash:
+            return None
+        if (meta["width"], meta["height"]) != (self.width, self.height):
+            return None
+        return self._open_tiles_cache(BIN_CACHE_PATH)
+
+    @property
+    def version(self) -> int:
+        """Contador que aumenta cada vez que se modifica el grid."""
+        return self.grid.version
+
+    def set_tile(self, x: int, y: int, symbol: str) -> bool:
+        """Cambia el tile de (x,y). Devuelve False si la celda está fuera del mapa."""
+        if 0 <= x < self.grid.width and 0 <= y < self.grid.height:
+            self.grid.set(x, y, symbol)
+            return True
+        return False
+
     # ---------------- API util para la lógica del juego ----------------
     def is_walkable(self, x: int, y: int) -> bool:
         # x,y esperados en coordenadas de celdas (0..width-1, 0..height-1)
-        if 0 <= y < len(self.grid) and 0 <= x < len(self.grid[y]):
-            return TILE_DEFS.get(self.grid[y][x], TILE_DEFS["?"])["walkable"]
+        g = self.grid
+        if 0 <= x < g.width and 0 <= y < g.height:
+            return g.walkable_lut[g.cells[y * g.width + x]] == 1
         return False
 
     def get_speed(self, x: int, y: int) -> float:
-        if 0 <= y < len(self.grid) and 0 <= x < len(self.grid[y]):
-            return TILE_DEFS.get(self.grid[y][x], TILE_DEFS["?"])["speed"]
+        g = self.grid
+        if 0 <= x < g.width and 0 <= y < g.height:
+            return g.speed_lut[g.cells[y * g.width + x]]
         return 0.0
 
+    def walkable_mask(self) -> bytes:
+        """1 byte por celda (idx = y*width + x): 1 si es transitable. Cacheado por versión."""
+        cached = self._mask_cache
+        if cached is not None and cached[0] == self.grid.version:
+            return cached[1]
+        g = self.grid
+        n = self.width * self.height
+        if g.width == self.width and g.height >= self.height:
+            mask = bytes(g.cells[:n]).translate(bytes(g.walkable_lut))
+        else:
+            mask = bytes(1 if self.is_walkable(i % self.width, i // self.width) else 0 for i in range(n))
+        self._mask_cache = (g.version, mask)
+        return mask
+
+    def step_costs(self) -> array:
+        """Tiempo base (1/speed) para entrar a cada celda, mismo layout que walkable_mask()."""
+        cached = self._cost_cache
+        if cached is not None and cached[0] == self.grid.version:
+            return cached[1]
+        g = self.grid
+        n = self.width * self.height
+        if g.width == self.width and g.height >= self.height:
+            by_id = [1.0 / sp if sp > 0 else float("inf") for sp in g.speed_lut]
+            costs = array("d", [by_id[c] for c in g.cells[:n]])
+        else:
+            speeds = (self.get_speed(i % self.width, i // self.width) for i in range(n))
+            costs = array("d", [1.0 / sp if sp > 0 else float("inf") for sp in speeds])
+        self._cost_cache = (g.version, costs)
+        return costs
+
+    def fastest_speed(self) -> float:
+        """Mayor 'speed' entre los tiles transitables presentes en el mapa (para heurísticas)."""
+        g = self.grid
+        speeds = [g.speed_lut[cid] for cid in range(len(g.symbols)) if g.walkable_lut[cid]]
+        return max(speeds) if speeds else 0.0
+
     # ---------------- Dibujo debug ----------------
-    def draw_debug(self, tile_size: int = 20, draw_grid_lines: bool = True):
+    def draw_debug(self, tile_size: int = 20, draw_grid_lines: bool = True,
+                   view_rect: Optional[Tuple[float, float, float, float]] = None):
+        """
+        Dibuja el mapa usando una capa de sprites cacheada por chunks.
+        La capa se construye la primera vez y luego sólo se actualizan las celdas modificadas.
+        view_rect=(left, bottom, right, top) en píxeles de mundo: sólo se dibujan los chunks visibles.
+        """
+        key = (tile_size, draw_grid_lines)
+        layer = self._tile_layers.get(key)
+        if layer is None:
+            try:
+                from map_renderer import TileLayer
+                layer = TileLayer(self, tile_size, draw_grid_lines=draw_grid_lines, flip_y=FLIP_Y)
+            except Exception as e:
+                print("[MAP DRAW] no se pudo crear la capa de sprites, usando dibujo inmediato:", e)
+                layer = False
+            self._tile_layers[key] = layer
+        if layer:
+            layer.draw(view_rect)
+        else:
+            self._draw_debug_immediate(tile_size, draw_grid_lines, view_rect)
+
+    def _draw_debug_immediate(self, tile_size: int = 20, draw_grid_lines: bool = True,
+                              view_rect: Optional[Tuple[float, float, float, float]] = None):
         rows = len(self.grid)
         cols = len(self.grid[0]) if rows>0 else 0
-        for y in range(rows):
-            for x in range(cols):
+        x_range = range(cols)
+        if view_rect is not None:
+            left, bottom, right, top = view_rect
+            x_range = range(max(0, int(left // tile_size)), min(cols, int(right // tile_size) + 1))
+            r0 = max(0, int(bottom // tile_size))
+            r1 = min(rows, int(top // tile_size) + 1)
+            y_range = range(rows - r1, rows - r0) if FLIP_Y else range(r0, r1)
+        else:
+            y_range = range(rows)
+        for y in y_range:
+            for x in x_range:
                 symbol = self.grid[y][x]
                 props = TILE_DEFS.get(symbol, TILE_DEFS["?"])
                 color = props["color"]
@@ -0,0 +1,233 @@
+# map_renderer.py
+"""
+Render del mapa por lotes y por chunks.
+- TileLayer divide el mapa en chunks de CHUNK_SIZE x CHUNK_SIZE celdas; cada chunk es un SpriteList
+  (un sprite por celda + líneas del grid) que se construye la primera vez que entra en pantalla.
+- En cada frame sólo se dibujan los chunks que intersectan el viewport y sólo se recolorean
+  las celdas que cambiaron desde el último draw.
+- MapCamera: cámara 2D mínima (scroll) compatible con arcade 2.x (arcade.Camera) y 3.x (Camera2D).
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+import arcade
+
+from map_manager import TILE_DEFS
+
+CHUNK_SIZE = 16               # celdas por lado de cada chunk
+GRID_LINE_COLOR = arcade.color.BLACK
+GRID_LINE_WIDTH = 1
+
+Rect = Tuple[float, float, float, float]   # (left, bottom, right, top) en píxeles de mundo
+
+
+def _solid_sprite(width: float, height: float, cx: float, cy: float, color) -> arcade.SpriteSolidColor:
+    # textura blanca + tinte: funciona igual en arcade 2.x y 3.x y permite recolorear sin recrear
+    sprite = arcade.SpriteSolidColor(max(1, int(width)), max(1, int(height)), color=arcade.color.WHITE)
+    sprite.center_x = cx
+    sprite.center_y = cy
+    sprite.color = color
+    return sprite
+
+
+# ---------------- Cámara ----------------
+def _make_arcade_camera(width: int, height: int):
+    if hasattr(arcade, "camera") and hasattr(arcade.camera, "Camera2D"):
+        return arcade.camera.Camera2D()
+    return arcade.Camera(width, height)
+
+
+def _move_arcade_camera(cam, left: float, bottom: float, width: int, height: int):
+    if hasattr(cam, "move_to"):
+        # arcade 2.x: posición = esquina inferior izquierda
+        cam.move_to((left, bottom), 1.0)
+    else:
+        # arcade 3.x: posición = centro de la vista
+        cam.position = (left + width / 2, bottom + height / 2)
+
+
+class MapCamera:
+    def __init__(self, width: int, height: int):
+        """width/height: tamaño del viewport en píxeles de pantalla."""
+        self.width = width
+        self.height = height
+        self.left = 0.0
+        self.bottom = 0.0
+        # las cámaras de arcade necesitan ventana: se crean al primer use()
+        self._world_cam = None
+        self._screen_cam = None
+
+    @property
+    def view_rect(self) -> Rect:
+        return (self.left, self.bottom, self.left + self.width, self.bottom + self.height)
+
+    def move_to(self, left: float, bottom: float):
+        self.left = float(left)
+        self.bottom = float(bottom)
+
+    def center_on(self, px: float, py: float, world_width: Optional[float] = None, world_height: Optional[float] = None):
+        """Centra la vista en (px,py); si se da el tamaño del mundo, no se sale de sus bordes."""
+        left = px - self.width / 2
+        bottom = py - self.height / 2
+        if world_width is not None:
+            left = max(0.0, min(left, world_width - self.width)) if world_width > self.width else 0.0
+        if world_height is not None:
+            bottom = max(0.0, min(bottom, world_height - self.height)) if world_height > self.height else 0.0
+        self.move_to(left, bottom)
+
+    def screen_to_world(self, x: float, y: float) -> Tuple[float, float]:
+        return x + self.left, y + self.bottom
+
+    def world_to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        return x - self.left, y - self.bottom
+
+    def use(self):
+        """Activa la proyección del mundo (dibujar mapa, player, rutas)."""
+        if self._world_cam is None:
+            self._world_cam = _make_arcade_camera(self.width, self.height)
+        _move_arcade_camera(self._world_cam, self.left, self.bottom, self.width, self.height)
+        self._world_cam.use()
+
+    def use_screen(self):
+        """Activa la proyección de pantalla (HUD)."""
+        if self._screen_cam is None:
+            self._screen_cam = _make_arcade_camera(self.width, self.height)
+            _move_arcade_camera(self._screen_cam, 0, 0, self.width, self.height)
+        self._screen_cam.use()
+
+
+# ---------------- Capa de tiles ----------------
+class _Chunk:
+    __slots__ = ("tiles", "lines", "sprites")
+
+    def __init__(self):
+        self.tiles = arcade.SpriteList()
+        self.lines = arcade.SpriteList()
+        self.sprites: Dict[int, arcade.SpriteSolidColor] = {}   # idx de celda -> sprite
+
+
+class TileLayer:
+    def __init__(self, game_map, tile_size: int, draw_grid_lines: bool = True, flip_y: bool = True,
+                 chunk_size: int = CHUNK_SIZE):
+        self.game_map = game_map
+        self.grid = game_map.grid
+        self.tile_size = tile_size
+        self.draw_grid_lines = draw_grid_lines
+        self.flip_y = flip_y
+        self.chunk_size = max(1, int(chunk_size))
+
+        self.chunks_x = (self.grid.width + self.chunk_size - 1) // self.chunk_size
+        self.chunks_y = (self.grid.height + self.chunk_size - 1) // self.chunk_size
+        self._chunks: Dict[Tuple[int, int], _Chunk] = {}
+        self._dirty: Set[int] = set()
+        self.last_drawn_chunks = 0
+
+        self.grid.add_listener(self._on_tile_changed)
+
+    # ---------------- geometría ----------------
+    def _cell_center(self, x: int, y: int):
+        ts = self.tile_size
+        row = (self.grid.height - 1 - y) if self.flip_y else y
+        return x * ts + ts / 2, row * ts + ts / 2
+
+    def _color_for(self, idx: int):
+        symbol = self.grid.symbols[self.grid.cells[idx]]
+        return TILE_DEFS.get(symbol, TILE_DEFS["?"])["color"]
+
+    def visible_cell_bounds(self, view_rect: Optional[Rect]) -> Tuple[int, int, int, int]:
+        """(x0, y0, x1, y1) inclusivos en coordenadas de grid; rango vacío si no se ve nada."""
+        g = self.grid
+        if view_rect is None:
+            return 0, 0, g.width - 1, g.height - 1
+        left, bottom, right, top = view_rect
+        ts = self.tile_size
+        x0 = max(0, int(left // ts))
+        x1 = min(g.width - 1, int((right - 1) // ts))
+        r0 = max(0, int(bottom // ts))
+        r1 = min(g.height - 1, int((top - 1) // ts))
+        if self.flip_y:
+            y0, y1 = g.height - 1 - r1, g.height - 1 - r0
+        else:
+            y0, y1 = r0, r1
+        return x0, y0, x1, y1
+
+    def visible_chunks(self, view_rect: Optional[Rect]) -> List[Tuple[int, int]]:
+        x0, y0, x1, y1 = self.visible_cell_bounds(view_rect)
+        if x0 > x1 or y0 > y1:
+            return []
+        cs = self.chunk_size
+        return [(kx, ky)
+                for ky in range(y0 // cs, y1 // cs + 1)
+                for kx in range(x0 // cs, x1 // cs + 1)]
+
+    # ---------------- construcción perezosa por chunk ----------------
+    def _build_chunk(self, kx: int, ky: int) -> _Chunk:
+        g = self.grid
+        ts = self.tile_size
+        cs = self.chunk_size
+        chunk = _Chunk()
+        x_start, y_start = kx * cs, ky * cs
+        x_end, y_end = min(g.width, x_start + cs), min(g.height, y_start + cs)
+        for y in range(y_start, y_end):
+            for x in range(x_start, x_end):
+                idx = y * g.width + x
+                cx, cy = self._cell_center(x, y)
+                sprite = _solid_sprite(ts, ts, cx, cy, self._color_for(idx))
+                chunk.sprites[idx] = sprite
+                chunk.tiles.append(sprite)
+
+        if self.draw_grid_lines:
+            px0 = x_start * ts
+            px1 = x_end * ts
+            rows = [(g.height - 1 - y) if self.flip_y else y for y in (y_start, y_end - 1)]
+            py0 = min(rows) * ts
+            py1 = (max(rows) + 1) * ts
+            for col in range(x_start, x_end + 1):
+                chunk.lines.append(_solid_sprite(GRID_LINE_WIDTH, py1 - py0, col * ts, (py0 + py1) / 2, GRID_LINE_COLOR))
+            for i in range(y_end - y_start + 1):
+                py = py0 + i * ts
+                chunk.lines.append(_solid_sprite(px1 - px0, GRID_LINE_WIDTH, (px0 + px1) / 2, py, GRID_LINE_COLOR))
+
+        self._chunks[(kx, ky)] = chunk
+        return chunk
+
+    # ---------------- actualización incremental ----------------
+    def _on_tile_changed(self, x: int, y: int):
+        self._dirty.add(y * self.grid.width + x)
+
+    def sync(self) -> int:
+        """Recolorea sólo las celdas modificadas de chunks ya construidos. Devuelve cuántas se actualizaron."""
+        if not self._dirty:
+            return 0
+        count = 0
+        w = self.grid.width
+        cs = self.chunk_size
+        for idx in self._dirty:
+            chunk = self._chunks.get(((idx % w) // cs, (idx // w) // cs))
+            if chunk is None:
+                continue  # se construirá con el color correcto cuando sea visible
+            chunk.sprites[idx].color = self._color_for(idx)
+            count += 1
+        self._dirty.clear()
+        return count
+
+    def refresh(self):
+        """Recolorea todas las celdas (p.ej. si cambió TILE_DEFS por un 'legend')."""
+        for chunk in self._chunks.values():
+            self._dirty.update(chunk.sprites.keys())
+        self.sync()
+
+    def close(self):
+        self.grid.remove_listener(self._on_tile_changed)
+
+    # ---------------- dibujo ----------------
+    def draw(self, view_rect: Optional[Rect] = None):
+        """Dibuja los chunks que intersectan view_rect (todo el mapa si es None)."""
+        self.sync()
+        keys = self.visible_chunks(view_rect)
+        for key in keys:
+            chunk = self._chunks.get(key) or self._build_chunk(*key)
+            chunk.tiles.draw()
+            if self.draw_grid_lines:
+                chunk.lines.draw()
+        self.last_drawn_chunks = len(keys)
@@ -1,6 +1,6 @@
 # models.py
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 @dataclass
 class GameState:
@@ -10,6 +10,38 @@ class GameState:
     orders: List[Dict[str, Any]] = field(default_factory=list)
     weather_state: Dict[str, Any] = field(default_factory=dict)
     reputation: int = 70
+    # memo (no se serializa): (objeto city_map, hash de su contenido) para no re-hashear el mapa en cada guardado;
+    # (None, hash) si city_map todavía está diferido
+    _map_hash: Optional[Tuple[Any, str]] = field(default=None, repr=False, compare=False)
+    # campos cuya carga se posterga hasta el primer acceso: nombre -> loader()
+    _deferred: Dict[str, Callable[[], Any]] = field(default_factory=dict, repr=False, compare=False)
+
+    def defer(self, name: str, loader: Callable[[], Any]):
+        """El campo 'name' se obtiene con loader() la primera vez que se lee."""
+        self.__dict__.pop(name, None)
+        self._deferred[name] = loader
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def __getattr__(self, name: str) -> Any:
+        # sólo se llama si el atributo no existe: campos diferidos
+        deferred = self.__dict__.get("_deferred")
+        if deferred and name in deferred:
+            # el loader se quita recién cuando funcionó: si falla, el próximo acceso lo reintenta
+            value = deferred[name]()
+            deferred.pop(name, None)
+            setattr(self, name, value)
+            return value
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pickle / deepcopy: resolver los diferidos (los loaders no se serializan)
+        for name in list(self._deferred):
+            getattr(self, name)
+        state = dict(self.__dict__)
+        state["_deferred"] = {}
+        return state
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -1,9 +1,13 @@
 # pathfinding.py
 import heapq
+import threading
+from array import array
 from typing import List, Tuple, Optional, Dict
 
 Cell = Tuple[int, int]
 
+_GEN_LIMIT = 2**32 - 1
+
 def manhattan(a: Cell, b: Cell) -> int:
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
@@ -19,7 +23,140 @@ def reconstruct(came_from: Dict[Cell, Cell], current: Cell):
     path.reverse()
     return path
 
-def a_star(game_map, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+def step_cost(game_map, cell: Cell, weather_multiplier: float = 1.0) -> float:
+    """Tiempo (en unidades de celda) para entrar a 'cell': 1 / (speed del tile * multiplicador de clima)."""
+    speed = game_map.get_speed(cell[0], cell[1]) * weather_multiplier
+    if speed <= 0:
+        return float("inf")
+    return 1.0 / speed
+
+def path_cost(game_map, path: List[Cell], weighted: bool = False, weather_multiplier: float = 1.0) -> float:
+    """Costo total de una ruta: número de pasos, o tiempo si weighted=True."""
+    if not path:
+        return float("inf")
+    if not weighted:
+        return float(len(path) - 1)
+    return sum(step_cost(game_map, c, weather_multiplier) for c in path[1:])
+
+def _min_step_cost(game_map, weather_multiplier: float) -> float:
+    # heurística admisible: nadie avanza más rápido que el tile más rápido del mapa
+    fastest = getattr(game_map, "fastest_speed", None)
+    speed = fastest() if callable(fastest) else 0.0
+    if speed <= 0:
+        return 0.0   # sin información -> Dijkstra
+    return 1.0 / (speed * weather_multiplier)
+
+# ---------------- Buffers reutilizables (camino rápido) ----------------
+class _SearchBuffers:
+    """
+    g-score / padre / marcas para celdas codificadas como y*width + x.
+    Se reutilizan entre búsquedas: una celda sólo es válida si su marca == generation,
+    así no hay que limpiar los arrays en cada llamada.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.g = array("d", [0.0]) * size
+        self.parent = array("i", [-1]) * size
+        self.seen = array("I", [0]) * size
+        self.closed = array("I", [0]) * size
+        self.generation = 0
+
+    def next_generation(self) -> int:
+        self.generation += 1
+        if self.generation >= _GEN_LIMIT:
+            self.seen = array("I", [0]) * self.size
+            self.closed = array("I", [0]) * self.size
+            self.generation = 1
+        return self.generation
+
+_local = threading.local()
+
+def _buffers_for(size: int) -> _SearchBuffers:
+    buf = getattr(_local, "buffers", None)
+    if buf is None or buf.size != size:
+        buf = _SearchBuffers(size)
+        _local.buffers = buf
+    return buf
+
+def _a_star_flat(game_map, mask, start: Cell, goal: Cell, costs, weather_multiplier: float,
+                 h_scale: float, stats: Optional[dict]) -> Optional[List[Cell]]:
+    w, h = game_map.width, game_map.height
+    size = w * h
+    sx, sy = start; gx, gy = goal
+    s = sy * w + sx
+    t = gy * w + gx
+
+    buf = _buffers_for(size)
+    gen = buf.next_generation()
+    g_arr, parent, seen, closed = buf.g, buf.parent, buf.seen, buf.closed
+    seen[s] = gen
+    g_arr[s] = 0.0
+    parent[s] = -1
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    uniform = costs is None
+    # costo uniforme: cada entrada del heap es un solo int f*size + celda (sin tuplas);
+    # con costo por tile: (f, celda). En ambos casos g se lee de g_arr.
+    h0 = (abs(sx - gx) + abs(sy - gy)) * h_scale
+    open_heap = [h0 * size + s] if uniform else [(h0, s)]
+    expanded = 0
+    found = False
+
+    while open_heap:
+        if uniform:
+            cur = heappop(open_heap) % size
+        else:
+            cur = heappop(open_heap)[1]
+        if closed[cur] == gen:
+            continue
+        if cur == t:
+            found = True
+            break
+        closed[cur] = gen
+        expanded += 1
+        g = g_arr[cur]
+
+        y, x = divmod(cur, w)
+        for n in (cur + 1 if x + 1 < w else -1, cur - 1 if x > 0 else -1,
+                  cur + w if y + 1 < h else -1, cur - w if y > 0 else -1):
+            if n < 0 or not mask[n] or closed[n] == gen:
+                continue
+            ng = g + 1 if uniform else g + costs[n] / weather_multiplier
+            if seen[n] != gen or ng < g_arr[n]:
+                seen[n] = gen
+                g_arr[n] = ng
+                parent[n] = cur
+                ny, nx = divmod(n, w)
+                if uniform:
+                    heappush(open_heap, (int(ng) + abs(nx - gx) + abs(ny - gy)) * size + n)
+                else:
+                    heappush(open_heap, (ng + (abs(nx - gx) + abs(ny - gy)) * h_scale, n))
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    if not found:
+        return None
+    path = []
+    cur = t
+    while cur != -1:
+        path.append((cur % w, cur // w))
+        cur = parent[cur]
+    path.reverse()
+    return path
+
+def a_star(game_map, start: Cell, goal: Cell, weighted: bool = False,
+           weather_multiplier: float = 1.0, stats: Optional[dict] = None) -> Optional[List[Cell]]:
+    """
+    A* sobre el grid (4 vecinos).
+    - weighted=False: cada paso cuesta 1 (ruta más corta).
+    - weighted=True: cada paso cuesta el tiempo de entrar al tile (speed C/R/P y clima),
+      así la ruta devuelta es la más rápida. weather_multiplier es el Mclima de WeatherManager.
+    - stats: dict opcional donde se deja "expanded" (nodos expandidos).
+    Si game_map expone walkable_mask() (GameMap) se usa el camino rápido con celdas como enteros
+    y buffers reutilizados; si no, la versión genérica con tuplas y dicts.
+    """
+    if weighted and weather_multiplier <= 0:
+        raise ValueError("weather_multiplier debe ser > 0")
     if start == goal:
         return [start]
     sx, sy = start; gx, gy = goal
@@ -30,11 +167,22 @@ def a_star(game_map, start: Cell, goal: Cell) -> Optional[List[Cell]]:
     if not game_map.is_walkable(gx, gy):
         return None
 
+    h_scale = _min_step_cost(game_map, weather_multiplier) if weighted else 1
+    if hasattr(game_map, "walkable_mask"):
+        costs = game_map.step_costs() if weighted else None
+        return _a_star_flat(game_map, game_map.walkable_mask(), (sx, sy), (gx, gy), costs,
+                            weather_multiplier, h_scale, stats)
+    return _a_star_generic(game_map, start, goal, weighted, weather_multiplier, h_scale, stats)
+
+def _a_star_generic(game_map, start: Cell, goal: Cell, weighted: bool, weather_multiplier: float,
+                    h_scale: float, stats: Optional[dict]) -> Optional[List[Cell]]:
     open_heap = []
     gscore = {start: 0}
-    heapq.heappush(open_heap, (manhattan(start, goal), 0, start))
+    heapq.heappush(open_heap, (manhattan(start, goal) * h_scale, 0, start))
     came_from = {}
     closed = set()
+    if stats is not None:
+        stats["expanded"] = 0
 
     while open_heap:
         f, g, current = heapq.heappop(open_heap)
@@ -43,6 +191,8 @@ def a_star(game_map, start: Cell, goal: Cell) -> Optional[List[Cell]]:
         if current == goal:
             return reconstruct(came_from, current)
         closed.add(current)
+        if stats is not None:
+            stats["expanded"] += 1
 
         for n in neighbors(current):
             nx, ny = n
@@ -50,9 +200,212 @@ def a_star(game_map, start: Cell, goal: Cell) -> Optional[List[Cell]]:
                 continue
             if not game_map.is_walkable(nx, ny):
                 continue
-            tentative_g = g + 1
+            tentative_g = g + (step_cost(game_map, n, weather_multiplier) if weighted else 1)
             if tentative_g < gscore.get(n, 10**9):
                 came_from[n] = current
                 gscore[n] = tentative_g
-                heapq.heappush(open_heap, (tentative_g + manhattan(n, goal), tentative_g, n))
+                heapq.heappush(open_heap, (tentative_g + manhattan(n, goal) * h_scale, tentative_g, n))
     return None
+
+# ---------------- Jump Point Search (costo uniforme, 4 vecinos) ----------------
+# Direcciones en el orden de las tablas de salto: este, oeste, sur, norte.
+_EAST, _WEST, _SOUTH, _NORTH = 0, 1, 2, 3
+
+def _build_jump_tables(mask, w: int, h: int):
+    """
+    Tablas de salto (estilo JPS+) sobre walkable_mask(), una por dirección, indexadas por y*w + x.
+    tabla[i] = k > 0 -> el siguiente jump point está a k pasos de i en esa dirección;
+    tabla[i] = -k    -> no hay jump point: se pueden dar k pasos antes de chocar (k >= 0).
+    No dependen de la meta, así que se calculan una vez por versión del mapa.
+    """
+    size = w * h
+    fe = bytearray(size); fw = bytearray(size); fs = bytearray(size); fn = bytearray(size)
+    for y in range(h):
+        base = y * w
+        has_up, has_dn = y > 0, y + 1 < h
+        for x in range(w):
+            i = base + x
+            if not mask[i]:
+                continue
+            has_l, has_r = x > 0, x + 1 < w
+            up = has_up and mask[i - w]
+            dn = has_dn and mask[i + w]
+            lf = has_l and mask[i - 1]
+            rt = has_r and mask[i + 1]
+            ul = has_up and has_l and mask[i - w - 1]
+            ur = has_up and has_r and mask[i - w + 1]
+            dl = has_dn and has_l and mask[i + w - 1]
+            dr = has_dn and has_r and mask[i + w + 1]
+            # vecino forzado: un lado libre cuyo "detrás" (según la dirección de llegada) está bloqueado
+            fe[i] = (up and not ul) or (dn and not dl)
+            fw[i] = (up and not ur) or (dn and not dr)
+            fs[i] = (lf and not ul) or (rt and not ur)
+            fn[i] = (lf and not dl) or (rt and not dr)
+
+    east = array("i", [0]) * size
+    west = array("i", [0]) * size
+    south = array("i", [0]) * size
+    north = array("i", [0]) * size
+
+    def sweep(table, forced, cells):
+        # recorre 'cells' de atrás hacia adelante respecto de la dirección del salto
+        d = 0
+        for i in cells:
+            table[i] = d
+            if not mask[i]:
+                d = 0
+            elif forced[i]:
+                d = 1
+            elif d > 0:
+                d += 1
+            else:
+                d -= 1
+
+    for y in range(h):
+        base = y * w
+        sweep(east, fe, range(base + w - 1, base - 1, -1))
+        sweep(west, fw, range(base, base + w))
+    # en vertical también es jump point la celda desde la que un salto horizontal encuentra algo
+    fs = bytearray(1 if (fs[i] or east[i] > 0 or west[i] > 0) else 0 for i in range(size))
+    fn = bytearray(1 if (fn[i] or east[i] > 0 or west[i] > 0) else 0 for i in range(size))
+    for x in range(w):
+        sweep(south, fs, range(size - w + x, -1, -w))
+        sweep(north, fn, range(x, size, w))
+    return east, west, south, north
+
+def _jump_tables_for(mask, w: int, h: int):
+    # walkable_mask() devuelve el mismo objeto mientras el mapa no cambie: se cachea por identidad
+    cached = getattr(_local, "jump_tables", None)
+    if cached is not None and cached[0] is mask and cached[1] == w:
+        return cached[2]
+    tables = _build_jump_tables(mask, w, h)
+    _local.jump_tables = (mask, w, tables)
+    return tables
+
+def jump_point_search(game_map, start: Cell, goal: Cell, stats: Optional[dict] = None) -> Optional[List[Cell]]:
+    """
+    Jump Point Search para grids de costo uniforme (cada paso cuesta 1, como a_star por defecto).
+    Misma firma y formato de resultado que a_star: la ruta se devuelve celda por celda.
+    En vez de expandir cada celda, salta en línea recta hasta encontrar un vecino forzado o la meta,
+    así las calles abiertas no generan miles de nodos simétricos.
+    Trabaja sobre walkable_mask() con tablas de salto precalculadas por versión del mapa, así cada
+    salto es una consulta O(1). Sin walkable_mask() se delega en a_star (misma longitud de ruta).
+    """
+    if start == goal:
+        return [start]
+    w, h = game_map.width, game_map.height
+    sx, sy = start; gx, gy = goal
+    if not (0 <= sx < w and 0 <= sy < h):
+        return None
+    if not (0 <= gx < w and 0 <= gy < h):
+        return None
+    if not game_map.is_walkable(gx, gy):
+        return None
+    if not hasattr(game_map, "walkable_mask"):
+        return a_star(game_map, start, goal, stats=stats)
+
+    mask = game_map.walkable_mask()
+    tables = _jump_tables_for(mask, w, h)
+    size = w * h
+    s = sy * w + sx
+    t = gy * w + gx
+
+    buf = _buffers_for(size)
+    gen = buf.next_generation()
+    g_arr, parent, seen, closed = buf.g, buf.parent, buf.seen, buf.closed
+    seen[s] = gen
+    g_arr[s] = 0.0
+    parent[s] = -1
+
+    # (tabla, paso en índice plano, signo en x/y, es horizontal)
+    moves = ((tables[_EAST], 1, 1, True), (tables[_WEST], -1, -1, True),
+             (tables[_SOUTH], w, 1, False), (tables[_NORTH], -w, -1, False))
+    from_horizontal = (moves[_SOUTH], moves[_NORTH])
+    from_vertical = (moves[_EAST], moves[_WEST])
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    open_heap = [(abs(sx - gx) + abs(sy - gy)) * size + s]
+    expanded = 0
+    found = False
+
+    while open_heap:
+        cur = heappop(open_heap) % size
+        if closed[cur] == gen:
+            continue
+        if cur == t:
+            found = True
+            break
+        closed[cur] = gen
+        expanded += 1
+        g = int(g_arr[cur])
+        cy, cx = divmod(cur, w)
+
+        p = parent[cur]
+        if p < 0:
+            directions = moves
+        elif p // w == cy:
+            directions = from_horizontal + (moves[_EAST] if cur > p else moves[_WEST],)
+        else:
+            directions = from_vertical + (moves[_SOUTH] if cur > p else moves[_NORTH],)
+
+        for table, step, sign, horizontal in directions:
+            dist = table[cur]
+            reach = dist if dist > 0 else -dist
+            if horizontal:
+                to_goal = (gx - cx) * sign if cy == gy else 0
+            else:
+                # la fila de la meta siempre es jump point: desde ahí un salto horizontal la alcanza
+                to_goal = (gy - cy) * sign
+            if 0 < to_goal <= reach:
+                steps = to_goal
+            elif dist > 0:
+                steps = dist
+            else:
+                continue
+            jp = cur + steps * step
+            if closed[jp] == gen:
+                continue
+            ng = g + steps
+            if seen[jp] != gen or ng < g_arr[jp]:
+                seen[jp] = gen
+                g_arr[jp] = ng
+                parent[jp] = cur
+                jy, jx = divmod(jp, w)
+                heappush(open_heap, (ng + abs(jx - gx) + abs(jy - gy)) * size + jp)
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    if not found:
+        return None
+    points = []
+    cur = t
+    while cur != -1:
+        points.append(cur)
+        cur = parent[cur]
+    points.reverse()
+    path = [(s % w, s // w)]
+    for a, b in zip(points, points[1:]):
+        step = (1 if b > a else -1) if a // w == b // w else (w if b > a else -w)
+        for i in range(a + step, b + step, step):
+            path.append((i % w, i // w))
+    return path
+
+# ---------------- Selección de algoritmo por llamada ----------------
+PATHFINDERS = {
+    "astar": a_star,
+    "jps": jump_point_search,
+}
+
+def find_path(game_map, start: Cell, goal: Cell, algorithm: str = "astar",
+              weighted: bool = False, weather_multiplier: float = 1.0,
+              stats: Optional[dict] = None) -> Optional[List[Cell]]:
+    """
+    Punto de entrada común: algorithm="astar" o "jps".
+    JPS sólo es válido con costo uniforme; con weighted=True siempre se usa a_star.
+    """
+    if algorithm not in PATHFINDERS:
+        raise ValueError(f"Algoritmo desconocido: {algorithm!r} (opciones: {sorted(PATHFINDERS)})")
+    if weighted or algorithm == "astar":
+        return a_star(game_map, start, goal, weighted=weighted,
+                      weather_multiplier=weather_multiplier, stats=stats)
+    return PATHFINDERS[algorithm](game_map, start, goal, stats=stats)
@@ -0,0 +1,68 @@
+# route_cache.py
+"""
+Cache LRU de rutas: (start, goal, modo de costo) -> ruta.
+- Se invalida completa cuando cambia GameMap.version (cualquier cambio de tile).
+- Expone hits / misses para ver qué tanto sirve (previews de ruta, evaluación de pedidos).
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pathfinding import find_path
+
+Cell = Tuple[int, int]
+
+MAX_ROUTES = 256
+
+
+class RouteCache:
+    def __init__(self, game_map, max_entries: int = MAX_ROUTES, algorithm: str = "astar"):
+        self.game_map = game_map
+        self.max_entries = max_entries
+        self.algorithm = algorithm
+        self._routes: "OrderedDict[Tuple[Cell, Cell, Any], Optional[List[Cell]]]" = OrderedDict()
+        self._version = getattr(game_map, "version", 0)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cost_mode(weighted: bool, weather_multiplier: float) -> Any:
+        # con costo uniforme el clima no cambia la ruta
+        return ("weighted", round(float(weather_multiplier), 6)) if weighted else "uniform"
+
+    def get_path(self, start: Cell, goal: Cell, weighted: bool = False,
+                 weather_multiplier: float = 1.0) -> Optional[List[Cell]]:
+        """Igual que find_path/a_star, pero servido desde memoria si ya se calculó."""
+        version = getattr(self.game_map, "version", 0)
+        if version != self._version:
+            self._routes.clear()
+            self._version = version
+
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        key = (start, goal, self.cost_mode(weighted, weather_multiplier))
+        if key in self._routes:
+            self.hits += 1
+            self._routes.move_to_end(key)
+            path = self._routes[key]
+        else:
+            self.misses += 1
+            path = find_path(self.game_map, start, goal, algorithm=self.algorithm,
+                             weighted=weighted, weather_multiplier=weather_multiplier)
+            self._routes[key] = path
+            while len(self._routes) > self.max_entries:
+                self._routes.popitem(last=False)
+        # copia: quien llama puede modificar su lista sin tocar la cache
+        return list(path) if path is not None else None
+
+    def clear(self):
+        self._routes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._routes),
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
@@ -1,44 +1,416 @@
 # save_manager.py
 import os
+import copy
+import gzip
+import hashlib
+import io
 import json
 import pickle
+import struct
+import threading
 import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from models import GameState
+from async_writer import write_atomic
 
 SAVE_DIR = Path("saves")
 DEBUG_DIR = SAVE_DIR / "debug"
+BLOB_DIR = SAVE_DIR / "blobs"   # city_map guardados una sola vez, por hash de contenido
+INDEX_PATH = SAVE_DIR / "index.json"   # metadatos de cada slot (para menús sin abrir los .sav)
 SAVE_DIR.mkdir(exist_ok=True, parents=True)
 DEBUG_DIR.mkdir(exist_ok=True, parents=True)
 
-def save_game(state: GameState, slot_name: str = "slot1.sav") -> str:
-    """Guarda un GameState en formato binario (.sav) y en JSON para debug."""
-    path = SAVE_DIR / slot_name
+COMPRESS_SAVES = True    # secciones del .sav comprimidas con zlib
+WRITE_DEBUG_JSON = True  # copia JSON legible en saves/debug/
+ZLIB_LEVEL = 6
+GZIP_LEVEL = 6           # blobs del mapa
+GZIP_MAGIC = b"\x1f\x8b" # .sav 1.0 / 2.0 comprimidos (load_game los sigue leyendo)
+SAVE_MAGIC = b"CQSAV\0"
+CONTAINER_VERSION = 1
+SAVE_FORMAT_VERSION = "3.0"   # 3.0: contenedor con header + secciones comprimidas por separado
+_CONTAINER_HEADER = struct.Struct("<6sHI")   # magic, versión del contenedor, largo del header JSON
+COMPACT_EVERY = 20       # cada cuántos guardados se borran los blobs que ya no usa ningún .sav
+BLOB_GRACE_SECONDS = 60  # blobs más nuevos que esto nunca se borran (puede haber un guardado en curso)
+
+# un solo worker: los guardados se escriben en el orden en que se pidieron
+_SAVE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-worker")
+_save_lock = threading.Lock()
+_latest_request: Dict[str, int] = {}   # slot -> número del último guardado pedido
+_pending: Dict[str, Future] = {}
+_request_counter = 0
+_saves_since_compact = 0
+# último mapa hasheado en segundo plano: (city_map vivo, su snapshot, Future con el hash).
+# Sólo el hilo principal lo asigna y sólo él copia el resultado a GameState._map_hash.
+_map_hash_job: Optional[Tuple[Any, Dict[str, Any], Future]] = None
+_index_lock = threading.Lock()
+INDEX_VERSION = 1
+# guardar / tocar un blob y decidir si se borra pasan bajo el mismo lock: la compactación nunca
+# borra un blob entre que un guardado lo ve y escribe el .sav que lo referencia
+_blob_lock = threading.Lock()
+
+# ---------------- blobs del mapa (por hash de contenido) ----------------
+def map_content_hash(city_map: Dict[str, Any]) -> str:
+    """sha256 del JSON canónico del mapa (claves ordenadas, sin espacios)."""
+    canonical = json.dumps(city_map, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _portable_map(city_map: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    El mapa tal como se guarda: con su contenido real ('tiles' o buildings/roads), nunca con una
+    ruta a un cache local ('tiles_cache' de estados viejos), que se sobrescribe y haría que dos
+    mapas distintos compartan hash y que la partida apunte a lo que haya en el cache al cargar.
+    """
+    if "tiles_cache" not in city_map:
+        return city_map
+    return {k: v for k, v in city_map.items() if k != "tiles_cache"}
+
+def _blob_path(digest: str) -> Path:
+    return BLOB_DIR / f"{digest}.map"
+
+def _touch_blob(path: Path) -> bool:
+    """Marca el blob como en uso (que la compactación no lo borre por BLOB_GRACE_SECONDS). False si no existe."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _store_map_blob(city_map: Dict[str, Any], digest: str):
+    """Escribe el blob sólo si no existe (mismo hash = mismo contenido)."""
+    path = _blob_path(digest)
+    with _blob_lock:
+        if _touch_blob(path):
+            return
+        data = gzip.compress(pickle.dumps(city_map, protocol=pickle.HIGHEST_PROTOCOL), compresslevel=GZIP_LEVEL, mtime=0)
+        write_atomic(path, data)
+    print(f"[SAVE] mapa guardado como blob {digest[:12]}")
 
-    payload = {
-        "meta": {
-            "format": "courierquest-save",
-            "version": "1.0",
-            "timestamp": time.time(),
-        },
-        "state": state.to_dict()
+def _claim_map_blob(digest: str):
+    """Para guardados que sólo tienen el hash: el blob tiene que existir (y queda marcado en uso)."""
+    with _blob_lock:
+        if not _touch_blob(_blob_path(digest)):
+            raise FileNotFoundError(f"el blob del mapa {digest[:12]} ya no existe")
+
+def _load_map_blob(digest: str) -> Dict[str, Any]:
+    with open(_blob_path(digest), "rb") as f:
+        return pickle.loads(gzip.decompress(f.read()))
+
+def _referenced_blobs() -> Set[str]:
+    refs: Set[str] = set()
+    for p in SAVE_DIR.iterdir():
+        if p.suffix != ".sav":
+            continue
+        header = read_save_header(p.name)
+        if header is None:
+            print(f"[SAVE] no se pudo leer {p.name} al compactar")
+            return {b.stem for b in BLOB_DIR.glob("*.map")}   # ante la duda no borrar nada
+        if header.get("city_map_ref"):
+            refs.add(header["city_map_ref"])
+    return refs
+
+def compact_blobs() -> int:
+    """Borra los blobs de mapa que no referencia ningún .sav. Devuelve cuántos borró."""
+    if not BLOB_DIR.exists():
+        return 0
+    refs = _referenced_blobs()
+    now = time.time()
+    removed = 0
+    for blob in BLOB_DIR.glob("*.map"):
+        if blob.stem in refs:
+            continue
+        try:
+            with _blob_lock:
+                if now - blob.stat().st_mtime < BLOB_GRACE_SECONDS:
+                    continue
+                blob.unlink()
+            removed += 1
+        except OSError:
+            pass
+    if removed:
+        print(f"[SAVE] compactación: {removed} blob(s) de mapa sin uso borrados")
+    return removed
+
+def _maybe_compact():
+    global _saves_since_compact
+    with _save_lock:
+        _saves_since_compact += 1
+        if _saves_since_compact < COMPACT_EVERY:
+            return
+        _saves_since_compact = 0
+    try:
+        compact_blobs()
+    except Exception as e:
+        print("[SAVE] error compactando blobs:", e)
+
+def _snapshot(state: GameState) -> Dict[str, Any]:
+    """
+    Copia barata de las secciones chicas del estado, para serializarlas en otro hilo mientras el juego sigue:
+    - player / weather_state (chicos): copia profunda.
+    - orders: lista nueva con una copia superficial de cada pedido.
+    El city_map no se copia aquí: va al blob store por hash (ver _map_source / save_game_async).
+    """
+    return {
+        "player": copy.deepcopy(state.player),
+        "orders": [dict(o) if isinstance(o, dict) else o for o in state.orders],
+        "weather_state": copy.deepcopy(state.weather_state),
+        "reputation": state.reputation,
     }
 
-    # Guardar binario
-    with open(path, "wb") as f:
-        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+def _map_source(state: GameState) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    (city_map, hash ya conocido). Si el mapa sigue diferido y se conoce su hash, no se carga.
+    Se llama en el hilo principal: si un guardado en segundo plano ya hasheó este mismo mapa,
+    su resultado se memoriza aquí en el estado.
+    """
+    memo = state._map_hash
+    if not state.is_loaded("city_map") and memo is not None and memo[0] is None:
+        return None, memo[1]
+    city_map = state.city_map
+    if memo is not None and memo[0] is city_map:
+        return city_map, memo[1]
+    job = _map_hash_job
+    if job is not None and job[0] is city_map and job[2].done() and job[2].exception() is None:
+        state._map_hash = (city_map, job[2].result())
+        return city_map, job[2].result()
+    return city_map, None
+
+def _remember_map_hash(state: GameState, city_map: Optional[Dict[str, Any]], digest: Optional[str]):
+    """Memoriza el hash recién calculado (sólo desde el hilo que usa el estado)."""
+    if digest and city_map is not None and state.is_loaded("city_map") and state.city_map is city_map:
+        state._map_hash = (city_map, digest)
+
+def _snapshot_map_hash(map_job: Tuple[Any, Dict[str, Any], Future]) -> str:
+    """En el worker: hash del snapshot del mapa, dejado en el Future (una sola vez por snapshot)."""
+    _, snapshot, result = map_job
+    if not result.done():
+        try:
+            result.set_result(map_content_hash(_portable_map(snapshot)))
+        except Exception as e:
+            result.set_exception(e)
+    return result.result()
 
-    # Guardar JSON legible en carpeta debug
-    debug_path = DEBUG_DIR / f"{slot_name}.json"
-    with open(debug_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
+def _map_ref(city_map: Optional[Dict[str, Any]], digest: Optional[str]) -> Optional[str]:
+    """Hash del mapa (calculándolo si hace falta), con el blob ya guardado."""
+    portable = _portable_map(city_map) if city_map else None
+    if digest is None:
+        if not portable:
+            return None
+        digest = map_content_hash(portable)
+    if portable is not None:
+        _store_map_blob(portable, digest)
+    else:
+        # sin el mapa no se puede reconstruir: mejor fallar que escribir un .sav que apunta a la nada
+        _claim_map_blob(digest)
+    return digest
+
+def _summary(sections: Dict[str, Any]) -> Dict[str, Any]:
+    player = sections.get("player") or {}
+    return {
+        "name": player.get("name"),
+        "money": player.get("money", 0),
+        "reputation": sections.get("reputation"),
+        "orders": len(sections.get("orders") or []),
+    }
+
+def _encode_container(sections: Dict[str, Any], timestamp: float, map_ref: Optional[str]) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Contenedor .sav:
+        magic "CQSAV\\0" | uint16 versión del contenedor | uint32 largo del header | header JSON | secciones
+    El header (formato, timestamp, resumen del jugador, ref del mapa, codec y offsets) se lee sin
+    descomprimir nada; cada sección es un pickle comprimido por separado.
+    """
+    codec = "zlib" if COMPRESS_SAVES else "none"
+    blobs = []
+    offsets: Dict[str, List[int]] = {}
+    offset = 0
+    for name, value in sections.items():
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if codec == "zlib":
+            data = zlib.compress(data, ZLIB_LEVEL)
+        offsets[name] = [offset, len(data)]
+        offset += len(data)
+        blobs.append(data)
+    header = {
+        "format": "courierquest-save",
+        "version": SAVE_FORMAT_VERSION,
+        "timestamp": timestamp,
+        "summary": _summary(sections),
+        "city_map_ref": map_ref,
+        "codec": codec,
+        "sections": offsets,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    data = _CONTAINER_HEADER.pack(SAVE_MAGIC, CONTAINER_VERSION, len(header_bytes)) + header_bytes + b"".join(blobs)
+    return data, header
+
+def _write_save(slot_name: str, sections: Dict[str, Any], timestamp: float,
+                city_map: Optional[Dict[str, Any]], digest: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Guarda el mapa en el blob store, arma el contenedor y escribe (atómico) el .sav y su JSON de debug.
+    No toca el GameState (puede correr en el worker). Devuelve (ruta, hash del mapa).
+    """
+    path = SAVE_DIR / slot_name
+    map_ref = _map_ref(city_map, digest)
+    data, header = _encode_container(sections, timestamp, map_ref)
+    write_atomic(path, data)
+    _update_index(slot_name, header, data)
+
+    if WRITE_DEBUG_JSON:
+        # Guardar JSON legible en carpeta debug
+        debug_path = DEBUG_DIR / f"{slot_name}.json"
+        debug = {"meta": header, "state": dict(sections, city_map_ref=map_ref)}
+        write_atomic(debug_path, json.dumps(debug, indent=2, ensure_ascii=False, default=str).encode("utf-8"), fsync=False)
 
     print(f"[SAVE] Partida guardada en {path}")
-    return str(path)
+    _maybe_compact()
+    return str(path), map_ref
+
+def save_game(state: GameState, slot_name: str = "slot1.sav") -> str:
+    """Guarda un GameState en formato binario (.sav) y en JSON para debug (bloquea hasta terminar)."""
+    city_map, digest = _map_source(state)
+    sections = {"player": state.player, "orders": state.orders,
+                "weather_state": state.weather_state, "reputation": state.reputation}
+    path, map_ref = _write_save(slot_name, sections, time.time(), city_map, digest)
+    if digest is None:
+        _remember_map_hash(state, city_map, map_ref)
+    return path
+
+def save_game_async(state: GameState, slot_name: str = "slot1.sav",
+                    on_done: Optional[Callable[[Optional[str], Optional[BaseException]], None]] = None) -> Future:
+    """
+    Igual que save_game pero sin bloquear: aquí sólo se toma un snapshot del estado;
+    hash del mapa, pickle, compresión y las escrituras se hacen en el worker de guardado.
+    - Si el hash del mapa no se conoce, el worker lo calcula sobre una copia (no sobre el mapa
+      vivo) y el hilo principal lo memoriza en el próximo guardado (_map_source).
+    - Con el hash conocido el worker no lee el mapa: si su blob se borró mientras tanto, el guardado
+      falla (FileNotFoundError) en vez de escribir un .sav sin mapa; el próximo lo vuelve a guardar.
+    - on_done(path, error) se llama desde el worker al terminar (path=None si falló o se descartó).
+    - Si se pide otro guardado del mismo slot antes de que este empiece, este se descarta.
+    Devuelve un Future con la ruta (o None si fue reemplazado).
+    """
+    global _request_counter, _map_hash_job
+    sections = _snapshot(state)
+    city_map, digest = _map_source(state)
+    if digest is not None and city_map is not None and not _blob_path(digest).exists():
+        digest = None   # blob borrado: hay que volver a guardar el mapa desde una copia
+    map_job = None
+    if digest is None and city_map:
+        map_job = _map_hash_job
+        if map_job is None or map_job[0] is not city_map or (map_job[2].done() and map_job[2].exception()):
+            # mapa nuevo: copia para hashearlo en el worker mientras el juego sigue
+            map_job = (city_map, copy.deepcopy(city_map), Future())
+            _map_hash_job = map_job
+    timestamp = time.time()
+    with _save_lock:
+        _request_counter += 1
+        ticket = _request_counter
+        _latest_request[slot_name] = ticket
+
+    def job() -> Optional[str]:
+        path: Optional[str] = None
+        error: Optional[BaseException] = None
+        try:
+            with _save_lock:
+                superseded = _latest_request.get(slot_name) != ticket
+            if superseded:
+                print(f"[SAVE] guardado de {slot_name} reemplazado por uno más nuevo")
+            elif map_job is not None:
+                path, _ = _write_save(slot_name, sections, timestamp, map_job[1], _snapshot_map_hash(map_job))
+            else:
+                # hash conocido y blob ya guardado: el worker no lee el mapa vivo
+                path, _ = _write_save(slot_name, sections, timestamp, None, digest)
+        except Exception as e:
+            error = e
+            print(f"[ERROR] Falló el guardado de {slot_name}: {e}")
+        if on_done is not None:
+            try:
+                on_done(path, error)
+            except Exception as e:
+                print("[SAVE] error en on_done:", e)
+        if error is not None:
+            raise error
+        return path
+
+    future = _SAVE_EXECUTOR.submit(job)
+    with _save_lock:
+        _pending[slot_name] = future
+    return future
+
+def wait_for_saves(timeout: Optional[float] = None) -> bool:
+    """Espera a que terminen los guardados en segundo plano. False si se venció el timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _save_lock:
+        futures = list(_pending.values())
+    for f in futures:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            f.result(remaining)
+        except FutureTimeoutError:   # antes de 3.11 no es el TimeoutError builtin
+            return False
+        except Exception:
+            pass
+    return True
+
+def _read_legacy_payload(data: bytes) -> Dict[str, Any]:
+    """Formatos 1.0 / 2.0: un único pickle (opcionalmente gzip) con {"meta", "state"}."""
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    return pickle.loads(data)
+
+def _read_container_header(f) -> Optional[Tuple[Dict[str, Any], int]]:
+    """(header, offset donde empiezan las secciones) o None si el archivo no es un contenedor."""
+    head = f.read(_CONTAINER_HEADER.size)
+    if len(head) < _CONTAINER_HEADER.size:
+        return None
+    magic, version, header_len = _CONTAINER_HEADER.unpack(head)
+    if magic != SAVE_MAGIC:
+        return None
+    if version > CONTAINER_VERSION:
+        raise ValueError(f"contenedor de guardado versión {version} no soportado")
+    header = json.loads(f.read(header_len).decode("utf-8"))
+    return header, _CONTAINER_HEADER.size + header_len
 
-def load_game(slot_name: str = "slot1.sav") -> Optional[GameState]:
-    """Carga un GameState desde un archivo .sav binario."""
+def _decode_section(data: bytes, codec: str) -> Any:
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec != "none":
+        raise ValueError(f"codec de sección desconocido: {codec}")
+    return pickle.loads(data)
+
+def read_save_header(slot_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Metadatos de un slot (version, timestamp, summary, city_map_ref, ...) leyendo sólo el header:
+    no descomprime ni deserializa ninguna sección. Para los formatos viejos se lee el pickle completo.
+    """
+    path = SAVE_DIR / slot_name
+    try:
+        with open(path, "rb") as f:
+            parsed = _read_container_header(f)
+            if parsed is None:
+                f.seek(0)
+                payload = _read_legacy_payload(f.read())
+                state = payload.get("state", {})
+                header = dict(payload.get("meta", {}))
+                header["summary"] = _summary(state)
+                header["city_map_ref"] = state.get("city_map_ref")
+            else:
+                header = parsed[0]
+    except Exception as e:
+        print(f"[LOAD] header ilegible en {slot_name}: {e}")
+        return None
+    header["slot"] = slot_name
+    header["size"] = path.stat().st_size
+    return header
+
+def load_game(slot_name: str = "slot1.sav", lazy_map: bool = True) -> Optional[GameState]:
+    """
+    Carga un GameState desde un .sav (contenedor por secciones, o los formatos pickle anteriores).
+    lazy_map=True: el city_map no se lee del blob store hasta el primer acceso a state.city_map.
+    """
     path = SAVE_DIR / slot_name
     if not path.exists():
         print(f"[LOAD] No existe el archivo {slot_name}")
@@ -46,15 +418,207 @@ def load_game(slot_name: str = "slot1.sav") -> Optional[GameState]:
 
     try:
         with open(path, "rb") as f:
-            payload = pickle.load(f)
-        state_dict = payload.get("state", {})
-        return GameState.from_dict(state_dict)
+            parsed = _read_container_header(f)
+            if parsed is None:
+                f.seek(0)
+                return _state_from_legacy(_read_legacy_payload(f.read()))
+            header, base = parsed
+            codec = header.get("codec", "zlib")
+            state_dict: Dict[str, Any] = {}
+            for name, (offset, length) in header.get("sections", {}).items():
+                f.seek(base + offset)
+                state_dict[name] = _decode_section(f.read(length), codec)
     except Exception as e:
         print(f"[ERROR] Falló la carga de {slot_name}: {e}")
         return None
 
+    ref = header.get("city_map_ref")
+    if ref and not _blob_path(ref).exists():
+        # con lazy_map el error aparecería recién en el primer acceso a state.city_map (dentro del juego)
+        print(f"[ERROR] Falló la carga de {slot_name}: falta el blob del mapa {ref[:12]}")
+        return None
+    state = GameState.from_dict(state_dict)
+    if ref:
+        _attach_map(state, ref, lazy_map)
+    return state
+
+def _attach_map(state: GameState, ref: str, lazy: bool):
+    def load_map() -> Dict[str, Any]:
+        city_map = _load_map_blob(ref)
+        state._map_hash = (city_map, ref)
+        return city_map
+
+    if lazy:
+        state._map_hash = (None, ref)
+        state.defer("city_map", load_map)
+    else:
+        state.city_map = load_map()
+
+def _state_from_legacy(payload: Dict[str, Any]) -> GameState:
+    state_dict = payload.get("state", {})
+    ref = state_dict.get("city_map_ref")
+    state = GameState.from_dict(state_dict)
+    if ref:
+        # formato 2.0: el mapa está en el blob store (los .sav 1.0 lo traen adentro)
+        _attach_map(state, ref, lazy=False)
+    return state
+
+# ---------------- índice de slots (saves/index.json) ----------------
+def _index_path() -> Path:
+    # relativo a SAVE_DIR para que siga a SAVE_DIR si se cambia (tests)
+    return SAVE_DIR / INDEX_PATH.name
+
+def _index_entry(slot_name: str, header: Dict[str, Any], data: bytes) -> Dict[str, Any]:
+    summary = header.get("summary") or {}
+    return {
+        "name": slot_name,
+        "timestamp": header.get("timestamp"),
+        "player": summary.get("name"),
+        "money": summary.get("money", 0),
+        "reputation": summary.get("reputation"),
+        "orders": summary.get("orders", 0),
+        "version": header.get("version"),
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+
+def _read_index() -> Optional[Dict[str, Dict[str, Any]]]:
+    try:
+        with open(_index_path(), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION or not isinstance(index.get("slots"), dict):
+        return None
+    return index["slots"]
+
+def _write_index(slots: Dict[str, Dict[str, Any]]):
+    data = json.dumps({"version": INDEX_VERSION, "slots": slots}, ensure_ascii=False, separators=(",", ":"))
+    write_atomic(_index_path(), data.encode("utf-8"), fsync=False)
+
+def _update_index(slot_name: str, header: Dict[str, Any], data: bytes):
+    with _index_lock:
+        slots = _read_index()
+        if slots is None:
+            slots = _scan_slots(exclude=slot_name)
+        slots[slot_name] = _index_entry(slot_name, header, data)
+        _write_index(slots)
+
+def _scan_slots(exclude: Optional[str] = None, only: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Entradas del índice leyendo cada .sav (lento: sólo si falta el índice o aparecen slots nuevos)."""
+    slots: Dict[str, Dict[str, Any]] = {}
+    for p in SAVE_DIR.iterdir():
+        if p.suffix != ".sav" or p.name == exclude or (only is not None and p.name not in only):
+            continue
+        header = read_save_header(p.name)
+        if header is None:
+            continue   # ilegible: no se indexa (verify_slot lo reporta)
+        try:
+            data = p.read_bytes()
+        except OSError:
+            continue
+        if header.get("timestamp") is None:
+            header["timestamp"] = p.stat().st_mtime
+        slots[p.name] = _index_entry(p.name, header, data)
+    return slots
+
+def rebuild_index() -> Dict[str, Dict[str, Any]]:
+    with _index_lock:
+        slots = _scan_slots()
+        _write_index(slots)
+    return slots
+
+def list_save_entries() -> List[Dict[str, Any]]:
+    """
+    Metadatos de los slots (name, timestamp, player, money, reputation, orders, size, sha256),
+    del más reciente al más viejo, leídos del índice sin abrir los .sav. Sin índice (o inválido)
+    se reconstruye una vez; los .sav sin entrada (copiados a mano) se agregan y las entradas
+    cuyo archivo ya no existe se quitan.
+    """
+    with _index_lock:
+        slots = _read_index()
+        names = {n for n in os.listdir(SAVE_DIR) if n.endswith(".sav")}
+        if slots is None:
+            slots = _scan_slots()
+            _write_index(slots)
+        elif set(slots) != names:
+            for stale in set(slots) - names:
+                del slots[stale]
+            missing = names - set(slots)
+            if missing:
+                slots.update(_scan_slots(only=missing))
+            _write_index(slots)
+    return sorted(slots.values(), key=lambda e: e.get("timestamp") or 0, reverse=True)
+
+def _slot_decodes(data: bytes) -> bool:
+    """True si los bytes son un guardado completo: header legible y todas las secciones deserializables."""
+    try:
+        f = io.BytesIO(data)
+        parsed = _read_container_header(f)
+        if parsed is None:
+            _read_legacy_payload(data)
+            return True
+        header, base = parsed
+        codec = header.get("codec", "zlib")
+        for offset, length in header.get("sections", {}).values():
+            chunk = data[base + offset:base + offset + length]
+            if len(chunk) != length:
+                return False
+            _decode_section(chunk, codec)
+    except Exception:
+        return False
+    return True
+
+def _map_ref_in(data: bytes) -> Optional[str]:
+    """city_map_ref de un guardado ya leído (sólo el header en el contenedor)."""
+    try:
+        parsed = _read_container_header(io.BytesIO(data))
+        if parsed is None:
+            return _read_legacy_payload(data).get("state", {}).get("city_map_ref")
+        return parsed[0].get("city_map_ref")
+    except Exception:
+        return None
+
+def verify_slot(slot_name: str) -> str:
+    """
+    Estado de un slot comparado con el índice:
+    - "ok": tamaño y sha256 coinciden con su entrada (sin deserializar nada).
+    - "mismatch": el .sav no coincide con el índice (o no tiene entrada) pero es un guardado válido;
+      pasa si el proceso se cortó entre escribir el slot y el índice. La entrada se actualiza.
+    - "missing_map": el .sav está bien pero el blob del mapa al que apunta ya no existe.
+    - "corrupt": el .sav no se puede leer completo.
+    - "missing": no existe.
+    """
+    path = SAVE_DIR / slot_name
+    entry = (_read_index() or {}).get(slot_name)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return "missing"
+    if entry is not None and len(data) == entry.get("size") and hashlib.sha256(data).hexdigest() == entry.get("sha256"):
+        status = "ok"
+    elif not _slot_decodes(data):
+        return "corrupt"
+    else:
+        status = "mismatch"
+        header = read_save_header(slot_name)
+        if header is not None:
+            with _index_lock:
+                slots = _read_index()
+                if slots is not None:
+                    slots[slot_name] = _index_entry(slot_name, header, data)
+                    _write_index(slots)
+    ref = _map_ref_in(data)
+    if ref and not _blob_path(ref).exists():
+        return "missing_map"
+    return status
+
 def list_saves() -> list[str]:
-    """Lista los archivos de guardado disponibles ordenados por fecha."""
+    """Lista los archivos de guardado disponibles ordenados por fecha (desde el índice)."""
+    try:
+        return [e["name"] for e in list_save_entries()]
+    except Exception as e:
+        print("[SAVE] índice no disponible, escaneando saves/:", e)
     saves = [f for f in SAVE_DIR.iterdir() if f.suffix == ".sav"]
     saves.sort(key=lambda p: p.stat().st_mtime, reverse=True)
     return [p.name for p in saves]
@@ -1,106 +1,173 @@
 # state_initializer.py
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 
 from models import GameState
 from api_client import ApiClient
+from async_writer import SHARED_WRITER
+from map_cache import BIN_CACHE_PATH, read_binary_tiles, tiles_to_cells, write_binary_map
 
 CACHE_PATH = Path("api_cache") / "city_map.json"
+INIT_DEADLINE = 6.0   # segundos totales para obtener map/jobs/weather al iniciar una partida
+
+def _merge_city_map(cached: dict, city_map: dict) -> dict:
+    # Merge sensible: preferir keys del cached, pero mantener campos principales de city_map si vienen
+    merged = dict(cached)
+    if isinstance(city_map, dict):
+        # Sobre-escribir con city_map valores 'name','width','height' si el API los prové
+        if city_map.get("name"):
+            merged["name"] = city_map.get("name")
+        if city_map.get("city_name"):
+            merged["city_name"] = city_map.get("city_name")
+        if city_map.get("width"):
+            merged["width"] = city_map.get("width")
+        if city_map.get("height"):
+            merged["height"] = city_map.get("height")
+        # conservar otras keys existentes en city_map (no borrar cached)
+        for k, v in city_map.items():
+            if k not in merged:
+                merged[k] = v
+    return merged
+
+def _write_binary_from_json(cached: dict):
+    """Convierte los 'tiles' del cache JSON al cache binario para que el próximo arranque no parsee JSON."""
+    tiles = cached.get("tiles") or []
+    rows = [list(r) if isinstance(r, str) else [str(x) for x in r] for r in tiles]
+    if not rows or any(len(r) != len(rows[0]) for r in rows):
+        return
+    try:
+        symbols, cells = tiles_to_cells(rows)
+        meta = {k: v for k, v in cached.items() if k not in ("tiles", "map")}
+        write_binary_map(BIN_CACHE_PATH, len(rows[0]), len(rows), symbols, cells, meta, writer=SHARED_WRITER)
+        print(f"[FALLBACK] cache JSON convertido a binario: {BIN_CACHE_PATH}")
+    except Exception as e:
+        print("[FALLBACK] No se pudo escribir el cache binario:", e)
 
 def _fallback_tiles_from_cache(city_map: dict) -> dict:
     """
-    Si city_map no contiene 'tiles', intenta leer api_cache/city_map.json
-    y devolver una versión con 'tiles' si existe.
+    Si city_map no contiene 'tiles', intenta usar el cache del mapa:
+    - api_cache/city_map.bin: los tiles se leen del binario (sin parsear JSON).
+    - api_cache/city_map.json: devuelve una versión con 'tiles' (y la convierte a binario).
+    En ambos casos el dict resultante trae los 'tiles' reales: es lo que se guarda en las partidas.
+    Si el payload trae 'buildings'/'roads' no se usa ningún cache aquí: el grid guardado puede ser
+    de otro mapa. GameMap lo reconstruye, o usa el cache binario sólo si su source_hash coincide.
     """
     # Si ya trae tiles, devolver tal cual
     if city_map and isinstance(city_map, dict) and city_map.get("tiles"):
         return city_map
+    if isinstance(city_map, dict) and (city_map.get("buildings") or city_map.get("roads")):
+        return city_map
 
-    # Intentar leer cache
+    # Intentar cache binario
+    loaded = read_binary_tiles(BIN_CACHE_PATH)
+    if loaded is not None:
+        meta, tiles = loaded
+        cached = {k: v for k, v in meta.items() if k not in ("symbols", "tiles_offset", "source_hash")}
+        cached["tiles"] = tiles
+        print(f"[FALLBACK] API no trae 'tiles' -> usando cache binario: {BIN_CACHE_PATH}")
+        return _merge_city_map(cached, city_map)
+
+    # Intentar cache JSON
     try:
         if CACHE_PATH.exists():
             with CACHE_PATH.open(encoding="utf-8") as f:
                 cached = json.load(f)
             if isinstance(cached, dict) and cached.get("tiles"):
                 print(f"[FALLBACK] API no trae 'tiles' -> usando 'tiles' desde cache: {CACHE_PATH}")
-                # Merge sensible: preferir keys del cached, pero mantener campos principales de city_map si vienen
-                merged = dict(cached)
-                if isinstance(city_map, dict):
-                    # Sobre-escribir con city_map valores 'name','width','height' si el API los prové
-                    if city_map.get("name"):
-                        merged["name"] = city_map.get("name")
-                    if city_map.get("city_name"):
-                        merged["city_name"] = city_map.get("city_name")
-                    if city_map.get("width"):
-                        merged["width"] = city_map.get("width")
-                    if city_map.get("height"):
-                        merged["height"] = city_map.get("height")
-                    # conservar otras keys existentes en city_map (no borrar cached)
-                    for k, v in city_map.items():
-                        if k not in merged:
-                            merged[k] = v
-                return merged
+                _write_binary_from_json(cached)
+                return _merge_city_map(cached, city_map)
     except Exception as e:
         print("[FALLBACK] Error leyendo cache:", e)
 
     return city_map or {}
 
-def init_game_state(api: Optional[ApiClient] = None, force_update: bool = False) -> GameState:
+def _call_getter(getter: Callable, force_update: bool = False, offline: bool = False):
+    """Llama api.get_*; los argumentos que el cliente no soporte (TypeError) se omiten."""
+    if offline:
+        try:
+            return getter(offline=True)
+        except TypeError:
+            return None   # el cliente no tiene modo offline -> usar el valor por defecto
+    if force_update:
+        # Intentar llamar con parámetro force_update si el cliente lo permite
+        try:
+            return getter(force_update=True)
+        except TypeError:
+            # la firma no acepta force_update -> llamar normal
+            pass
+    return getter()
+
+def _call_before(api: ApiClient, end: float, getter: Callable, force_update: bool = False):
+    """_call_getter con los requests del hilo acotados (reintentos incluidos) al instante 'end'."""
+    scope = getattr(api, "deadline", None)
+    if scope is None:
+        return _call_getter(getter, force_update)
+    with scope(max(0.0, end - time.monotonic())):
+        return _call_getter(getter, force_update)
+
+def _fetch_initial_data(api: ApiClient, force_update: bool, deadline: float) -> Dict[str, Any]:
+    """
+    Pide city_map, jobs y weather en paralelo con un plazo total compartido: el arranque tarda
+    lo que el endpoint más lento (como mucho 'deadline'), no la suma de los tres.
+    Los que no terminan a tiempo o fallan usan el respaldo offline del cliente (cache / /data).
+    Cada request (con sus reintentos) se corta al vencer el plazo, así ningún hilo sigue
+    reintentando en segundo plano después de que el arranque se rindió.
+    """
+    getters = {
+        "city_map": getattr(api, "get_city_map", None),
+        "jobs": getattr(api, "get_jobs", None),
+        "weather": getattr(api, "get_weather", None),
+    }
+    defaults = {"city_map": {}, "jobs": [], "weather": {}}
+    results: Dict[str, Any] = dict(defaults)
+
+    end = time.monotonic() + deadline
+    pool = ThreadPoolExecutor(max_workers=len(getters), thread_name_prefix="init-fetch")
+    futures = {name: pool.submit(_call_before, api, end, getter, force_update)
+               for name, getter in getters.items() if getter is not None}
+    done, _ = wait(futures.values(), timeout=deadline)
+    # no esperar a los requests vencidos: su plazo ya venció y cortan solos en segundo plano
+    pool.shutdown(wait=False)
+
+    for name, future in futures.items():
+        value = None
+        if future in done:
+            try:
+                value = future.result()
+            except Exception as e:
+                print(f"[INIT] Error al obtener {name}:", e)
+        else:
+            print(f"[INIT] {name} no respondió en {deadline:.1f}s -> usando respaldo offline")
+            try:
+                value = _call_getter(getters[name], offline=True)
+            except Exception as e:
+                print(f"[INIT] Error en respaldo offline de {name}:", e)
+        results[name] = value if value is not None else defaults[name]
+    return results
+
+def init_game_state(api: Optional[ApiClient] = None, force_update: bool = False,
+                    deadline: Optional[float] = None) -> GameState:
     """
     Inicializa y retorna un GameState usando ApiClient (o creando uno).
     - Si force_update=True intentará forzar la obtención de datos frescos desde la API.
-    - Si la API no trae 'tiles', usará la cache de api_cache/city_map.json si existe.
+    - city_map, jobs y weather se piden en paralelo; deadline (por defecto INIT_DEADLINE) es el
+      plazo total en segundos antes de pasar a los datos offline.
+    - Si la API no trae 'tiles', usará el cache del mapa (binario o api_cache/city_map.json) si existe.
     """
     if api is None:
         api = ApiClient()
 
     state = GameState()
 
-    # ------------- Obtener city_map (con intento de force_update si se pide) -------------
-    city_map = {}
-    try:
-        if force_update:
-            # Intentar llamar con parámetro force_update si el cliente lo permite
-            try:
-                city_map = api.get_city_map(force_update=True)
-            except TypeError:
-                # la firma no acepta force_update -> llamar normal
-                city_map = api.get_city_map()
-        else:
-            city_map = api.get_city_map()
-    except Exception as e:
-        print("[INIT] Error al obtener city_map desde API:", e)
-        city_map = {}
+    fetched = _fetch_initial_data(api, force_update, INIT_DEADLINE if deadline is None else deadline)
 
     # Aplicar fallback a cache si no hay tiles en la respuesta
-    city_map = _fallback_tiles_from_cache(city_map)
-
-    # ------------- Obtener jobs y weather (con try/except) -------------
-    try:
-        # intentar force en jobs si está disponible
-        if force_update and hasattr(api, "get_jobs"):
-            try:
-                jobs = api.get_jobs(force_update=True)
-            except TypeError:
-                jobs = api.get_jobs()
-        else:
-            jobs = api.get_jobs()
-    except Exception as e:
-        print("[INIT] Error al obtener jobs:", e)
-        jobs = []
-
-    try:
-        if force_update and hasattr(api, "get_weather"):
-            try:
-                weather = api.get_weather(force_update=True)
-            except TypeError:
-                weather = api.get_weather()
-        else:
-            weather = api.get_weather()
-    except Exception as e:
-        print("[INIT] Error al obtener weather:", e)
-        weather = {}
+    city_map = _fallback_tiles_from_cache(fetched["city_map"])
+    jobs = fetched["jobs"]
+    weather = fetched["weather"]
 
     # ------------- Rellenar el estado -------------
     # guardar el dict del mapa en el estado para que GameMap lo consuma
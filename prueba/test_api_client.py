@@ -0,0 +1,204 @@
+# test_api_client.py
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api_client import ApiClient
+from async_writer import BackgroundWriter
+
+DELAYS = {}   # path -> segundos de espera del stub antes de responder
+
+@pytest.fixture
+def stub(tmp_path):
+    """
+    Servidor HTTP/1.1 local (keep-alive). routes[path] = lista de (status, body[, headers]) que
+    se consumen en orden; la última respuesta se repite. 'seen' guarda los headers recibidos.
+    """
+    routes = {}
+    seen = []
+    DELAYS.clear()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            seen.append((path, dict(self.headers)))
+            time.sleep(DELAYS.get(path, 0))
+            queue = routes.get(path) or [(404, {})]
+            status, body, *extra = queue.pop(0) if len(queue) > 1 else queue[0]
+            data = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            for k, v in (extra[0] if extra else {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ApiClient(base_url=f"http://127.0.0.1:{server.server_port}",
+                       cache_dir=str(tmp_path / "cache"), data_dir=str(tmp_path / "data"), backoff=0,
+                       writer=BackgroundWriter())
+    yield client, routes, seen
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+def test_session_reuses_connections(stub):
+    client, routes, _ = stub
+    routes["/city/jobs"] = [(200, {"data": [{"id": "J1"}]})]
+    for _ in range(5):
+        assert client.get_jobs() == [{"id": "J1"}]
+    stats = client.connection_stats()
+    assert stats == {"opened": 1, "requests": 5, "reused": 4}
+
+def test_retries_transient_errors(stub):
+    client, routes, seen = stub
+    routes["/city/jobs"] = [(503, {}), (503, {}), (200, {"data": [{"id": "J2"}]})]
+    assert client.get_jobs() == [{"id": "J2"}]
+    assert len(seen) == 3
+
+def test_retries_are_bounded_by_the_deadline(stub):
+    client, routes, seen = stub
+    routes["/city/jobs"] = [(503, {})]
+    client.retries, client.backoff = 10, 0.2
+    t0 = time.perf_counter()
+    with client.deadline(0.5):
+        assert client.get_jobs() == []
+    assert time.perf_counter() - t0 < 1.0
+    assert 1 <= len(seen) < 4
+
+def test_conditional_request_304_refreshes_cache_without_rewrite(stub):
+    client, routes, seen = stub
+    body = {"data": [{"id": "J3"}]}
+    routes["/city/jobs"] = [(200, body, {"ETag": '"v1"', "Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT"}),
+                            (304, None)]
+    assert client.get_jobs() == [{"id": "J3"}]
+    client.writer.flush()
+    cache_file = client._cache_path("city/jobs")
+    raw = cache_file.read_bytes()
+    os.utime(cache_file, (1, 1))   # cache vencido
+
+    assert client.get_jobs() == [{"id": "J3"}]
+    headers = seen[-1][1]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Wed, 01 Oct 2025 10:00:00 GMT"
+    client.writer.flush()
+    assert cache_file.read_bytes() == raw
+    assert client._is_cache_valid(cache_file)
+
+def test_stale_while_revalidate_serves_cache_and_notifies(stub):
+    client, routes, seen = stub
+    client.policy = "stale_while_revalidate"
+    routes["/city/jobs"] = [(200, {"data": [{"id": "old"}]}), (200, {"data": [{"id": "new"}]})]
+    assert client.get_jobs() == [{"id": "old"}]   # sin cache: va a la red
+    assert len(seen) == 1
+
+    assert client.get_jobs() == [{"id": "old"}]   # cache válido: sin request
+    assert len(seen) == 1
+
+    received = []
+    client.subscribe("city/jobs", lambda endpoint, data: received.append(data))
+    client.writer.flush()
+    cache_file = client._cache_path("city/jobs")
+    stale = cache_file.stat().st_mtime - client.ttl - 5
+    os.utime(cache_file, (stale, stale))
+
+    # stale: se sirve al instante y sólo se lanza un refresco aunque se pida dos veces
+    DELAYS["/city/jobs"] = 0.3
+    assert client.get_jobs() == [{"id": "old"}]
+    assert client.get_jobs() == [{"id": "old"}]
+    client.wait_for_refreshes(timeout=5)
+    assert len(seen) == 2
+    assert received == [[{"id": "new"}]]
+    assert client.get_jobs() == [{"id": "new"}]
+
+def test_cache_writes_are_compact_and_read_back_before_landing(stub):
+    client, routes, _ = stub
+    routes["/city/jobs"] = [(200, {"data": [{"id": "J4", "pickup": [1, 2]}]})]
+    client.writer.flush()
+    client.writer._cond.acquire()   # bloquea el worker: la escritura queda pendiente
+    try:
+        assert client.get_jobs() == [{"id": "J4", "pickup": [1, 2]}]
+        cache_file = client._cache_path("city/jobs")
+        assert not cache_file.exists()
+        assert client.get_jobs(offline=True) == [{"id": "J4", "pickup": [1, 2]}]
+    finally:
+        client.writer._cond.release()
+    client.writer.flush()
+    assert cache_file.read_text(encoding="utf-8") == '[{"id":"J4","pickup":[1,2]}]'
+
+def test_iter_jobs_streams_and_caches(stub):
+    client, routes, _ = stub
+    jobs = [{"id": f"J{i}", "payout": i} for i in range(500)]
+    routes["/city/jobs"] = [(200, {"data": jobs}, {"ETag": '"s1"'})]
+    stream = client.iter_jobs()
+    assert next(stream) == {"id": "J0", "payout": 0}
+    assert [j["id"] for j in stream] == [j["id"] for j in jobs[1:]]
+
+    client.writer.flush()
+    assert json.loads(client._cache_path("city/jobs").read_text(encoding="utf-8")) == jobs
+    routes["/city/jobs"] = [(304, None)]
+    assert list(client.iter_jobs()) == jobs
+    assert list(client.iter_jobs(offline=True)) == jobs
+
+def test_concurrent_job_streams_use_their_own_temp_files(stub):
+    client, routes, _ = stub
+    first = [{"id": f"A{i}"} for i in range(200)]
+    second = [{"id": f"B{i}"} for i in range(300)]
+    routes["/city/jobs"] = [(200, {"data": first}), (200, {"data": second})]
+    a, b = client.iter_jobs(), client.iter_jobs()
+    got_a, got_b = [next(a)], [next(b)]   # los dos streams abiertos a la vez
+    for x, y in zip(a, b):
+        got_a.append(x)
+        got_b.append(y)
+    got_b.extend(b)
+    assert got_a == first and got_b == second
+
+    client.writer.flush()
+    cache_file = client._cache_path("city/jobs")
+    assert json.loads(cache_file.read_text(encoding="utf-8")) in (first, second)
+    assert [p.name for p in cache_file.parent.iterdir() if p.name.endswith(".tmp")] == []
+
+def test_streamed_jobs_are_published_without_reading_the_feed_back(stub):
+    client, routes, _ = stub
+    jobs = [{"id": f"J{i}"} for i in range(500)]
+    routes["/city/jobs"] = [(200, {"data": jobs})]
+    submitted = []
+    real_submit = client.writer.submit
+    client.writer.submit = lambda path, data, on_done=None: (submitted.append(path), real_submit(path, data, on_done))
+    assert list(client.iter_jobs()) == jobs
+    client.writer.flush()
+    cache_file = client._cache_path("city/jobs")
+    assert cache_file not in submitted                  # el temporal se renombró, no se pasó como bytes
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == jobs
+
+def test_updates_subscribed_before_init_catch_early_refreshes(stub):
+    from ui_views import ApiUpdates
+
+    client, routes, _ = stub
+    client.policy = "stale_while_revalidate"
+    routes["/city/jobs"] = [(200, {"data": [{"id": "old"}]}), (200, {"data": [{"id": "new"}]})]
+    client.get_jobs()
+    client.writer.flush()
+    cache_file = client._cache_path("city/jobs")
+    stale = cache_file.stat().st_mtime - client.ttl - 5
+    os.utime(cache_file, (stale, stale))
+
+    updates = ApiUpdates(client)
+    assert client.get_jobs() == [{"id": "old"}]   # como init_game_state: lanza el refresco
+    client.wait_for_refreshes(timeout=5)          # termina antes de que exista la vista
+    assert updates.take() == {"city/jobs": [{"id": "new"}]}
+    assert updates.take() == {}
+    updates.close()
+    assert client._subscribers["city/jobs"] == []
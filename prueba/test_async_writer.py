@@ -0,0 +1,46 @@
+# test_async_writer.py
+import threading
+
+from async_writer import BackgroundWriter
+
+def test_writes_are_coalesced_per_path_and_atomic(tmp_path):
+    writer = BackgroundWriter(fsync=False)
+    path = tmp_path / "out.json"
+    done = []
+    gate = threading.Event()
+    # la primera escritura bloquea al worker hasta abrir 'gate'
+    writer.submit(tmp_path / "first", b"x", on_done=lambda p, e: gate.wait(5))
+    for i in range(5):
+        writer.submit(path, f"v{i}", on_done=lambda p, e: done.append(e))
+    assert writer.pending(path) == (True, b"v4")
+    gate.set()
+    assert writer.flush(timeout=5)
+
+    assert path.read_bytes() == b"v4"
+    assert done == [None] * 5 and writer.coalesced == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["first", "out.json"]   # sin temporales
+
+    writer.submit(path, None)
+    writer.flush(timeout=5)
+    assert not path.exists()
+
+def test_submit_file_publishes_by_rename_in_order_with_other_writes(tmp_path):
+    writer = BackgroundWriter(fsync=False)
+    path = tmp_path / "jobs.json"
+    gate = threading.Event()
+    writer.submit(tmp_path / "first", b"x", on_done=lambda p, e: gate.wait(5))
+
+    old = tmp_path / ".jobs.json.a.tmp"
+    old.write_bytes(b"[1]")
+    writer.submit_file(path, old)
+    assert writer.pending(path) == (True, b"[1]")
+    writer.submit(path, b"[2]")                    # reemplaza al archivo pendiente: se borra
+    assert not old.exists()
+    new = tmp_path / ".jobs.json.b.tmp"
+    new.write_bytes(b"[3]")
+    writer.submit_file(path, new)                  # la última escritura gana
+    gate.set()
+    assert writer.flush(timeout=5)
+
+    assert path.read_bytes() == b"[3]"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["first", "jobs.json"]
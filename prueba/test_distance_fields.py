@@ -0,0 +1,58 @@
+# test_distance_fields.py
+import json
+from pathlib import Path
+
+from map_manager import GameMap
+from pathfinding import a_star, path_cost
+from distance_fields import DistanceFieldCache
+
+def _city():
+    data = json.load(open(Path("api_cache") / "city_map.json", encoding="utf-8"))
+    return GameMap(data)
+
+def test_fields_match_a_star_for_job_endpoints():
+    gm = _city()
+    jobs = json.load(open(Path("api_cache") / "city_jobs.json", encoding="utf-8"))
+    cache = DistanceFieldCache(gm)
+    cache.warm_orders(jobs)
+    starts = [(0, 0), (15, 15), (29, 29), (3, 20)]
+    for job in jobs:
+        root = tuple(job["pickup"])
+        for start in starts:
+            expected = a_star(gm, start, root)
+            route = cache.route_to(start, root)
+            if expected is None:
+                assert route is None
+                continue
+            assert route[0] == start and route[-1] == root
+            assert len(route) == len(expected)
+            fast = a_star(gm, start, root, weighted=True)
+            dist = cache.distance_to(start, root, weighted=True)
+            assert abs(dist - path_cost(gm, fast, weighted=True)) < 1e-9
+
+def test_fields_invalidate_when_grid_changes():
+    gm = GameMap({"name":"T", "width":5, "height":1, "tiles":["CCCCC"]})
+    cache = DistanceFieldCache(gm)
+    assert cache.distance_to((0, 0), (4, 0)) == 4
+    gm.set_tile(2, 0, "B")
+    assert cache.route_to((0, 0), (4, 0)) is None
+    assert cache.builds == 2
+
+def test_cache_is_bounded_by_bytes_and_warm_orders_keeps_what_fits():
+    from distance_fields import FIELD_BYTES_PER_CELL
+    gm = GameMap({"name":"T", "width":10, "height":10, "tiles":["C" * 10] * 10})
+    cache = DistanceFieldCache(gm, max_bytes=5 * 100 * FIELD_BYTES_PER_CELL)
+    assert cache.capacity() == 5
+    orders = [{"pickup": [i, 0], "dropoff": [i, 9]} for i in range(8)]   # 16 destinos
+    assert cache.warm_orders(orders) == 5
+    assert len(cache) == 5 and cache.bytes <= cache.max_bytes and cache.builds == 5
+    for order in orders[:2]:                           # lo que se calentó se usa sin reconstruir
+        cache.route_to((5, 5), tuple(order["pickup"]))
+        cache.route_to((5, 5), tuple(order["dropoff"]))
+    assert cache.builds == 5
+
+    # con el presupuesto por defecto todos los destinos de un mapa como el de la ciudad entran
+    big = DistanceFieldCache(_city())
+    jobs = json.load(open(Path("api_cache") / "city_jobs.json", encoding="utf-8"))
+    ends = {tuple(j[k]) for j in jobs for k in ("pickup", "dropoff")}
+    assert big.warm_orders(jobs) == len(ends) == len(big)
@@ -0,0 +1,78 @@
+# test_hpa.py
+import random
+
+from map_manager import GameMap
+from pathfinding import a_star
+from hpa import HierarchicalPathfinder
+
+def _random_map(rng, w, h, density):
+    rows = ["".join("B" if rng.random() < density else "C" for _ in range(w)) for _ in range(h)]
+    return GameMap({"name":"T", "width":w, "height":h, "tiles":rows})
+
+def _assert_valid(gm, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (ax, ay), (bx, by) in zip(path, path[1:]):
+        assert abs(ax - bx) + abs(ay - by) == 1
+        assert gm.is_walkable(bx, by)
+
+def test_hpa_finds_valid_near_optimal_paths():
+    rng = random.Random(42)
+    total_opt = total_hpa = 0
+    for _ in range(6):
+        gm = _random_map(rng, 48, 40, 0.25)
+        hpa = HierarchicalPathfinder(gm, cluster_size=8)
+        for _ in range(25):
+            start = (rng.randrange(48), rng.randrange(40))
+            goal = (rng.randrange(48), rng.randrange(40))
+            expected = a_star(gm, start, goal)
+            got = hpa.find_path(start, goal)
+            assert (expected is None) == (got is None)
+            if expected:
+                _assert_valid(gm, got, start, goal)
+                total_opt += len(expected)
+                total_hpa += len(got)
+    assert total_hpa <= total_opt * 1.15
+
+def test_hpa_rebuilds_only_affected_clusters():
+    gm = GameMap({"name":"T", "width":32, "height":32, "tiles":["C" * 32] * 32})
+    hpa = HierarchicalPathfinder(gm, cluster_size=8)
+    # muro vertical completo en x=20 -> sin camino de un lado al otro
+    for y in range(32):
+        gm.set_tile(20, y, "B")
+    assert hpa.find_path((0, 0), (31, 31)) is None
+    assert all(kx in (1, 2, 3) for kx, ky in hpa.last_rebuilt)
+    gm.set_tile(20, 5, "C")
+    path = hpa.find_path((0, 0), (31, 31))
+    _assert_valid(gm, path, (0, 0), (31, 31))
+    assert (20, 5) in path
+    assert hpa.last_rebuilt == {(2, 0)}
+
+def test_hpa_unwalkable_start_matches_a_star():
+    # start dentro de un edificio en el borde de su cluster: la única salida está en el cluster vecino
+    rows = ["C" * 16 for _ in range(16)]
+    rows[3] = "CCCCCCBBCCCCCCCC"
+    rows[2] = "CCCCCCCBCCCCCCCC"
+    rows[4] = "CCCCCCCBCCCCCCCC"
+    gm = GameMap({"name":"T", "width":16, "height":16, "tiles":rows})
+    hpa = HierarchicalPathfinder(gm, cluster_size=8)
+    start = (7, 3)
+    assert not gm.is_walkable(*start)
+    for goal in [(0, 0), (15, 15), (9, 3), (3, 12), (8, 3)]:
+        expected = a_star(gm, start, goal)
+        got = hpa.find_path(start, goal)
+        assert expected is not None and got is not None
+        _assert_valid(gm, got, start, goal)
+
+    rng = random.Random(7)
+    for _ in range(4):
+        gm = _random_map(rng, 40, 32, 0.3)
+        hpa = HierarchicalPathfinder(gm, cluster_size=8)
+        blocked = [(x, y) for y in range(32) for x in range(40) if not gm.is_walkable(x, y)]
+        for _ in range(60):
+            start = rng.choice(blocked)
+            goal = (rng.randrange(40), rng.randrange(32))
+            expected = a_star(gm, start, goal)
+            got = hpa.find_path(start, goal)
+            assert (expected is None) == (got is None)
+            if got:
+                _assert_valid(gm, got, start, goal)
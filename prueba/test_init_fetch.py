@@ -0,0 +1,76 @@
+# test_init_fetch.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api_client import ApiClient
+from state_initializer import init_game_state
+
+PAYLOADS = {
+    "/city/map": {"data": {"name": "StubCity", "width": 4, "height": 3,
+                           "tiles": ["CCCC", "CBBC", "CCCC"]}},
+    "/city/jobs": {"data": [{"id": "J1", "pickup": [0, 0], "dropoff": [3, 2]}]},
+    "/city/weather": {"data": {"initial": {"condition": "rain"}}},
+}
+
+@pytest.fixture
+def stub_api(tmp_path, monkeypatch):
+    """Servidor HTTP local; delays[path] = segundos de espera antes de responder."""
+    monkeypatch.chdir(tmp_path)   # el fallback de tiles lee api_cache/ relativo
+    delays = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            time.sleep(delays.get(path, 0))
+            body = json.dumps(PAYLOADS.get(path, {})).encode()
+            self.send_response(200 if path in PAYLOADS else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ApiClient(base_url=f"http://127.0.0.1:{server.server_port}",
+                       cache_dir=str(tmp_path / "cache"), data_dir=str(tmp_path / "data"))
+    yield client, delays, tmp_path
+    server.shutdown()
+    server.server_close()
+
+def test_endpoints_are_fetched_concurrently(stub_api):
+    client, delays, _ = stub_api
+    delays.update({"/city/map": 0.6, "/city/jobs": 0.6, "/city/weather": 0.6})
+    t0 = time.perf_counter()
+    state = init_game_state(client, deadline=5.0)
+    elapsed = time.perf_counter() - t0
+    assert elapsed < 1.5   # secuencial serían ~1.8 s
+    assert state.city_map["name"] == "StubCity"
+    assert state.orders[0]["id"] == "J1"
+    assert state.weather_state["condition"] == "rain"
+
+def test_slow_endpoint_falls_back_offline_after_deadline(stub_api):
+    client, delays, tmp_path = stub_api
+    (tmp_path / "data" / "weather.json").write_text(json.dumps({"initial": {"condition": "fog"}}))
+    delays["/city/weather"] = 3.0
+    t0 = time.perf_counter()
+    state = init_game_state(client, deadline=0.5)
+    assert time.perf_counter() - t0 < 2.0
+    assert state.orders[0]["id"] == "J1"
+    assert state.weather_state["condition"] == "fog"
+
+def test_requests_stop_retrying_when_the_deadline_expires(stub_api):
+    client, delays, tmp_path = stub_api
+    delays["/city/weather"] = 3.0    # con timeout=5 y retries=2 un GET podría bloquear ~15 s
+    assert client.timeout == 5.0 and client.retries == 2
+    init_game_state(client, deadline=0.5)
+    time.sleep(0.5)
+    # el hilo del request vencido ya terminó: no sigue reintentando después del arranque
+    assert not [t for t in threading.enumerate() if t.name.startswith("init-fetch")]
@@ -0,0 +1,40 @@
+# test_json_stream.py
+import json
+import random
+
+import pytest
+
+from json_stream import iter_json_array_items
+
+ITEMS = [{"id": f"J{i}", "note": "entrega ñandú €" * (i % 3), "w": [i, 1.5, None, True]} for i in range(50)] + [7, "x"]
+
+def _split(raw, rng):
+    cuts = sorted(rng.sample(range(1, len(raw)), rng.randint(0, 40)))
+    return [raw[a:b] for a, b in zip([0] + cuts, cuts + [len(raw)])]
+
+@pytest.mark.parametrize("wrap", [
+    lambda x: x,
+    lambda x: {"data": x},
+    lambda x: {"jobs": x, "total": len(x)},
+    lambda x: {"data": {"jobs": x}},
+    lambda x: {"version": 2, "data": x},   # envoltorio no reconocido al inicio -> parseo completo
+])
+def test_items_survive_arbitrary_chunk_splits(wrap):
+    rng = random.Random(5)
+    raw = json.dumps(wrap(ITEMS), ensure_ascii=False, indent=1).encode("utf-8")
+    for _ in range(25):
+        assert list(iter_json_array_items(_split(raw, rng))) == ITEMS
+    # byte por byte (cortando caracteres multibyte)
+    assert list(iter_json_array_items(raw[i:i + 1] for i in range(len(raw)))) == ITEMS
+
+def test_items_are_yielded_before_the_stream_ends():
+    def chunks():
+        yield b'[{"id": 1}, {"id": 2},'
+        raise AssertionError("no debería pedir más datos para los dos primeros")
+    stream = iter_json_array_items(chunks())
+    assert next(stream) == {"id": 1}
+    assert next(stream) == {"id": 2}
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array_items([b'[{"id": 1}, {"id"']))
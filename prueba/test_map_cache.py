@@ -0,0 +1,42 @@
+# test_map_cache.py
+import state_initializer
+from map_cache import open_binary_map, read_binary_meta, read_binary_tiles, tiles_to_cells, write_binary_map
+from map_manager import GameMap
+
+def test_binary_cache_roundtrip_and_grid(tmp_path):
+    rows = ["CCRB", "PWCC", "CC?C"]
+    symbols, cells = tiles_to_cells(rows)
+    path = tmp_path / "city_map.bin"
+    write_binary_map(path, 4, 3, symbols, cells, {"name": "Mini", "legend": {}})
+
+    meta = read_binary_meta(path)
+    assert (meta["width"], meta["height"], meta["name"]) == (4, 3, "Mini")
+
+    assert read_binary_tiles(path)[1] == rows
+    gm = GameMap({"name": "Mini", "tiles": read_binary_tiles(path)[1]})
+    assert (gm.width, gm.height) == (4, 3)
+    assert gm.grid.to_lists() == [list(r) for r in rows]
+    assert gm.is_walkable(2, 0) and not gm.is_walkable(3, 0)
+
+    # el grid es una copia: modificarlo no toca el archivo
+    gm.set_tile(0, 0, "B")
+    assert open_binary_map(path)[1][0] == symbols.index("C")
+
+def test_fallback_keeps_real_tiles(tmp_path, monkeypatch):
+    rows = ["CCRB", "PWCC"]
+    symbols, cells = tiles_to_cells(rows)
+    path = tmp_path / "city_map.bin"
+    write_binary_map(path, 4, 2, symbols, cells, {"name": "Mini"})
+    monkeypatch.setattr(state_initializer, "BIN_CACHE_PATH", path)
+
+    city_map = state_initializer._fallback_tiles_from_cache({"width": 4, "height": 2})
+    # el estado guarda los tiles, no una ruta a un cache que se sobrescribe
+    assert city_map["tiles"] == rows and "tiles_cache" not in city_map
+    path.unlink()
+    assert GameMap(city_map).grid.to_lists() == [list(r) for r in rows]
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    path = tmp_path / "city_map.bin"
+    path.write_bytes(b"nope")
+    assert read_binary_meta(path) is None
+    assert open_binary_map(tmp_path / "missing.bin") is None
@@ -6,3 +6,14 @@ def test_tiles_loaded_from_cache():
     gm = GameMap(data)
     assert gm.width == 3
     assert gm.grid[1][1] == "B"
+
+def test_compact_grid_view_and_queries():
+    data = {"name":"T", "width":3, "height":2, "tiles":["CRB", "PW?"]}
+    gm = GameMap(data)
+    assert len(gm.grid) == 2 and len(gm.grid[0]) == 3
+    assert gm.grid[0][:3] == ["C", "R", "B"]
+    assert gm.is_walkable(1, 0) and not gm.is_walkable(2, 0)
+    assert gm.get_speed(0, 1) == 0.8
+    assert not gm.is_walkable(3, 0) and gm.get_speed(-1, 0) == 0.0
+    gm.grid[1][0] = "C"
+    assert gm.grid[1][0] == "C" and gm.get_speed(0, 1) == 1.0
@@ -0,0 +1,81 @@
+# test_map_reconstruction.py
+import random
+
+import pytest
+
+import map_manager
+import state_initializer
+from map_manager import _reconstruct_grid
+
+def _random_payload(rng, w, h):
+    buildings = []
+    for _ in range(30):
+        kind = rng.randrange(3)
+        if kind == 0:
+            buildings.append({"x": rng.randint(-5, w + 5), "y": rng.randint(-5, h + 5),
+                              "w": rng.randint(-2, 8), "h": rng.randint(-2, 8)})
+        elif kind == 1:
+            buildings.append({"cells": [{"x": rng.randint(-2, w + 2), "y": str(rng.randint(-2, h + 2))}
+                                        for _ in range(4)]})
+        else:
+            buildings.append([[rng.randint(0, w), rng.randint(0, h)] for _ in range(3)])
+    roads = [
+        {"cells": [[x, 3] for x in range(-3, w + 3)]},
+        {"path": [{"x": 2, "y": y} for y in range(h)]},
+        {"points": [[w - 1, y] for y in range(0, h, 2)]},
+        {"x": 0, "y": 0},
+        [[1, 1], [1.0, 2.0]],
+    ]
+    return {"width": w, "height": h, "buildings": buildings, "roads": roads}
+
+@pytest.mark.skipif(map_manager.np is None, reason="numpy no instalado")
+def test_numpy_reconstruction_matches_python_path():
+    rng = random.Random(2024)
+    for _ in range(20):
+        w, h = rng.randint(1, 40), rng.randint(1, 40)
+        payload = _random_payload(rng, w, h)
+        fast = _reconstruct_grid(w, h, payload, use_numpy=True)
+        slow = _reconstruct_grid(w, h, payload, use_numpy=False)
+        assert fast.to_lists() == slow.to_lists()
+
+def test_unchanged_payload_is_loaded_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(map_manager, "BIN_CACHE_PATH", tmp_path / "city_map.bin")
+    monkeypatch.setattr(map_manager, "RECONSTRUCT_AND_SAVE", True)
+    payload = _random_payload(random.Random(7), 25, 18)
+
+    first = map_manager.GameMap(dict(payload))
+    map_manager.SHARED_WRITER.flush()
+    assert (tmp_path / "city_map.bin").exists()
+
+    calls = []
+    real = map_manager._reconstruct_grid
+    monkeypatch.setattr(map_manager, "_reconstruct_grid", lambda *a, **k: calls.append(a) or real(*a, **k))
+    saves = []
+    monkeypatch.setattr(map_manager, "_save_tiles_to_cache", lambda *a, **k: saves.append(a))
+
+    # mismo contenido con otro orden de claves -> mismo hash, sin reconstruir ni guardar
+    again = map_manager.GameMap({k: payload[k] for k in reversed(list(payload))})
+    assert again.grid.to_lists() == first.grid.to_lists()
+    assert calls == [] and saves == []
+
+    changed = dict(payload, roads=payload["roads"] + [{"x": 5, "y": 5}])
+    map_manager.GameMap(changed)
+    assert len(calls) == 1 and len(saves) == 1
+
+def test_stale_cache_is_not_used_for_a_changed_payload(tmp_path, monkeypatch):
+    monkeypatch.setattr(map_manager, "BIN_CACHE_PATH", tmp_path / "city_map.bin")
+    monkeypatch.setattr(state_initializer, "BIN_CACHE_PATH", tmp_path / "city_map.bin")
+    monkeypatch.setattr(map_manager, "RECONSTRUCT_AND_SAVE", True)
+    old = _random_payload(random.Random(11), 20, 12)
+    map_manager.GameMap(dict(old))
+    map_manager.SHARED_WRITER.flush()
+
+    # el API sirve otro mapa: el fallback no lo tapa con los tiles del cache viejo
+    new = _random_payload(random.Random(12), 20, 12)
+    city_map = state_initializer._fallback_tiles_from_cache(dict(new))
+    assert "tiles" not in city_map
+    expected = _reconstruct_grid(20, 12, new).to_lists()
+    assert map_manager.GameMap(city_map).grid.to_lists() == expected
+    map_manager.SHARED_WRITER.flush()
+    assert map_manager.read_binary_meta(tmp_path / "city_map.bin")["source_hash"] == \
+        map_manager._source_hash(20, 12, new)
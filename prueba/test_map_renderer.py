@@ -0,0 +1,30 @@
+# test_map_renderer.py
+from map_manager import GameMap, TILE_DEFS
+from map_renderer import TileLayer
+
+def test_tile_layer_only_updates_changed_cells():
+    gm = GameMap({"name":"T", "width":3, "height":2, "tiles":["CCC", "CBC"]})
+    layer = TileLayer(gm, 10, draw_grid_lines=True, flip_y=True)
+    assert layer.sync() == 0
+
+    # chunk aún no construido: el cambio no cuesta nada
+    assert gm.set_tile(2, 1, "C")
+    assert layer.sync() == 0
+
+    chunk = layer._build_chunk(0, 0)
+    assert gm.set_tile(0, 0, "B")
+    assert gm.set_tile(0, 0, "B")  # sin cambio real: no marca nada nuevo
+    assert layer.sync() == 1
+    sprite = chunk.sprites[0]
+    assert tuple(sprite.color)[:3] == tuple(TILE_DEFS["B"]["color"])[:3]
+    # fila 0 arriba cuando flip_y=True
+    assert sprite.center_y == 15
+
+def test_tile_layer_culls_chunks_outside_view():
+    gm = GameMap({"name":"T", "width":40, "height":40, "tiles":["C" * 40] * 40})
+    layer = TileLayer(gm, 10, draw_grid_lines=False, flip_y=True, chunk_size=16)
+    assert len(layer.visible_chunks(None)) == 9
+    # vista de 100x100 px en la esquina inferior izquierda -> filas 30..39 con flip_y
+    assert layer.visible_cell_bounds((0, 0, 100, 100)) == (0, 30, 9, 39)
+    assert layer.visible_chunks((0, 0, 100, 100)) == [(0, 1), (0, 2)]
+    assert layer.visible_chunks((1000, 1000, 1100, 1100)) == []
@@ -3,8 +3,10 @@ import arcade
 from api_client import ApiClient
 from state_initializer import init_game_state
 from map_manager import GameMap, FLIP_Y  # si no exportas FLIP_Y, pon True/False aquí
+from map_renderer import MapCamera
 from player_manager import Player
-from pathfinding import a_star
+from route_cache import RouteCache
+from waeather_manager import multiplier_for
 
 SCREEN_SIZE = 800
 TILE_SIZE = 24  # debe coincidir con el tile_size del Player
@@ -51,6 +53,14 @@ class MapPlayerView(arcade.View):
 
         self.path_preview = []  # ruta calculada (preview)
         self.show_preview = True
+        # rutas ya calculadas (clicks repetidos no recalculan A*)
+        self.routes = RouteCache(self.game_map)
+
+        # cámara: sigue al player; el mapa sólo dibuja los chunks visibles
+        self.camera = MapCamera(SCREEN_SIZE, SCREEN_SIZE)
+        self._world_w = cols * TILE_SIZE
+        self._world_h = rows * TILE_SIZE
+        self._follow_player()
 
         # HUD pequeño (mensaje temporal)
         self._msg = None
@@ -61,8 +71,9 @@ class MapPlayerView(arcade.View):
 
     def on_draw(self):
         self.clear()
-        # dibujar mapa
-        self.game_map.draw_debug(tile_size=TILE_SIZE, draw_grid_lines=True)
+        # dibujar mapa (sólo chunks dentro de la vista de la cámara)
+        self.camera.use()
+        self.game_map.draw_debug(tile_size=TILE_SIZE, draw_grid_lines=True, view_rect=self.camera.view_rect)
 
         # preview path (si existe)
         if self.show_preview and self.path_preview:
@@ -84,7 +95,8 @@ class MapPlayerView(arcade.View):
         # dibujar player
         self.player.draw()
 
-        # HUD
+        # HUD (coordenadas de pantalla)
+        self.camera.use_screen()
         arcade.draw_text(
             f"Cell: ({self.player.cell_x},{self.player.cell_y})  Planned left: {max(0, len(self.player.planned_path) - self.player.next_step_index)}",
             8, SCREEN_SIZE - 20, arcade.color.WHITE, 14
@@ -101,6 +113,10 @@ class MapPlayerView(arcade.View):
             if self._msg_ttl <= 0:
                 self._msg = None
         self.player.update(dt)
+        self._follow_player()
+
+    def _follow_player(self):
+        self.camera.center_on(self.player.pixel_x, self.player.pixel_y, self._world_w, self._world_h)
 
     def on_key_press(self, key, modifiers):
         if self.player.moving:
@@ -129,10 +145,10 @@ class MapPlayerView(arcade.View):
             self._set_msg(f"No puedes moverte: {reason}", 1.6)
 
     def on_mouse_press(self, x, y, button, modifiers):
-        # convertir pixel a celda (si usas camera, convertir coordenadas primero)
-        # si tienes cámara: world_x, world_y = self.camera.screen_to_world(x, y)
-        cx = int(x // TILE_SIZE)
-        row_idx = int(y // TILE_SIZE)
+        # convertir pixel de pantalla -> mundo (cámara) -> celda
+        world_x, world_y = self.camera.screen_to_world(x, y)
+        cx = int(world_x // TILE_SIZE)
+        row_idx = int(world_y // TILE_SIZE)
         cy = (len(self.game_map.grid) - 1) - row_idx if FLIP_Y else row_idx
 
         if not (0 <= cx < self.game_map.width and 0 <= cy < self.game_map.height):
@@ -145,8 +161,10 @@ class MapPlayerView(arcade.View):
                 self._set_msg(f"No puedes moverte: {reason}", 1.2)
             return
 
-        # calcular ruta (preview) y planificar (no ejecutar)
-        path = a_star(self.game_map, (self.player.cell_x, self.player.cell_y), (cx, cy))
+        # calcular ruta más rápida (speed del tile + clima) y planificar (no ejecutar)
+        weather = getattr(self.state, "weather_state", None) or {}
+        path = self.routes.get_path((self.player.cell_x, self.player.cell_y), (cx, cy),
+                                    weighted=True, weather_multiplier=multiplier_for(weather.get("condition")))
         if path:
             self.path_preview = path
             self.player.plan_path(path)
@@ -0,0 +1,50 @@
+# test_memory_cache.py
+import json
+
+import api_client
+from api_client import ApiClient
+from memory_cache import MemoryCache
+
+def test_lru_eviction_by_bytes_and_ttl():
+    now = [0.0]
+    cache = MemoryCache(max_bytes=100, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1, size=40)
+    cache.put("b", 2, size=40)
+    assert cache.get("a") == 1          # 'a' pasa a ser el más reciente
+    cache.put("c", 3, size=40)          # 120 > 100 -> sale 'b' (LRU)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.bytes == 80 and cache.evictions == 1
+    assert not cache.put("huge", 0, size=500)
+
+    now[0] = 11.0
+    assert cache.get("a") is None and cache.bytes == 40
+
+def test_load_json_file_skips_parsing_until_file_changes(tmp_path, monkeypatch):
+    memory = MemoryCache()
+    client = ApiClient(cache_dir=str(tmp_path / "cache"), data_dir=str(tmp_path / "data"),
+                       memory_cache=memory)
+    path = tmp_path / "data" / "pedidos.json"
+    path.write_text(json.dumps([{"id": "J1", "pickup": [1, 2]}]))
+
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(api_client.json, "load", lambda f: loads.append(1) or real_load(f))
+    monkeypatch.setattr(api_client, "REVALIDATE_SECONDS", 3600)
+
+    assert client.get_jobs(offline=True) == [{"id": "J1", "pickup": [1, 2]}]
+    jobs = client.get_jobs(offline=True)
+    assert jobs == [{"id": "J1", "pickup": [1, 2]}] and len(loads) == 1
+    # cada hit devuelve objetos nuevos: modificarlos no altera el cache compartido
+    jobs.append({"id": "local"})
+    jobs[0]["pickup"][0] = 99
+    assert client.get_jobs(offline=True) == [{"id": "J1", "pickup": [1, 2]}]
+    # el presupuesto se cobra con lo que realmente queda en memoria (el pickle), no con el archivo
+    blob = memory.get(("json", str(path)))[2]
+    assert memory.bytes == len(blob)
+
+    # dentro de la ventana de revalidación un hit no mira el disco
+    path.write_text(json.dumps([{"id": "J1"}, {"id": "J2"}]))
+    assert len(client.get_jobs(offline=True)) == 1
+    monkeypatch.setattr(api_client, "REVALIDATE_SECONDS", 0)
+    assert len(client.get_jobs(offline=True)) == 2 and len(loads) == 2
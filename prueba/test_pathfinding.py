@@ -0,0 +1,111 @@
+# test_pathfinding.py
+from map_manager import GameMap
+from pathfinding import a_star, path_cost
+
+def _map(rows):
+    return GameMap({"name":"T", "width":len(rows[0]), "height":len(rows), "tiles":rows})
+
+def test_uniform_a_star_shortest_path():
+    gm = _map(["CCCCC", "CBBBC", "CCCCC"])
+    path = a_star(gm, (0, 1), (4, 1))
+    assert path[0] == (0, 1) and path[-1] == (4, 1)
+    assert len(path) == 7
+    assert a_star(gm, (0, 0), (2, 1)) is None   # destino no transitable
+
+def test_weighted_a_star_prefers_faster_tiles():
+    # fila 0 = carretera (1.5), fila 1 = parque (0.8): rodear por la carretera es más rápido
+    gm = _map(["RRRRR", "PPPPP", "BBBBB"])
+    short = a_star(gm, (0, 1), (4, 1))
+    fast = a_star(gm, (0, 1), (4, 1), weighted=True)
+    assert len(short) == 5 and len(fast) == 7
+    assert path_cost(gm, fast, weighted=True) < path_cost(gm, short, weighted=True)
+    # el clima escala el tiempo pero no cambia la mejor ruta
+    slow = a_star(gm, (0, 1), (4, 1), weighted=True, weather_multiplier=0.75)
+    assert slow == fast
+    assert abs(path_cost(gm, slow, True, 0.75) - path_cost(gm, fast, True) / 0.75) < 1e-9
+
+def _assert_valid(gm, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (ax, ay), (bx, by) in zip(path, path[1:]):
+        assert abs(ax - bx) + abs(ay - by) == 1
+        assert gm.is_walkable(bx, by)
+
+def test_jps_matches_a_star_on_random_grids():
+    import random
+    from pathfinding import jump_point_search
+    rng = random.Random(1234)
+    for _ in range(60):
+        w, h = rng.randint(2, 18), rng.randint(2, 18)
+        rows = ["".join("B" if rng.random() < 0.3 else "C" for _ in range(w)) for _ in range(h)]
+        gm = _map(rows)
+        for _ in range(10):
+            start = (rng.randrange(w), rng.randrange(h))
+            goal = (rng.randrange(w), rng.randrange(h))
+            expected = a_star(gm, start, goal)
+            got = jump_point_search(gm, start, goal)
+            if expected is None:
+                assert got is None
+            else:
+                _assert_valid(gm, got, start, goal)
+                assert len(got) == len(expected)
+
+def test_jps_expands_far_fewer_nodes_on_open_streets():
+    from pathfinding import find_path
+    gm = _map(["C" * 60] * 60)
+    astar_stats, jps_stats = {}, {}
+    a = find_path(gm, (0, 0), (59, 59), algorithm="astar", stats=astar_stats)
+    j = find_path(gm, (0, 0), (59, 59), algorithm="jps", stats=jps_stats)
+    assert len(a) == len(j) == 119
+    assert jps_stats["expanded"] * 10 <= astar_stats["expanded"]
+
+def test_jps_on_city_blocks_with_obstacles_matches_a_star_cost():
+    import random
+    from pathfinding import find_path
+    rng = random.Random(5)
+    # manzanas de 4x4 separadas por calles, con celdas bloqueadas sueltas en las calles
+    rows = ["".join("B" if (x % 5 and y % 5) or rng.random() < 0.08 else "C" for x in range(60))
+            for y in range(60)]
+    gm = _map(rows)
+    astar_total = jps_total = queries = 0
+    while queries < 40:
+        start = (rng.randrange(60), rng.randrange(60))
+        goal = (rng.randrange(60), rng.randrange(60))
+        if not (gm.is_walkable(*start) and gm.is_walkable(*goal)):
+            continue
+        queries += 1
+        astar_stats, jps_stats = {}, {}
+        a = find_path(gm, start, goal, algorithm="astar", stats=astar_stats)
+        j = find_path(gm, start, goal, algorithm="jps", stats=jps_stats)
+        if a is None:
+            assert j is None
+            continue
+        _assert_valid(gm, j, start, goal)
+        assert path_cost(gm, j) == path_cost(gm, a)
+        astar_total += astar_stats["expanded"]
+        jps_total += jps_stats["expanded"]
+    assert jps_total * 3 <= astar_total
+
+class _PlainMap:
+    """Mapa 'duck-typed' sin walkable_mask(): fuerza la versión genérica de a_star."""
+    def __init__(self, gm):
+        self.width, self.height = gm.width, gm.height
+        self.is_walkable, self.get_speed, self.fastest_speed = gm.is_walkable, gm.get_speed, gm.fastest_speed
+
+def test_flat_a_star_matches_generic_version():
+    import random
+    rng = random.Random(99)
+    for _ in range(40):
+        w, h = rng.randint(2, 16), rng.randint(2, 16)
+        rows = ["".join(rng.choice("CCRPBB") for _ in range(w)) for _ in range(h)]
+        gm = _map(rows)
+        plain = _PlainMap(gm)
+        for _ in range(8):
+            start = (rng.randrange(w), rng.randrange(h))
+            goal = (rng.randrange(w), rng.randrange(h))
+            for weighted in (False, True):
+                fast = a_star(gm, start, goal, weighted=weighted, weather_multiplier=0.9)
+                slow = a_star(plain, start, goal, weighted=weighted, weather_multiplier=0.9)
+                assert (fast is None) == (slow is None)
+                if fast:
+                    assert fast[0] == start and fast[-1] == goal
+                    assert abs(path_cost(gm, fast, weighted, 0.9) - path_cost(gm, slow, weighted, 0.9)) < 1e-9
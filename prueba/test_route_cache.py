@@ -0,0 +1,20 @@
+# test_route_cache.py
+from map_manager import GameMap
+from route_cache import RouteCache
+
+def test_route_cache_hits_and_invalidates_on_grid_change():
+    gm = GameMap({"name":"T", "width":5, "height":2, "tiles":["CCCCC", "CCCCC"]})
+    routes = RouteCache(gm, max_entries=2)
+    first = routes.get_path((0, 0), (4, 0))
+    first.append((9, 9))  # modificar la copia no afecta la cache
+    assert routes.get_path((0, 0), (4, 0)) == [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0)]
+    assert routes.stats()["hits"] == 1 and routes.stats()["misses"] == 1
+
+    routes.get_path((0, 0), (4, 0), weighted=True)   # otro modo de costo -> miss
+    routes.get_path((0, 1), (4, 1))                  # expulsa la entrada más vieja (LRU)
+    assert routes.stats()["size"] == 2
+
+    gm.set_tile(2, 0, "B")
+    path = routes.get_path((0, 0), (4, 0))
+    assert (2, 0) not in path and len(path) == 7
+    assert routes.misses == 4
@@ -23,3 +23,261 @@ def test_save_load():
 
 if __name__ == "__main__":
     test_save_load()
+
+def test_save_game_async_writes_atomically_in_background(tmp_path, monkeypatch):
+    import threading
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    state = GameState(player={"name": "Ana", "money": 10}, orders=[{"id": "J1"}],
+                      weather_state={"summary": "Lluvia"})
+
+    done = threading.Event()
+    results = []
+    future = save_manager.save_game_async(state, "auto.sav",
+                                          on_done=lambda path, err: (results.append((path, err)), done.set()))
+    state.player["money"] = 999          # cambios posteriores no entran en el guardado
+    state.orders.append({"id": "J2"})
+    assert done.wait(5) and future.result(5) == str(tmp_path / "auto.sav")
+    assert results == [(str(tmp_path / "auto.sav"), None)]
+
+    assert (tmp_path / "auto.sav").read_bytes()[:6] == save_manager.SAVE_MAGIC
+    loaded = save_manager.load_game("auto.sav")
+    assert loaded.player["money"] == 10 and len(loaded.orders) == 1
+    assert (tmp_path / "debug" / "auto.sav.json").exists()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["auto.sav", "debug", "index.json"]   # sin temporales
+
+    # formato anterior (pickle sin comprimir, mapa adentro) sigue cargando
+    import pickle
+    legacy = {"meta": {"version": "1.0"}, "state": dict(state.to_dict(), city_map={"width": 2})}
+    (tmp_path / "old.sav").write_bytes(pickle.dumps(legacy))
+    old = save_manager.load_game("old.sav")
+    assert old.player["money"] == 999 and old.city_map == {"width": 2}
+
+def test_city_map_is_stored_once_as_blob_and_compacted(tmp_path, monkeypatch):
+    import os
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    big_map = {"width": 200, "height": 200, "tiles": ["C" * 200] * 200}
+    state = GameState(player={"name": "Ana", "money": 1}, city_map=big_map)
+
+    hashed = []
+    real_hash = save_manager.map_content_hash
+    monkeypatch.setattr(save_manager, "map_content_hash", lambda m: hashed.append(1) or real_hash(m))
+    for slot in ("a.sav", "b.sav", "a.sav"):
+        save_manager.save_game(state, slot)
+    blobs = list((tmp_path / "blobs").iterdir())
+    assert len(blobs) == 1 and len(hashed) == 1            # un blob, hash memorizado
+    assert (tmp_path / "a.sav").stat().st_size < 1000       # el .sav ya no trae el mapa
+    assert save_manager.load_game("b.sav").city_map == big_map
+
+    # otro mapa en ambos slots -> el blob viejo queda sin referencias y se compacta
+    state.city_map = {"width": 1, "height": 1, "tiles": ["B"]}
+    save_manager.save_game(state, "a.sav")
+    save_manager.save_game(state, "b.sav")
+    os.utime(blobs[0], (1, 1))
+    assert save_manager.compact_blobs() == 1
+    assert not blobs[0].exists()
+    assert save_manager.load_game("a.sav").city_map == {"width": 1, "height": 1, "tiles": ["B"]}
+
+def test_container_header_and_lazy_map(tmp_path, monkeypatch):
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    city_map = {"width": 3, "height": 1, "tiles": ["CRB"]}
+    state = GameState(player={"name": "Ana", "money": 42}, city_map=city_map,
+                      orders=[{"id": "J1"}, {"id": "J2"}], reputation=80)
+    save_manager.save_game(state, "s.sav")
+
+    decoded = []
+    real_decode = save_manager._decode_section
+    monkeypatch.setattr(save_manager, "_decode_section", lambda *a: decoded.append(1) or real_decode(*a))
+    header = save_manager.read_save_header("s.sav")
+    assert decoded == []
+    assert header["summary"] == {"name": "Ana", "money": 42, "reputation": 80, "orders": 2}
+    assert set(header["sections"]) == {"player", "orders", "weather_state", "reputation"}
+
+    blob_loads = []
+    real_blob = save_manager._load_map_blob
+    monkeypatch.setattr(save_manager, "_load_map_blob", lambda ref: blob_loads.append(ref) or real_blob(ref))
+    loaded = save_manager.load_game("s.sav")
+    assert loaded.orders == [{"id": "J1"}, {"id": "J2"}] and blob_loads == []
+    # volver a guardar sin tocar el mapa no lo carga
+    save_manager.save_game(loaded, "s2.sav")
+    assert blob_loads == []
+    assert loaded.city_map == city_map and len(blob_loads) == 1
+
+def test_index_tracks_slots_and_detects_corruption(tmp_path, monkeypatch):
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    state = GameState(player={"name": "Ana", "money": 5}, orders=[{"id": "J1"}])
+    save_manager.save_game(state, "a.sav")
+    state.player["money"] = 50
+    save_manager.save_game(state, "b.sav")
+
+    read_headers = []
+    monkeypatch.setattr(save_manager, "read_save_header", lambda slot: read_headers.append(slot))
+    entries = save_manager.list_save_entries()
+    assert read_headers == []                                  # sólo el índice
+    assert [e["name"] for e in entries] == ["b.sav", "a.sav"]
+    assert entries[0]["money"] == 50 and entries[0]["orders"] == 1
+    assert entries[0]["size"] == (tmp_path / "b.sav").stat().st_size
+    monkeypatch.undo()
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+
+    assert save_manager.verify_slot("a.sav") == "ok"
+    raw = bytearray((tmp_path / "a.sav").read_bytes())
+    raw[-1] ^= 0xFF
+    (tmp_path / "a.sav").write_bytes(bytes(raw))
+    assert save_manager.verify_slot("a.sav") == "corrupt"
+    assert save_manager.verify_slot("nope.sav") == "missing"
+
+    # índice perdido -> se reconstruye escaneando; slots borrados salen del índice
+    (tmp_path / "index.json").unlink()
+    (tmp_path / "b.sav").unlink()
+    assert [e["name"] for e in save_manager.list_save_entries()] == ["a.sav"]
+    assert save_manager.list_saves() == ["a.sav"]
+
+def test_blob_hash_covers_tile_content_not_cache_paths(tmp_path, monkeypatch):
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    meta = {"name": "TigerCity", "width": 3, "height": 1}
+    save_manager.save_game(GameState(city_map=dict(meta, tiles=["CCC"])), "a.sav")
+    save_manager.save_game(GameState(city_map=dict(meta, tiles=["CBC"])), "b.sav")
+    refs = {save_manager.read_save_header(s)["city_map_ref"] for s in ("a.sav", "b.sav")}
+    assert len(refs) == 2                                   # misma metadata, otros tiles -> otro blob
+    assert save_manager.load_game("b.sav").city_map["tiles"] == ["CBC"]
+
+    # un estado viejo con ruta al cache: la ruta no se guarda
+    save_manager.save_game(GameState(city_map=dict(meta, tiles=["CCC"], tiles_cache="api_cache/city_map.bin")), "c.sav")
+    assert save_manager.read_save_header("c.sav")["city_map_ref"] in refs
+    assert "tiles_cache" not in save_manager.load_game("c.sav").city_map
+
+def test_async_save_hashes_a_map_snapshot_off_the_state(tmp_path, monkeypatch):
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    hashed = []
+    real_hash = save_manager.map_content_hash
+    monkeypatch.setattr(save_manager, "map_content_hash", lambda m: hashed.append(1) or real_hash(m))
+    state = GameState(city_map={"width": 2, "height": 1, "tiles": ["CC"]})
+
+    save_manager.save_game_async(state, "a.sav")
+    state.city_map["tiles"][0] = "BB"        # el juego sigue tocando el mapa vivo
+    assert save_manager.wait_for_saves(5)
+    assert state._map_hash is None            # el worker no escribe en el estado
+    assert save_manager.load_game("a.sav").city_map["tiles"] == ["CC"]
+
+    # el próximo guardado adopta (en este hilo) el hash ya calculado: no se vuelve a hashear
+    other = GameState(city_map={"width": 1, "height": 1, "tiles": ["R"]})
+    save_manager.save_game_async(other, "b.sav")
+    assert save_manager.wait_for_saves(5) and len(hashed) == 2
+    save_manager.save_game_async(other, "c.sav")
+    assert save_manager.wait_for_saves(5)
+    assert other._map_hash is not None and other._map_hash[0] is other.city_map
+    assert len(hashed) == 2
+
+def test_stale_index_entry_is_a_mismatch_not_corruption(tmp_path, monkeypatch):
+    import threading
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    state = GameState(player={"name": "Ana", "money": 5})
+    save_manager.save_game(state, "a.sav")
+
+    # "crash" entre escribir el slot y el índice: la entrada queda con el sha256 anterior
+    real_update = save_manager._update_index
+    monkeypatch.setattr(save_manager, "_update_index", lambda *a: None)
+    state.player["money"] = 6
+    save_manager.save_game(state, "a.sav")
+    monkeypatch.setattr(save_manager, "_update_index", real_update)
+    assert save_manager.verify_slot("a.sav") == "mismatch"
+    assert save_manager.verify_slot("a.sav") == "ok"          # la entrada se actualizó
+    assert save_manager.list_save_entries()[0]["money"] == 6
+
+    # guardados concurrentes de varios slots: el índice termina coherente con todos
+    threads = [threading.Thread(target=save_manager.save_game, args=(GameState(player={"money": i}), f"t{i}.sav"))
+               for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(save_manager.verify_slot(f"t{i}.sav") == "ok" for i in range(8))
+
+def test_missing_map_blob_fails_the_load_not_the_game(tmp_path, monkeypatch):
+    import pytest
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    save_manager.save_game(GameState(player={"name": "Ana"}, city_map={"width": 1, "tiles": ["C"]}), "a.sav")
+    ref = save_manager.read_save_header("a.sav")["city_map_ref"]
+    save_manager._blob_path(ref).unlink()
+
+    assert save_manager.verify_slot("a.sav") == "missing_map"
+    assert save_manager.load_game("a.sav") is None             # también con lazy_map
+
+    # un loader diferido que falla no se pierde: el siguiente acceso lo reintenta
+    calls = []
+    state = GameState()
+    state.defer("city_map", lambda: calls.append(1) or (len(calls) > 1 and {"width": 1}) or 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        state.city_map
+    assert state.city_map == {"width": 1} and len(calls) == 2
+
+def test_save_with_only_a_map_hash_fails_if_the_blob_is_gone(tmp_path, monkeypatch):
+    import pytest
+    import save_manager
+    from models import GameState
+
+    monkeypatch.setattr(save_manager, "SAVE_DIR", tmp_path)
+    monkeypatch.setattr(save_manager, "DEBUG_DIR", tmp_path / "debug")
+    monkeypatch.setattr(save_manager, "BLOB_DIR", tmp_path / "blobs")
+    save_manager.save_game(GameState(player={"money": 1}, city_map={"width": 1, "tiles": ["C"]}), "a.sav")
+    state = save_manager.load_game("a.sav")                    # mapa diferido: sólo se conoce su hash
+    ref = save_manager.read_save_header("a.sav")["city_map_ref"]
+    save_manager._blob_path(ref).unlink()                      # p. ej. compactado entre medio
+
+    future = save_manager.save_game_async(state, "b.sav")
+    with pytest.raises(FileNotFoundError):
+        future.result(5)
+    with pytest.raises(FileNotFoundError):
+        save_manager.save_game(state, "b.sav")
+    assert not (tmp_path / "b.sav").exists()                   # ningún .sav apuntando a un blob borrado
+
+    # con el mapa en memoria el blob se vuelve a escribir
+    save_manager.save_game(GameState(city_map={"width": 1, "tiles": ["C"]}), "c.sav")
+    assert save_manager.verify_slot("c.sav") == "ok"
+    assert save_manager.load_game("c.sav").city_map["tiles"] == ["C"]
+
+def test_wait_for_saves_reports_a_timeout(monkeypatch):
+    from concurrent.futures import Future
+    import save_manager
+
+    monkeypatch.setitem(save_manager._pending, "lento.sav", Future())   # guardado que no termina
+    assert save_manager.wait_for_saves(0.05) is False
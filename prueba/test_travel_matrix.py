@@ -0,0 +1,39 @@
+# test_travel_matrix.py
+import json
+from pathlib import Path
+
+import pytest
+
+from map_manager import GameMap
+from pathfinding import a_star, path_cost
+from travel_matrix import order_cells, travel_time_matrix, np
+
+def _city():
+    return GameMap(json.load(open(Path("api_cache") / "city_map.json", encoding="utf-8")))
+
+def _expected(gm, cells, weighted):
+    out = []
+    for a in cells:
+        row = []
+        for b in cells:
+            p = a_star(gm, a, b, weighted=weighted, weather_multiplier=0.85)
+            row.append(path_cost(gm, p, weighted, 0.85) if p else float("inf"))
+        out.append(row)
+    return out
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_matrix_matches_a_star(weighted):
+    gm = _city()
+    jobs = json.load(open(Path("api_cache") / "city_jobs.json", encoding="utf-8"))
+    cells = order_cells(jobs[:4], courier=(15, 15)) + [(0, 0)]
+    got = travel_time_matrix(gm, cells, weighted=weighted, weather_multiplier=0.85, use_numpy=False)
+    want = _expected(gm, cells, weighted)
+    for r_got, r_want in zip(got, want):
+        assert r_got == pytest.approx(r_want)
+
+@pytest.mark.skipif(np is None, reason="numpy no instalado")
+def test_numpy_matrix_matches_python():
+    gm = _city()
+    jobs = json.load(open(Path("api_cache") / "city_jobs.json", encoding="utf-8"))
+    cells = order_cells(jobs, courier=(15, 15))
+    assert travel_time_matrix(gm, cells, use_numpy=True) == travel_time_matrix(gm, cells, use_numpy=False)
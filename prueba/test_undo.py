@@ -0,0 +1,82 @@
+# test_undo.py
+from models import GameState
+from undo_manager import UndoManager
+
+def _state():
+    city_map = {"width": 50, "height": 50, "tiles": ["C" * 50] * 50}
+    return GameState(player={"name": "Ana", "money": 0, "pos": [1, 1]}, city_map=city_map,
+                     orders=[{"id": f"J{i}", "payout": i} for i in range(100)],
+                     weather_state={"condition": "clear"})
+
+def test_undo_redo_roundtrip():
+    undo = UndoManager(max_steps=10)
+    state = _state()
+    undo.push(state)
+    state.player["money"] = 10
+    state.orders[3]["payout"] = 999
+
+    previous = undo.undo(current=state)
+    assert previous.player["money"] == 0 and previous.orders[3]["payout"] == 3
+    assert previous.city_map is state.city_map          # el mapa se comparte, no se copia
+    assert undo.can_redo()
+
+    previous.player["money"] = -1                        # modificar lo devuelto no altera el historial
+    again = undo.redo(current=previous)
+    assert again.player["money"] == 10 and again.orders[3]["payout"] == 999
+    assert undo.undo().player["money"] == -1
+
+    undo.push(state)
+    assert not undo.can_redo()                           # push nuevo descarta el redo
+
+def test_unchanged_parts_are_shared_between_snapshots():
+    undo = UndoManager(max_steps=50)
+    state = _state()
+    undo.push(state)
+    after_first = undo.bytes
+    for step in range(20):                               # un paso del jugador: sólo cambia player
+        state.player["pos"] = [step, step]
+        undo.push(state)
+    first, last = undo._stack[0], undo._stack[-1]
+    assert last.orders is first.orders and last.weather_state is first.weather_state
+    assert last.player is not first.player
+    assert undo.bytes - after_first < after_first          # 20 pasos cuestan menos que un snapshot completo
+
+def test_history_is_bounded_by_bytes():
+    probe = UndoManager()
+    probe.push(_state())
+    one = probe.bytes
+
+    undo = UndoManager(max_steps=100, max_bytes=int(one * 2.5))
+    state = _state()
+    for step in range(10):
+        state.orders = [dict(o, payout=step) for o in state.orders]   # cada paso cambia todos los pedidos
+        undo.push(state)
+    assert undo.bytes <= int(one * 2.5)
+    assert 1 <= len(undo) < 10
+    assert undo.undo().orders[0]["payout"] == 9
+
+def test_default_history_is_limited_by_bytes_not_steps():
+    undo = UndoManager()
+    assert undo.max_steps is None
+    state = _state()
+    for step in range(200):
+        state.player = dict(state.player, x=step)   # pasos chicos: sólo cambia el jugador
+        undo.push(state)
+    assert len(undo) == 200 and undo.bytes <= undo.max_bytes
+    assert undo.undo().player["x"] == 199
+
+def test_changing_one_order_costs_about_one_order():
+    from memory_cache import estimate_size
+    undo = UndoManager()
+    state = _state()
+    undo.push(state)
+    first = undo.bytes
+    pieces = estimate_size(state.player) + estimate_size(state.weather_state) + \
+        sum(estimate_size(o) for o in state.orders)
+    assert first < pieces * 1.1                          # cada pedido se cuenta una sola vez
+
+    state.orders[3]["payout"] = 999
+    before = undo.bytes
+    undo.push(state)
+    one_order = estimate_size(state.orders[3])
+    assert undo.bytes - before < one_order * 4         # el pedido nuevo + la tupla (superficial)
@@ -0,0 +1,200 @@
+# travel_matrix.py
+"""
+Matriz densa de tiempos de viaje entre un conjunto de celdas (courier, pickups, dropoffs).
+- Una sola búsqueda por celda origen (BFS o Dijkstra) que se detiene al alcanzar todos los destinos,
+  en vez de N² llamadas a a_star.
+- Las celdas repetidas se calculan una vez; con costo uniforme d(a,b) == d(b,a) entre celdas
+  transitables, así que cada par se busca sólo en una dirección.
+- Con costo uniforme y numpy disponible, los orígenes se expanden en lote como frentes de onda
+  vectorizados sobre el grid.
+matrix[i][j] = costo de ir de cells[i] a cells[j] (mismo criterio que a_star); INF si no hay ruta.
+"""
+
+import heapq
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional
+    np = None
+
+Cell = Tuple[int, int]
+INF = float("inf")
+
+NUMPY_BATCH = 8    # orígenes por lote en el modo vectorizado (lotes chicos caben mejor en cache)
+
+
+def order_cells(orders: Iterable[Dict[str, Any]], courier: Optional[Cell] = None) -> List[Cell]:
+    """Lista [courier?, pickup_0, dropoff_0, pickup_1, dropoff_1, ...] a partir de GameState.orders."""
+    cells: List[Cell] = []
+    if courier is not None:
+        cells.append((int(courier[0]), int(courier[1])))
+    for order in orders:
+        for key in ("pickup", "dropoff"):
+            c = order.get(key) if isinstance(order, dict) else None
+            if isinstance(c, (list, tuple)) and len(c) >= 2:
+                cells.append((int(c[0]), int(c[1])))
+    return cells
+
+
+def travel_time_matrix(game_map, cells: List[Cell], weighted: bool = False,
+                       weather_multiplier: float = 1.0, use_numpy: Optional[bool] = None) -> List[List[float]]:
+    """
+    Devuelve la matriz len(cells) x len(cells).
+    weighted/weather_multiplier: mismo significado que en pathfinding.a_star.
+    use_numpy: None = automático (sólo costo uniforme y si numpy está instalado).
+    """
+    if weighted and weather_multiplier <= 0:
+        raise ValueError("weather_multiplier debe ser > 0")
+    w, h = game_map.width, game_map.height
+    mask = game_map.walkable_mask()
+
+    unique: List[int] = []
+    slot: Dict[int, int] = {}
+    idx_of: List[Optional[int]] = []
+    for c in cells:
+        x, y = int(c[0]), int(c[1])
+        if not (0 <= x < w and 0 <= y < h):
+            idx_of.append(None)
+            continue
+        i = y * w + x
+        if i not in slot:
+            slot[i] = len(unique)
+            unique.append(i)
+        idx_of.append(slot[i])
+
+    if use_numpy is None:
+        use_numpy = np is not None and not weighted
+    if use_numpy and (np is None or weighted):
+        raise ValueError("el modo numpy requiere numpy instalado y costo uniforme")
+
+    if use_numpy:
+        small = _numpy_uniform(mask, w, h, unique)
+    else:
+        costs = game_map.step_costs() if weighted else None
+        small = _python_search(mask, w, h, unique, costs, weather_multiplier)
+
+    n = len(cells)
+    matrix = [[INF] * n for _ in range(n)]
+    for a in range(n):
+        ia = idx_of[a]
+        if ia is None:
+            continue
+        row = small[ia]
+        out = matrix[a]
+        for b in range(n):
+            ib = idx_of[b]
+            if ib is not None:
+                out[b] = row[ib]
+    return matrix
+
+
+# ---------------- versión Python (BFS / Dijkstra con buffers planos) ----------------
+def _python_search(mask, w: int, h: int, nodes: List[int], costs, weather_multiplier: float) -> List[List[float]]:
+    k = len(nodes)
+    result = [[INF] * k for _ in range(k)]
+    target_slot = {n: j for j, n in enumerate(nodes)}
+    size = w * h
+    dist = array("d", [INF]) * size
+    stamp = array("I", [0]) * size   # dist[i] sólo es válido si stamp[i] == gen
+
+    for i, src in enumerate(nodes):
+        gen = i + 1
+        result[i][i] = 0.0
+        # costo uniforme: los pares (j < i) entre celdas transitables ya se conocen por simetría
+        pending = set()
+        for j, n in enumerate(nodes):
+            if j == i or not mask[n]:
+                continue
+            if costs is None and j < i and mask[src]:
+                result[i][j] = result[j][i]
+                continue
+            pending.add(n)
+        if not pending:
+            continue
+
+        stamp[src] = gen
+        dist[src] = 0.0
+        if costs is None:
+            frontier = [src]
+            d = 0
+            while frontier and pending:
+                d += 1
+                nxt = []
+                for v in frontier:
+                    y, x = divmod(v, w)
+                    for n in (v + 1 if x + 1 < w else -1, v - 1 if x > 0 else -1,
+                              v + w if y + 1 < h else -1, v - w if y > 0 else -1):
+                        if n < 0 or stamp[n] == gen or not mask[n]:
+                            continue
+                        stamp[n] = gen
+                        nxt.append(n)
+                        if n in pending:
+                            pending.discard(n)
+                            result[i][target_slot[n]] = float(d)
+                frontier = nxt
+        else:
+            heap = [(0.0, src)]
+            while heap and pending:
+                dv, v = heapq.heappop(heap)
+                if dv > dist[v]:
+                    continue
+                if v in pending:
+                    pending.discard(v)
+                    result[i][target_slot[v]] = dv
+                y, x = divmod(v, w)
+                for n in (v + 1 if x + 1 < w else -1, v - 1 if x > 0 else -1,
+                          v + w if y + 1 < h else -1, v - w if y > 0 else -1):
+                    if n < 0 or not mask[n]:
+                        continue
+                    nd = dv + costs[n] / weather_multiplier
+                    if stamp[n] != gen or nd < dist[n]:
+                        stamp[n] = gen
+                        dist[n] = nd
+                        heapq.heappush(heap, (nd, n))
+    return result
+
+
+# ---------------- versión numpy (frentes de onda en lote) ----------------
+def _numpy_uniform(mask, w: int, h: int, nodes: List[int]) -> List[List[float]]:
+    k = len(nodes)
+    result = np.full((k, k), np.inf)
+    if k == 0:
+        return result.tolist()
+    walk = np.frombuffer(bytes(mask), dtype=np.uint8).reshape(h, w).astype(bool)
+    ys = np.array([n // w for n in nodes])
+    xs = np.array([n % w for n in nodes])
+    target_ok = walk[ys, xs]
+
+    for start in range(0, k, NUMPY_BATCH):
+        batch = np.arange(start, min(k, start + NUMPY_BATCH))
+        b = len(batch)
+        frontier = np.zeros((b, h, w), dtype=bool)
+        frontier[np.arange(b), ys[batch], xs[batch]] = True
+        # celdas aún alcanzables: transitables y no visitadas (se reutilizan los buffers en cada paso)
+        open_ = np.broadcast_to(walk, (b, h, w)) & ~frontier
+        nb = np.empty_like(frontier)
+        found = np.zeros((b, k), dtype=bool)
+        found[np.arange(b), batch] = True
+        result[batch, batch] = 0.0
+        wanted = np.broadcast_to(target_ok, (b, k)).copy()
+        wanted[np.arange(b), batch] = True
+
+        d = 0
+        while frontier.any() and not found[wanted].all():
+            d += 1
+            nb.fill(False)
+            nb[:, 1:, :] |= frontier[:, :-1, :]
+            nb[:, :-1, :] |= frontier[:, 1:, :]
+            nb[:, :, 1:] |= frontier[:, :, :-1]
+            nb[:, :, :-1] |= frontier[:, :, 1:]
+            nb &= open_
+            open_ ^= nb
+            frontier, nb = nb, frontier
+            hit = frontier[:, ys, xs] & ~found
+            if hit.any():
+                rows, cols = np.nonzero(hit)
+                result[batch[rows], cols] = d
+                found |= hit
+    return result.tolist()
@@ -1,6 +1,6 @@
 # ui_views.py
 import arcade
-from save_manager import list_saves, load_game, save_game
+from save_manager import list_save_entries, load_game, save_game_async, verify_slot
 from state_initializer import init_game_state
 from api_client import ApiClient
 
@@ -8,6 +8,36 @@ SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 SCREEN_TITLE = "Courier Quest"
 
+# ----------- Datos refrescados en segundo plano -----------
+class ApiUpdates:
+    """
+    Guarda lo último que el ApiClient refrescó en segundo plano para city/jobs y city/weather
+    (se aplica en GameView.on_update, en el hilo del juego).
+    Se suscribe al crearse: hay que crearlo ANTES de init_game_state, porque ahí ya pueden arrancar
+    refrescos stale-while-revalidate y uno que termine antes de suscribirse se perdería.
+    """
+    ENDPOINTS = ("city/jobs", "city/weather")
+
+    def __init__(self, api):
+        self._pending = {}
+        self._unsubscribe = [api.subscribe(endpoint, self._on_api_data) for endpoint in self.ENDPOINTS]
+
+    def _on_api_data(self, endpoint, data):
+        self._pending[endpoint] = data
+
+    def take(self) -> dict:
+        """Devuelve (y vacía) los datos recibidos desde la última llamada."""
+        taken = {}
+        for endpoint in self.ENDPOINTS:
+            if endpoint in self._pending:
+                taken[endpoint] = self._pending.pop(endpoint)
+        return taken
+
+    def close(self):
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+
 # ----------- Main Menu View -----------
 class MainMenuView(arcade.View):
     def on_show(self):
@@ -34,7 +64,9 @@ class MainMenuView(arcade.View):
 class GameMenuView(arcade.View):
     def __init__(self):
         super().__init__()
-        self.saves = list_saves()
+        # metadatos de los slots desde saves/index.json (no se abre ningún .sav)
+        self.save_entries = list_save_entries()
+        self.saves = [e["name"] for e in self.save_entries]
 
     def on_show(self):
         arcade.set_background_color(arcade.color.DARK_SLATE_GRAY)
@@ -50,32 +82,60 @@ class GameMenuView(arcade.View):
                          arcade.color.LIGHT_GREEN, 20, anchor_x="center")
         arcade.draw_text("3. Retroceder", SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 40,
                          arcade.color.LIGHT_GREEN, 20, anchor_x="center")
+        if self.save_entries:
+            latest = self.save_entries[0]
+            arcade.draw_text(f"Último guardado: {latest.get('player') or '?'} · ${latest.get('money', 0)} · "
+                             f"{latest.get('orders', 0)} pedidos",
+                             SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 100, arcade.color.LIGHT_GRAY, 14, anchor_x="center")
 
     def on_key_press(self, key, modifiers):
         if key == arcade.key.KEY_1:  # Nueva partida
-            api = ApiClient()
+            # cache primero: el menú no espera a la red; los datos se refrescan en segundo plano
+            api = ApiClient(policy="stale_while_revalidate")
+            updates = ApiUpdates(api)   # suscrito antes del fetch inicial: no se pierde ningún refresco
             state = init_game_state(api)
-            save_game(state, "slot1.sav")
-            game_view = GameView(state)
+            # guardado en segundo plano: no frena el cambio de vista
+            save_game_async(state, "slot1.sav")
+            game_view = GameView(state, api, updates)
             self.window.show_view(game_view)
 
         elif key == arcade.key.KEY_2:  # Cargar partida
-            if self.saves:
-                state = load_game(self.saves[0])  # cargar el más reciente
+            # cargar el más reciente que no esté corrupto
+            slot = next((name for name in self.saves if verify_slot(name) in ("ok", "mismatch")), None)
+            if slot:
+                state = load_game(slot)
                 if state:
                     game_view = GameView(state)
                     self.window.show_view(game_view)
             else:
-                print("[INFO] No hay partidas guardadas")
+                print("[INFO] No hay partidas guardadas (válidas)")
 
         elif key == arcade.key.KEY_3:  # Retroceder
             self.window.show_view(MainMenuView())
 
 # ----------- Game View -----------
 class GameView(arcade.View):
-    def __init__(self, state):
+    def __init__(self, state, api=None, updates=None):
         super().__init__()
         self.state = state
+        # datos refrescados en segundo plano por el ApiClient (se aplican en on_update, en el hilo del juego)
+        if updates is None and api is not None and hasattr(api, "subscribe"):
+            updates = ApiUpdates(api)
+        self.updates = updates
+
+    def on_update(self, delta_time):
+        if self.updates is None:
+            return
+        received = self.updates.take()
+        if "city/jobs" in received:
+            self.state.orders = ApiClient.parse_jobs(received["city/jobs"])
+        if "city/weather" in received:
+            self.state.weather_state = ApiClient.parse_weather(received["city/weather"])
+
+    def on_hide_view(self):
+        if self.updates is not None:
+            self.updates.close()
+            self.updates = None
 
     def on_show(self):
         arcade.set_background_color(arcade.color.DARK_GREEN)
@@ -1,20 +1,185 @@
 # undo_manager.py
-from collections import deque
+"""
+Historial de deshacer / rehacer con snapshots que comparten estructura.
+- city_map se guarda por referencia (no cambia durante la partida; si está diferido se
+  guarda su loader y no se carga).
+- player / weather_state / cada pedido se copian sólo si cambiaron respecto del snapshot
+  anterior; si no, el snapshot nuevo reutiliza la copia del anterior.
+- La historia se acota por bytes estimados (cada copia se cuenta una sola vez aunque la compartan
+  varios snapshots), no por cantidad de pasos: con estados chicos entran muchos más pasos.
+  max_steps es un tope opcional extra.
+Un push por paso del jugador sólo copia lo que ese paso modificó.
+"""
+
+import copy
 import pickle
+import sys
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from memory_cache import estimate_size
+from models import GameState
+
+UNDO_MAX_BYTES = 8 * 1024 * 1024   # 8 MB
+
+
+class _Snapshot:
+    __slots__ = ("player", "orders", "weather_state", "reputation", "city_map", "map_loader", "map_hash",
+                 "pieces", "pickled")
+
+    def __init__(self):
+        self.pieces: List[Any] = []      # objetos copiados que este snapshot referencia (para contar bytes)
+        self.pickled: Optional[bytes] = None   # estados que no son GameState (compatibilidad)
+
 
 class UndoManager:
-    def __init__(self, max_steps=10):
-        self._stack = deque(maxlen=max_steps)
+    def __init__(self, max_steps: Optional[int] = None, max_bytes: int = UNDO_MAX_BYTES):
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self._stack: deque = deque()
+        self._redo: List[_Snapshot] = []
+        self._last: Optional[_Snapshot] = None   # base para compartir estructura
+        self._refs: Dict[int, List[Any]] = {}   # id(copia) -> [objeto, bytes, referencias]
+        self.bytes = 0
 
+    # ---------------- API ----------------
     def push(self, state):
-        # guardamos snapshot serializado para proteger contra cambios mutables
-        self._stack.append(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        """Guarda el estado actual (antes de modificarlo). Borra lo que se pudiera rehacer."""
+        for snap in self._redo:
+            self._release(snap)
+        self._redo.clear()
+        self._stack.append(self._take(state))
+        self._trim()
 
     def can_undo(self) -> bool:
         return len(self._stack) > 0
 
-    def undo(self):
+    def can_redo(self) -> bool:
+        return len(self._redo) > 0
+
+    def undo(self, current=None):
+        """Devuelve el último estado guardado. Si se pasa 'current', queda disponible para redo()."""
         if not self.can_undo():
             return None
-        data = self._stack.pop()
-        return pickle.loads(data)
+        snap = self._stack.pop()
+        if current is not None:
+            self._redo.append(self._take(current))
+        state = self._restore(snap)
+        self._release(snap)
+        return state
+
+    def redo(self, current=None):
+        """Rehace el último undo. Si se pasa 'current', queda disponible para undo()."""
+        if not self.can_redo():
+            return None
+        snap = self._redo.pop()
+        if current is not None:
+            self._stack.append(self._take(current))
+            self._trim()
+        state = self._restore(snap)
+        self._release(snap)
+        return state
+
+    def clear(self):
+        for snap in list(self._stack) + self._redo:
+            self._release(snap)
+        self._stack.clear()
+        self._redo.clear()
+        self._last = None
+
+    def __len__(self) -> int:
+        return len(self._stack)
+
+    # ---------------- snapshots ----------------
+    def _take(self, state) -> _Snapshot:
+        snap = _Snapshot()
+        if not isinstance(state, GameState):
+            # otros objetos: snapshot serializado como antes
+            snap.pickled = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            self._retain(snap, snap.pickled)
+            return snap
+
+        prev = self._last
+        snap.player = self._share_or_copy(snap, state.player, prev.player if prev else None)
+        snap.weather_state = self._share_or_copy(snap, state.weather_state, prev.weather_state if prev else None)
+        snap.reputation = state.reputation
+
+        prev_orders: Tuple[Any, ...] = prev.orders if prev else ()
+        if prev is not None and len(prev_orders) == len(state.orders) and list(prev_orders) == state.orders:
+            # caso común (el paso no tocó pedidos): una sola comparación en C, se comparte toda la tupla
+            orders_t = prev_orders
+            for order in orders_t:
+                self._retain(snap, order)
+        else:
+            orders_t = tuple(self._share_or_copy(snap, order, prev_orders[i] if i < len(prev_orders) else None)
+                             for i, order in enumerate(state.orders))
+        snap.orders = orders_t
+        # la tupla se cuenta sola (sus pedidos ya se retuvieron uno por uno): cambiar un pedido
+        # cuesta lo que ese pedido, no toda la lista
+        self._retain(snap, orders_t, sys.getsizeof(orders_t))
+
+        # el mapa nunca se copia; si sigue diferido se guarda el loader (no se carga)
+        if state.is_loaded("city_map"):
+            snap.city_map, snap.map_loader = state.city_map, None
+        else:
+            snap.city_map, snap.map_loader = None, state._deferred.get("city_map")
+        snap.map_hash = state._map_hash
+        self._last = snap
+        return snap
+
+    def _share_or_copy(self, snap: _Snapshot, value: Any, prev_copy: Any) -> Any:
+        if prev_copy is not None and prev_copy == value:
+            piece = prev_copy
+        else:
+            piece = copy.deepcopy(value)
+        self._retain(snap, piece)
+        return piece
+
+    @staticmethod
+    def _restore(snap: _Snapshot):
+        if snap.pickled is not None:
+            return pickle.loads(snap.pickled)
+        # copias nuevas: el juego puede modificar el estado devuelto sin tocar el historial
+        state = GameState(
+            player=copy.deepcopy(snap.player),
+            orders=[copy.deepcopy(o) for o in snap.orders],
+            weather_state=copy.deepcopy(snap.weather_state),
+            reputation=snap.reputation,
+        )
+        if snap.map_loader is not None:
+            state.defer("city_map", snap.map_loader)
+        else:
+            state.city_map = snap.city_map
+        state._map_hash = snap.map_hash
+        return state
+
+    # ---------------- contabilidad de memoria ----------------
+    def _retain(self, snap: _Snapshot, piece: Any, size: Optional[int] = None):
+        snap.pieces.append(piece)
+        entry = self._refs.get(id(piece))
+        if entry is None:
+            if size is None:
+                size = len(piece) if isinstance(piece, bytes) else estimate_size(piece)
+            self._refs[id(piece)] = [piece, size, 1]
+            self.bytes += size
+        else:
+            entry[2] += 1
+
+    def _release(self, snap: _Snapshot):
+        for piece in snap.pieces:
+            entry = self._refs.get(id(piece))
+            if entry is None:
+                continue
+            entry[2] -= 1
+            if entry[2] == 0:
+                del self._refs[id(piece)]
+                self.bytes -= entry[1]
+        snap.pieces = []
+        if snap is self._last:
+            # sus copias ya no se cuentan: no usarlas como base para compartir
+            self._last = self._stack[-1] if self._stack else None
+
+    def _trim(self):
+        while self._stack and ((self.max_steps is not None and len(self._stack) > self.max_steps) or
+                               (self.bytes > self.max_bytes and len(self._stack) > 1)):
+            self._release(self._stack.popleft())
@@ -14,6 +14,10 @@ MULTIPLIERS = {
     "cold": 0.92,
 }
 
+def multiplier_for(condition) -> float:
+    """Mclima para una condición (1.0 si es desconocida)."""
+    return MULTIPLIERS.get(condition, 1.0)
+
 class WeatherManager:
     def __init__(self, bursts=None, transition_matrix=None):
         """
@@ -39,6 +43,9 @@ class WeatherManager:
             self.intensity = b.get("intensity", 0.0)
             self.timer = b.get("duration_sec", 60)
 
+        # último multiplicador devuelto por update() (útil para el pathfinding con costo)
+        self.multiplier = MULTIPLIERS.get(self.current, 1.0)
+
     def _sample_next_condition(self, current):
         if current in self.transition_matrix:
             choices, probs = zip(*self.transition_matrix[current])
@@ -66,6 +73,7 @@ class WeatherManager:
                 self.current = self.next_condition
                 # reset timer tomando un valor razonable
                 self.timer = random.uniform(45, 60)
+            self.multiplier = cur
             return cur
         # no en transición
         self.timer -= dt
@@ -75,4 +83,5 @@ class WeatherManager:
             # intensidad aleatoria si lo deseas:
             self.intensity = random.random()
             self.start_transition_to(next_cond)
-        return MULTIPLIERS.get(self.current, 1.0)
+        self.multiplier = MULTIPLIERS.get(self.current, 1.0)
+        return self.multiplier